@@ -0,0 +1,286 @@
+"""Merenje operacija MenazerKlijenata nad sintetickom bazom raznih velicina.
+
+Za svako skladiste i velicinu baze meri pokretanje, ucitavanje, cuvanje,
+dodavanje/brisanje klijenata, pakete, beleske i prikaz liste, kao i
+najvecu zauzetu memoriju (tracemalloc). Radi bez Tk-a (koristi menadzer.py),
+a rezultati se mogu upisati kao JSON radi poredjenja izmedju izmena.
+
+JSON skladiste prepisuje ceo fajl posle svake izmene, pa za velike baze
+treba smanjiti --operacija ili ga izostaviti iz --skladiste.
+
+Primeri:
+    python benchmark.py --broj 1000 10000 100000 --izlaz rezultati.json
+    python benchmark.py --skladiste dnevnik sqlite --operacija 500
+    python benchmark.py --formati --broj 10000 100000 1000000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from jezgro import VRSTE_SKLADISTA, napravi_skladiste
+from jezgro.skladiste import FORMATI_SNIMKA, JsonSkladiste
+from menadzer import STRANICA, KonzolniMenadzer
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+
+IMENA = ["Marko", "Jelena", "Nikola", "Ana", "Stefan", "Milica", "Luka", "Ivana", "Đorđe", "Teodora"]
+PREZIMENA = ["Petrović", "Jovanović", "Nikolić", "Marković", "Đorđević", "Stojanović", "Ilić", "Pavlović"]
+PAKETI = [("Osnovni", "1500"), ("Standard", "3000"), ("Premium", "6500"), ("Godišnji", "30000")]
+BELESKE = [
+    "Pozvati klijenta radi produženja paketa.",
+    "Klijent zadovoljan uslugom, traži ponudu za Premium.",
+    "Poslata faktura na email.",
+    "Dogovoren sastanak sledeće nedelje.",
+]
+
+
+def napravi_klijente(broj, paketa=2, beleski=3, seme=42):
+    """Sinteticka baza sa `broj` klijenata i prosecno `paketa`/`beleski` po klijentu."""
+    rnd = random.Random(seme)
+    klijenti = {}
+    for i in range(1, broj + 1):
+        ime = rnd.choice(IMENA)
+        prezime = rnd.choice(PREZIMENA)
+        klijenti[str(i)] = {
+            "ime": ime,
+            "prezime": prezime,
+            "email": f"{ime.lower()}.{i}@primer.rs",
+            "telefon": f"06{rnd.randint(0, 9)}{rnd.randint(1000000, 9999999)}",
+            "paketi": [
+                {
+                    "naziv": naziv,
+                    "cena": cena,
+                    "datum_pocetka": f"2024-{rnd.randint(1, 12):02d}-01",
+                    "datum_dodele": f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} 10:00:00"
+                }
+                for naziv, cena in (rnd.choice(PAKETI) for _ in range(rnd.randint(0, 2 * paketa)))
+            ],
+            "beleske": [
+                {
+                    "tekst": rnd.choice(BELESKE),
+                    "datum": f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} 12:00:00"
+                }
+                for _ in range(rnd.randint(0, 2 * beleski))
+            ]
+        }
+    return klijenti
+
+
+def izmeri(funkcija, ponavljanja=3):
+    """Najbolje vreme (u sekundama) od `ponavljanja` poziva."""
+    najbolje = float("inf")
+    for _ in range(ponavljanja):
+        pocetak = time.perf_counter()
+        funkcija()
+        najbolje = min(najbolje, time.perf_counter() - pocetak)
+    return najbolje
+
+
+def vrh_memorije(funkcija):
+    """Najveca memorija (u bajtovima) koju Python zauzme tokom poziva."""
+    tracemalloc.start()
+    try:
+        funkcija()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def vrh_procesa():
+    """Najveci RSS procesa do sada u bajtovima (None na Windows-u)."""
+    if resource is None:
+        return None
+    vrh = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux vraca kilobajte, macOS bajtove
+    return vrh if sys.platform == "darwin" else vrh * 1024
+
+
+def tiho():
+    # KonzolniMenadzer javlja svaku izmenu na ekran; to ne ulazi u merenje
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def pripremi_bazu(klijenti, direktorijum, vrsta):
+    putanja = os.path.join(direktorijum, f"klijenti_{vrsta}.json")
+    skladiste = napravi_skladiste(putanja, vrsta)
+    skladiste.ucitaj()
+    skladiste.rezervisi_id(len(klijenti))
+    skladiste.sacuvaj(klijenti)
+    skladiste.zatvori()
+    return putanja
+
+
+def izmeri_operacije(putanja, vrsta, broj_operacija=100, ponavljanja=3, seme=42):
+    """Rezultati za jedno skladiste: lista recnika, po jedan za svaku operaciju."""
+    rezultati = []
+
+    def zabelezi(operacija, sekundi, broj=1, memorija=None):
+        rezultati.append({
+            "operacija": operacija,
+            "broj": broj,
+            "ukupno_s": sekundi,
+            "po_operaciji_us": sekundi / broj * 1e6,
+            "vrh_memorije_b": memorija
+        })
+
+    def pokreni():
+        KonzolniMenadzer(napravi_skladiste(putanja, vrsta)).zatvori()
+
+    zabelezi("pokretanje", izmeri(pokreni, ponavljanja), memorija=vrh_memorije(pokreni))
+
+    menadzer = KonzolniMenadzer(napravi_skladiste(putanja, vrsta))
+    try:
+        zabelezi("ucitaj_podatke", izmeri(menadzer.ucitaj_podatke, ponavljanja),
+                 memorija=vrh_memorije(menadzer.ucitaj_podatke))
+
+        rnd = random.Random(seme)
+        postojeci = list(menadzer.klijenti)
+        izmene = [
+            ("dodaj_klijenta", lambda i: menadzer.dodaj_klijenta(
+                "Benchmark", f"Klijent{i}", f"benchmark.{i}@primer.rs", "0601234567")),
+            ("dodeli_paket", lambda i: menadzer.dodeli_paket(
+                rnd.choice(postojeci), "Standard", "3000", "2025-01-01")),
+            ("dodaj_beleszku", lambda i: menadzer.dodaj_beleszku(
+                rnd.choice(postojeci), "Klijent zadovoljan uslugom.")),
+        ]
+        za_brisanje = iter(rnd.sample(postojeci, min(broj_operacija, len(postojeci))))
+        izmene.append(("obrisi_klijenta", lambda i: menadzer.obrisi_klijenta(next(za_brisanje))))
+        for operacija, funkcija in izmene:
+            broj = broj_operacija
+            if operacija == "obrisi_klijenta":
+                broj = min(broj_operacija, len(postojeci))
+            if not broj:
+                continue
+            with tiho():
+                pocetak = time.perf_counter()
+                for i in range(broj):
+                    funkcija(i)
+                trajanje = time.perf_counter() - pocetak
+            zabelezi(operacija, trajanje, broj)
+
+        with tiho():
+            zabelezi("sacuvaj_podatke", izmeri(menadzer.sacuvaj_podatke, ponavljanja),
+                     memorija=vrh_memorije(menadzer.sacuvaj_podatke))
+
+        # Prikaz liste i izvestaja (ispis ide u bafer, meri se samo priprema)
+        poslednja = max(len(menadzer.klijenti) - STRANICA, 0)
+        prikazi = [
+            ("prva_stranica", lambda: menadzer.stranica(menadzer.klijenti, 0, "LISTA KLIJENATA")),
+            ("poslednja_stranica", lambda: menadzer.stranica(menadzer.klijenti, poslednja, "LISTA KLIJENATA")),
+            ("pretraga_prezimena", lambda: menadzer.pretrazi(prezime="Petro")),
+            ("pretraga_beleski", lambda: menadzer.pretrazi(beleska="faktura")),
+            ("izvestaj_prihoda", menadzer.prikazi_prihode),
+        ]
+        for operacija, funkcija in prikazi:
+            with tiho():
+                zabelezi(operacija, izmeri(funkcija, ponavljanja), memorija=vrh_memorije(funkcija))
+    finally:
+        menadzer.zatvori()
+    return rezultati
+
+
+def uporedi_skladista(klijenti, direktorijum, vrste=tuple(VRSTE_SKLADISTA), broj_operacija=100, ponavljanja=3):
+    rezultati = []
+    for vrsta in vrste:
+        # Svaka baza u svom direktorijumu, da ostaci prethodne ne uticu na merenje
+        poddirektorijum = os.path.join(direktorijum, f"{vrsta}_{len(klijenti)}")
+        os.makedirs(poddirektorijum)
+        putanja = pripremi_bazu(klijenti, poddirektorijum, vrsta)
+        for rezultat in izmeri_operacije(putanja, vrsta, broj_operacija, ponavljanja):
+            rezultati.append(dict(skladiste=vrsta, klijenata=len(klijenti), **rezultat))
+    return rezultati
+
+
+def okruzenje():
+    return {
+        "datum": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platforma": platform.platform(),
+        "format_snimka": os.environ.get("MENADZER_FORMAT", "json"),
+        "vrh_procesa_b": vrh_procesa()
+    }
+
+
+def uporedi_formate(klijenti, direktorijum, ponavljanja=3):
+    rezultati = []
+    for format_snimka in FORMATI_SNIMKA:
+        putanja = os.path.join(direktorijum, f"klijenti_{format_snimka}.json")
+        skladiste = JsonSkladiste(putanja, format_snimka)
+        cuvanje = izmeri(lambda: skladiste.sacuvaj(klijenti), ponavljanja)
+        ucitavanje = izmeri(lambda: JsonSkladiste(putanja, format_snimka).ucitaj(), ponavljanja)
+        rezultati.append({
+            "format": format_snimka,
+            "klijenata": len(klijenti),
+            "cuvanje_s": cuvanje,
+            "ucitavanje_s": ucitavanje,
+            "velicina_b": os.path.getsize(putanja)
+        })
+    return rezultati
+
+
+def ispisi_tabelu(rezultati):
+    print(f"{'skladište':>9} {'klijenata':>10} {'operacija':<20} {'broj':>5} {'ukupno':>10} "
+          f"{'po operaciji':>13} {'memorija':>10}")
+    for r in rezultati:
+        memorija = "" if r["vrh_memorije_b"] is None else f"{r['vrh_memorije_b'] / 1024 / 1024:.1f} MB"
+        print(f"{r['skladiste']:>9} {r['klijenata']:>10} {r['operacija']:<20} {r['broj']:>5} "
+              f"{r['ukupno_s']:>9.3f}s {r['po_operaciji_us'] / 1000:>10.3f}ms {memorija:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merenje operacija menadžera klijenata")
+    parser.add_argument("--broj", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="velicine baze (broj klijenata)")
+    parser.add_argument("--skladiste", nargs="+", choices=VRSTE_SKLADISTA, default=list(VRSTE_SKLADISTA),
+                        help="vrste skladista koje se mere")
+    parser.add_argument("--operacija", type=int, default=100,
+                        help="broj izmena po vrsti (dodavanje, paket, beleska, brisanje)")
+    parser.add_argument("--ponavljanja", type=int, default=3)
+    parser.add_argument("--izlaz", help="JSON fajl sa rezultatima ('-' za standardni izlaz)")
+    parser.add_argument("--formati", action="store_true",
+                        help="samo poredjenje formata snimka (json/min/gzip)")
+    args = parser.parse_args()
+
+    direktorijum = tempfile.mkdtemp(prefix="menadzer_benchmark_")
+    rezultati = []
+    try:
+        if args.formati:
+            print(f"{'klijenata':>10} {'format':>6} {'čuvanje':>10} {'učitavanje':>11} {'veličina':>12}")
+        for broj in args.broj:
+            klijenti = napravi_klijente(broj)
+            if args.formati:
+                for r in uporedi_formate(klijenti, direktorijum, args.ponavljanja):
+                    print(f"{r['klijenata']:>10} {r['format']:>6} {r['cuvanje_s']:>9.3f}s "
+                          f"{r['ucitavanje_s']:>10.3f}s {r['velicina_b'] / 1024 / 1024:>9.1f} MB")
+                    rezultati.append(r)
+            else:
+                rezultati.extend(uporedi_skladista(klijenti, direktorijum, args.skladiste,
+                                                   args.operacija, args.ponavljanja))
+            del klijenti
+    finally:
+        shutil.rmtree(direktorijum, ignore_errors=True)
+
+    if not args.formati and args.izlaz != "-":
+        ispisi_tabelu(rezultati)
+    if args.izlaz:
+        izvestaj = json.dumps({"okruzenje": okruzenje(), "rezultati": rezultati}, ensure_ascii=False, indent=2)
+        if args.izlaz == "-":
+            print(izvestaj)
+        else:
+            with open(args.izlaz, 'w', encoding='utf-8') as f:
+                f.write(izvestaj + "\n")
@@ -0,0 +1,36 @@
+"""Jezgro menadzera klijenata: skladista, indeksi, uvoz i MenazerKlijenata.
+
+Konzola (menadzer.py) i obe Tk aplikacije (menadzer_app.py, menadzer_gui.py)
+grade na MenazerKlijenata, pa se ucitavanje, cuvanje i dodela ID-jeva rade
+na jednom mestu.
+
+Skladiste je svaki objekat sa ovim metodama (vidi JsonSkladiste,
+DnevnikSkladiste i SqliteSkladiste); nova vrsta se dodaje preko
+registruj_skladiste:
+
+- ucitaj() -> recnik {id: klijent} (moze biti i pogled, kao kod SQLite-a)
+- primeni(klijenti, zapisi) / upisi(klijenti, zapisi): primena i upis
+  zapisa iz primeni_zapis; `upisi` samo upisuje (koristi PozadinskiPisac)
+- sacuvaj(klijenti): pun upis
+- sledeci_id(), rezervisi_id(broj): ID-jevi se ne dodeljuju ponovo
+- zaglavlje / detalji(klijenti, id), svi_paketi(klijenti)
+- promenjeno(), osvezi(klijenti, pre_primene): izmene drugih procesa
+- zatvori()
+- u_memoriji: True ako su podaci u obicnom recniku u memoriji
+- putanja: arhiva beleski je u `<putanja>.arhiva` (vidi arhiva.ArhivaBeleski)
+- pretrazi(...) (opciono): skladiste samo pretrazuje umesto IndeksKlijenata
+"""
+
+from .menadzer import PODACI_FAJL, MenazerKlijenata
+from .skladiste import (VRSTE_SKLADISTA, OstecenFajl, napravi_skladiste, numericki_id,
+                        registruj_skladiste)
+
+__all__ = [
+    "PODACI_FAJL",
+    "MenazerKlijenata",
+    "VRSTE_SKLADISTA",
+    "OstecenFajl",
+    "napravi_skladiste",
+    "numericki_id",
+    "registruj_skladiste",
+]
@@ -0,0 +1,19 @@
+"""python -m jezgro <json_fajl> [baza]: prenos klijenata iz JSON fajla u SQLite bazu."""
+
+import argparse
+
+from .skladiste import SqliteSkladiste, sqlite_putanja
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m jezgro",
+                                     description="Prenos klijenata iz JSON fajla u SQLite bazu")
+    parser.add_argument("json_fajl", help="postojeci klijenti_podaci.json")
+    parser.add_argument("baza", nargs="?", help="SQLite baza (podrazumevano <json_fajl>.db)")
+    args = parser.parse_args()
+
+    baza = args.baza or sqlite_putanja(args.json_fajl)
+    skladiste = SqliteSkladiste(baza)
+    broj = skladiste.uvezi_json(args.json_fajl)
+    skladiste.zatvori()
+    print(f"Uvezeno {broj} klijenata u {baza}")
@@ -0,0 +1,138 @@
+import re
+
+_CENA = re.compile(r"(\d+)(?:\.(\d{1,2}))?")
+_MESEC = re.compile(r"(\d{4})-(\d{2})")
+
+BEZ_DATUMA = ""
+
+
+def parsiraj_cenu(tekst):
+    """Cena u parama (int) iz teksta kao "1500", "1.500", "1500,50",
+    "1500.50" ili "1.500,00 din". Baca ValueError za neispravnu cenu."""
+    cena = str(tekst).strip().lower()
+    if cena.endswith("din."):
+        cena = cena[:-4]
+    elif cena.endswith("din"):
+        cena = cena[:-3]
+    cena = cena.replace(" ", "").replace("\u00a0", "")
+
+    if "," in cena and "." in cena:
+        # Poslednji separator je decimalni, prvi razdvaja hiljade
+        hiljade, decimale = (".", ",") if cena.rfind(",") > cena.rfind(".") else (",", ".")
+        cena = cena.replace(hiljade, "").replace(decimale, ".")
+    elif cena.count(",") == 1:
+        cena = cena.replace(",", ".")
+    elif "," in cena or cena.count(".") > 1 or re.fullmatch(r"\d+\.\d{3}", cena):
+        # "1.500" i "1.500.000" su hiljade, kao i "1,500,000"
+        cena = cena.replace(",", "").replace(".", "")
+
+    poklapanje = _CENA.fullmatch(cena)
+    if poklapanje is None:
+        raise ValueError(f"Neispravna cena: {tekst}")
+    dinari, pare = poklapanje.groups()
+    return int(dinari) * 100 + int((pare or "0").ljust(2, "0"))
+
+
+def cena_u_tekst(para):
+    """Oblik u kome se cena cuva u podacima: "1500" ili "1500.50"."""
+    dinari, pare = divmod(para, 100)
+    return f"{dinari}.{pare:02d}" if pare else str(dinari)
+
+
+def formatiraj_iznos(para):
+    """Iznos za prikaz: 1.234.500,00"""
+    dinari, pare = divmod(abs(para), 100)
+    tekst = f"{dinari:,}".replace(",", ".") + f",{pare:02d}"
+    return "-" + tekst if para < 0 else tekst
+
+
+def mesec_pocetka(datum):
+    """"YYYY-MM" iz datuma pocetka paketa, ili BEZ_DATUMA."""
+    poklapanje = _MESEC.match(str(datum or "").strip())
+    return "%s-%s" % poklapanje.groups() if poklapanje else BEZ_DATUMA
+
+
+def _dodaj(mapa, kljuc, para, broj):
+    zbir = mapa.setdefault(kljuc, [0, 0])
+    zbir[0] += para
+    zbir[1] += broj
+    if zbir[1] == 0:
+        del mapa[kljuc]
+
+
+class IndeksPrihoda:
+    """Zbirni prihod (u parama) i broj dodeljenih paketa.
+
+    - po_paketu: naziv paketa -> [para, broj]
+    - po_mesecu: mesec pocetka ("YYYY-MM") -> [para, broj]
+    - po_paketu_i_mesecu: (naziv, mesec) -> [para, broj]
+
+    Kao i IndeksKlijenata, azurira se zapisima (`azuriraj`) pre nego sto
+    se zapis primeni na recnik, pa izvestaj ne prolazi kroz sve klijente.
+    Paketi cija se cena ne moze procitati (stari podaci) se broje, ali bez
+    iznosa; koliko ih je pokazuje `neispravnih`.
+    """
+
+    def __init__(self):
+        self.po_paketu = {}
+        self.po_mesecu = {}
+        self.po_paketu_i_mesecu = {}
+        self.neispravnih = 0
+
+    def izgradi(self, paketi):
+        """Gradi indeks iz svih paketa (vidi `svi_paketi` u skladistu)."""
+        self.__init__()
+        for paket in paketi:
+            self.dodaj_paket(paket)
+        return self
+
+    def azuriraj(self, klijenti, zapis):
+        op = zapis["op"]
+        klijent = klijenti.get(zapis["id"])
+        if klijent is None:
+            return
+        if op in ("dodaj_klijenta", "obrisi_klijenta"):
+            for paket in klijent["paketi"]:
+                self.ukloni_paket(paket)
+        elif op == "dodeli_paket" and zapis["poz"] <= len(klijent["paketi"]):
+            # Zapis sa pozicijom iza kraja liste se ne primenjuje (vidi primeni_zapis)
+            self.dodaj_paket(zapis["stavka"])
+
+    def dodaj_paket(self, paket):
+        self._promeni(paket, 1)
+
+    def ukloni_paket(self, paket):
+        self._promeni(paket, -1)
+
+    def _promeni(self, paket, znak):
+        try:
+            para = parsiraj_cenu(paket["cena"])
+        except ValueError:
+            para = 0
+            self.neispravnih += znak
+        naziv = paket["naziv"]
+        mesec = mesec_pocetka(paket.get("datum_pocetka"))
+        _dodaj(self.po_paketu, naziv, znak * para, znak)
+        _dodaj(self.po_mesecu, mesec, znak * para, znak)
+        _dodaj(self.po_paketu_i_mesecu, (naziv, mesec), znak * para, znak)
+
+    def ukupno(self):
+        """(para, broj paketa) za sve pakete."""
+        return (sum(para for para, _ in self.po_paketu.values()),
+                sum(broj for _, broj in self.po_paketu.values()))
+
+    def izvestaj_po_paketu(self):
+        """[(naziv, para, broj)] od najveceg prihoda."""
+        return sorted(((naziv, para, broj) for naziv, (para, broj) in self.po_paketu.items()),
+                      key=lambda red: (-red[1], red[0]))
+
+    def izvestaj_po_mesecu(self):
+        """[(mesec, para, broj)] hronoloski; paketi bez datuma su na kraju."""
+        return sorted(((mesec, para, broj) for mesec, (para, broj) in self.po_mesecu.items()),
+                      key=lambda red: (red[0] == BEZ_DATUMA, red[0]))
+
+    def izvestaj_po_paketu_i_mesecu(self):
+        """[(mesec, naziv, para, broj)] hronoloski, u mesecu od najveceg prihoda."""
+        return sorted(((mesec, naziv, para, broj)
+                       for (naziv, mesec), (para, broj) in self.po_paketu_i_mesecu.items()),
+                      key=lambda red: (red[0] == BEZ_DATUMA, red[0], -red[2], red[1]))
@@ -0,0 +1,249 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+
+from .modeli import Beleska, u_json
+from .pretraga import tokeni
+from .skladiste import ZakljucavanjeFajla, _identitet_fajla, zapisi_atomski
+
+# Beleske starije od ovoliko meseci se premestaju u arhivu (0 - bez arhiviranja)
+ARHIVA_MESECI = int(os.environ.get("MENADZER_ARHIVA_MESECI", "24"))
+
+# Dnevnik indeksa reci se sazima u reci.json kad naraste preko ovoliko
+# bajtova (ili preko velicine samog reci.json)
+PRAG_DNEVNIKA_RECI = 256 * 1024
+
+_SEGMENT = re.compile(r"(\d+)-(\d+)\.jsonl\.gz")
+
+
+def granica_arhive(meseci, sada=None):
+    """Datum i vreme pre `meseci` meseci, u obliku u kome se cuva datum beleske."""
+    # calendar (i locale) se uvozi tek ovde; pokretanje aplikacije ga ne treba
+    import calendar
+
+    sada = sada or datetime.now()
+    godina, mesec = divmod(sada.year * 12 + sada.month - 1 - meseci, 12)
+    dan = min(sada.day, calendar.monthrange(godina, mesec + 1)[1])
+    return sada.replace(year=godina, month=mesec + 1, day=dan).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ArhivaBeleski:
+    """Stare beleske klijenata u kompresovanim segmentima na disku.
+
+    Segment `<direktorijum>/<id>/<od>-<do>.jsonl.gz` sadrzi beleske sa
+    pozicijama od..do-1 (pozicije ukljucuju i arhivirane beleske), jednu
+    JSON liniju po belesci. Segment se upisuje pre zapisa
+    `arhiviraj_beleske`, pa se segmenti iza `arhivirano` klijenta (ostatak
+    prekinutog arhiviranja) ne citaju i zamenjuju se pri sledecem.
+
+    `reci.json` je invertovani indeks reci -> ID-jevi klijenata, pa
+    pretraga otvara samo segmente klijenata koji imaju sve trazene reci.
+    Arhiviranje i brisanje samo dopisuju liniju u `reci.log`
+    (`{"id", "reci"}` ili `{"id", "obrisi"}`); dnevnik se prepisuje u
+    reci.json tek kad naraste preko `PRAG_DNEVNIKA_RECI`. Ponovno
+    primenjivanje dnevnika preko sazetog indeksa daje isto stanje.
+    """
+
+    def __init__(self, direktorijum):
+        self.direktorijum = direktorijum
+        self.putanja_indeksa = os.path.join(direktorijum, "reci.json")
+        self.dnevnik_indeksa = os.path.join(direktorijum, "reci.log")
+        # Brava (i direktorijum) nastaje tek pri prvom arhiviranju
+        self.brava = None
+        self._indeks = None
+        self._indeks_id = None
+        # (uredjaj, inode) dnevnika i do kog bajta je procitan
+        self._dnevnik_id = None
+        self._procitano = 0
+
+    def _brava(self):
+        os.makedirs(self.direktorijum, exist_ok=True)
+        if self.brava is None:
+            self.brava = ZakljucavanjeFajla(os.path.join(self.direktorijum, "arhiva.lock"))
+        return self.brava
+
+    def _direktorijum_klijenta(self, id_klijenta):
+        return os.path.join(self.direktorijum, str(id_klijenta))
+
+    def _segmenti(self, id_klijenta, do):
+        """[(od, do, putanja)] segmenata koji pokrivaju pozicije 0..do-1."""
+        direktorijum = self._direktorijum_klijenta(id_klijenta)
+        try:
+            imena = os.listdir(direktorijum)
+        except FileNotFoundError:
+            return []
+        segmenti = []
+        for ime in imena:
+            poklapanje = _SEGMENT.fullmatch(ime)
+            if poklapanje:
+                pocetak, kraj = int(poklapanje.group(1)), int(poklapanje.group(2))
+                if kraj <= do:
+                    segmenti.append((pocetak, kraj, os.path.join(direktorijum, ime)))
+        segmenti.sort()
+        return segmenti
+
+    def indeks(self):
+        """Recnik rec -> skup ID-jeva; ponovo se cita kad ga promeni drugi proces.
+
+        Ako se od poslednjeg citanja samo dopisivalo u dnevnik, cita se samo
+        novi deo dnevnika.
+        """
+        identitet = _identitet_fajla(self.putanja_indeksa)
+        if self._indeks is None or identitet != self._indeks_id:
+            try:
+                with open(self.putanja_indeksa, 'r', encoding='utf-8') as f:
+                    self._indeks = {rec: set(ids) for rec, ids in json.load(f).items()}
+            except FileNotFoundError:
+                self._indeks = {}
+            self._indeks_id = identitet
+            self._dnevnik_id = None
+        self._citaj_dnevnik()
+        return self._indeks
+
+    def _citaj_dnevnik(self):
+        try:
+            with open(self.dnevnik_indeksa, 'rb') as f:
+                st = os.fstat(f.fileno())
+                dnevnik_id = (st.st_dev, st.st_ino)
+                if dnevnik_id != self._dnevnik_id or st.st_size < self._procitano:
+                    if self._dnevnik_id is not None:
+                        # Dnevnik je sazet u drugom procesu: reci.json je vec novi
+                        self._indeks_id = None
+                        self.indeks()
+                        return
+                    self._dnevnik_id = dnevnik_id
+                    self._procitano = 0
+                f.seek(self._procitano)
+                novo = f.read()
+        except FileNotFoundError:
+            if self._dnevnik_id is not None:
+                self._indeks_id = None
+                self._dnevnik_id = None
+                self.indeks()
+            return
+        # Nedovrsena poslednja linija (upis u toku) se cita sledeci put
+        kraj = novo.rfind(b"\n") + 1
+        for linija in novo[:kraj].splitlines():
+            if linija.strip():
+                self._primeni_izmenu(json.loads(linija))
+        self._procitano += kraj
+
+    def _primeni_izmenu(self, izmena):
+        id_klijenta = izmena["id"]
+        if izmena.get("obrisi"):
+            for rec in [rec for rec, ids in self._indeks.items() if id_klijenta in ids]:
+                ids = self._indeks[rec]
+                ids.discard(id_klijenta)
+                if not ids:
+                    del self._indeks[rec]
+        else:
+            for rec in izmena["reci"]:
+                self._indeks.setdefault(rec, set()).add(id_klijenta)
+
+    def _dopisi_izmene(self, izmene):
+        """Dopisuje izmene u dnevnik indeksa (pod bravom) i sazima ga po potrebi."""
+        self.indeks()
+        telo = "".join(json.dumps(izmena, ensure_ascii=False) + "\n" for izmena in izmene)
+        with open(self.dnevnik_indeksa, 'ab') as f:
+            f.write(telo.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self._citaj_dnevnik()
+        osnova = self._indeks_id[2] if self._indeks_id else 0
+        if os.path.getsize(self.dnevnik_indeksa) > max(PRAG_DNEVNIKA_RECI, osnova):
+            self.sazmi_indeks()
+
+    def sazmi_indeks(self):
+        """Prepisuje ceo indeks u reci.json i brise dnevnik."""
+        with self._brava():
+            indeks = self.indeks()
+            zapisi_atomski(self.putanja_indeksa, json.dumps(
+                {rec: sorted(ids) for rec, ids in indeks.items()}, ensure_ascii=False))
+            try:
+                os.remove(self.dnevnik_indeksa)
+            except FileNotFoundError:
+                pass
+            self._indeks_id = _identitet_fajla(self.putanja_indeksa)
+            self._dnevnik_id = None
+            self._procitano = 0
+
+    def dodaj(self, id_klijenta, od, beleske):
+        """Upisuje beleske sa pozicijama od..od+len-1 kao novi segment."""
+        self.dodaj_vise([(id_klijenta, od, beleske)])
+
+    def dodaj_vise(self, stavke):
+        """Segmenti za niz (id, od, beleske); u dnevnik indeksa idu samo nove reci."""
+        with self._brava():
+            indeks = self.indeks()
+            izmene = []
+            for id_klijenta, od, beleske in stavke:
+                id_klijenta = str(id_klijenta)
+                self._upisi_segment(id_klijenta, od, beleske)
+                reci = set().union(*(tokeni(beleszka["tekst"]) for beleszka in beleske))
+                nove = sorted(rec for rec in reci if id_klijenta not in indeks.get(rec, ()))
+                if nove:
+                    izmene.append({"id": id_klijenta, "reci": nove})
+            if izmene:
+                self._dopisi_izmene(izmene)
+
+    def _upisi_segment(self, id_klijenta, od, beleske):
+        direktorijum = self._direktorijum_klijenta(id_klijenta)
+        os.makedirs(direktorijum, exist_ok=True)
+        for pocetak, _, putanja in self._segmenti(id_klijenta, float("inf")):
+            if pocetak >= od:
+                os.remove(putanja)
+        telo = "".join(json.dumps(beleszka, ensure_ascii=False, default=u_json) + "\n"
+                       for beleszka in beleske)
+        zapisi_atomski(os.path.join(direktorijum, "%08d-%08d.jsonl.gz" % (od, od + len(beleske))),
+                       gzip.compress(telo.encode('utf-8'), compresslevel=6, mtime=0))
+
+    def _citaj_segment(self, putanja):
+        with open(putanja, 'rb') as f:
+            return [Beleska.iz_recnika(json.loads(linija))
+                    for linija in gzip.decompress(f.read()).decode('utf-8').splitlines() if linija]
+
+    def citaj_unazad(self, id_klijenta, do):
+        """(pozicija, beleska) arhiviranih beleski od najnovije; segment po segment."""
+        delovi = []
+        pokriveno = 0
+        for pocetak, kraj, putanja in self._segmenti(id_klijenta, do):
+            # Preklapanje ostaje samo posle prekinutog arhiviranja u drugom procesu
+            if kraj > pokriveno:
+                delovi.append((max(pocetak, pokriveno), pocetak, putanja))
+                pokriveno = kraj
+        for od, pocetak, putanja in reversed(delovi):
+            beleske = self._citaj_segment(putanja)
+            for poz in range(pocetak + len(beleske) - 1, od - 1, -1):
+                yield poz, beleske[poz - pocetak]
+
+    def pretrazi(self, tekst, arhivirano):
+        """[(id, pozicija, beleska)] arhiviranih beleski sa svim recima iz `tekst`.
+
+        `arhivirano(id)` vraca broj arhiviranih beleski klijenta ili None ako
+        klijent vise ne postoji.
+        """
+        reci = tokeni(tekst)
+        if not reci:
+            return []
+        indeks = self.indeks()
+        skupovi = sorted((indeks.get(rec, set()) for rec in reci), key=len)
+        rezultat = []
+        for id_klijenta in skupovi[0].intersection(*skupovi[1:]):
+            do = arhivirano(id_klijenta)
+            if not do:
+                continue
+            for poz, beleszka in self.citaj_unazad(id_klijenta, do):
+                if reci <= tokeni(beleszka["tekst"]):
+                    rezultat.append((id_klijenta, poz, beleszka))
+        return rezultat
+
+    def obrisi(self, id_klijenta):
+        import shutil
+
+        with self._brava():
+            shutil.rmtree(self._direktorijum_klijenta(id_klijenta), ignore_errors=True)
+            # Inace bi ID obrisanog klijenta zauvek ostao pod svim njegovim recima
+            if any(str(id_klijenta) in ids for ids in self.indeks().values()):
+                self._dopisi_izmene([{"id": str(id_klijenta), "obrisi": True}])
@@ -0,0 +1,307 @@
+from datetime import datetime
+
+from .arhiva import ARHIVA_MESECI, ArhivaBeleski, granica_arhive
+from .analitika import IndeksPrihoda, cena_u_tekst, parsiraj_cenu
+from .pretraga import IndeksKlijenata
+from .skladiste import PozadinskiPisac, napravi_skladiste, numericki_id
+from .uvoz import VELICINA_GRUPE, uvezi_grupno
+
+PODACI_FAJL = "klijenti_podaci.json"
+
+
+def trenutno_vreme():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class MenazerKlijenata:
+    """Klijenti sa paketima i beleskama nad jednim skladistem.
+
+    Zajednicko jezgro za menadzer.py, menadzer_app.py i menadzer_gui.py:
+    svaka izmena je zapis koji ide kroz `zabelezi`, pa indeksi i skladiste
+    (bilo koje vrste, vidi napravi_skladiste) vide izmene na isti nacin, a
+    ID-jeve uvek dodeljuje skladiste.
+
+    Izmene vracaju ID ili True kad su prihvacene, a None ili False kad
+    klijent ne postoji ili upis nije uspeo. Neispravna cena paketa baca
+    ValueError, kao i greska pri ucitavanju: prazan recnik bi se pri
+    sledecem cuvanju upisao preko ispravnih podataka.
+    """
+
+    def __init__(self, skladiste=None, u_pozadini=False):
+        self.skladiste = skladiste or napravi_skladiste(PODACI_FAJL)
+        self.klijenti = self.ucitaj_podatke()
+        # Upis na disk u pozadinskoj niti (samo za skladista u memoriji)
+        if u_pozadini and self.skladiste.u_memoriji:
+            self.pisac = PozadinskiPisac(self.skladiste)
+        else:
+            self.pisac = None
+        # SQLite skladiste pretrazuje preko svojih indeksa u bazi
+        if hasattr(self.skladiste, "pretrazi"):
+            self.indeks = None
+        else:
+            self.indeks = IndeksKlijenata().izgradi(self.klijenti)
+        self.prihodi = IndeksPrihoda().izgradi(self.skladiste.svi_paketi(self.klijenti))
+        self.indeksi = [indeks for indeks in (self.indeks, self.prihodi) if indeks is not None]
+        self.arhiva = ArhivaBeleski(self.skladiste.putanja + ".arhiva")
+
+    def azuriraj_indekse(self, klijenti, zapis):
+        for indeks in self.indeksi:
+            indeks.azuriraj(klijenti, zapis)
+
+    def ucitaj_podatke(self):
+        try:
+            return self.skladiste.ucitaj()
+        except Exception as e:
+            print(f"Greška pri učitavanju: {e}")
+            raise
+
+    def sacuvaj_podatke(self):
+        try:
+            # Pun upis bi pregazio ono sto su u medjuvremenu upisali drugi procesi
+            self.osvezi()
+            if self.pisac is None:
+                self.skladiste.sacuvaj(self.klijenti)
+                return True
+            self.pisac.isprazni()
+            with self.pisac.brava:
+                self.skladiste.sacuvaj(self.klijenti)
+                # Pun upis sadrzi i izmene koje pisac nije uspeo da upise
+                self.pisac.neupisani = []
+            return True
+        except Exception as e:
+            print(f"Greška pri čuvanju: {e}")
+            return False
+
+    def osvezi(self):
+        """Preuzima izmene drugih procesa (npr. otvorene aplikacije) i vraca
+        skup ID-jeva promenjenih klijenata."""
+        try:
+            if not self.skladiste.promenjeno():
+                return set()
+            if self.pisac is None:
+                promenjeni = self.skladiste.osvezi(self.klijenti, self.azuriraj_indekse)
+            else:
+                self.pisac.isprazni()
+                with self.pisac.brava:
+                    promenjeni = self.skladiste.osvezi(self.klijenti, self.azuriraj_indekse)
+            if promenjeni and not self.skladiste.u_memoriji:
+                # SQLite ne daje pojedinacne zapise drugih procesa, pa se prihodi citaju iz baze
+                self.prihodi.izgradi(self.skladiste.svi_paketi(self.klijenti))
+            return promenjeni
+        except Exception as e:
+            print(f"Greška pri osvežavanju: {e}")
+            return set()
+
+    def zabelezi(self, zapis, gotovo=None):
+        """Primenjuje izmenu; `gotovo(greska)` se poziva kad je izmena na disku.
+
+        Sa pozadinskim upisom `gotovo` poziva tek `obradi_zavrsene()`, a
+        izmena koja nije upisana ostaje u memoriji i upisuje se ponovo (vidi
+        PozadinskiPisac). Bez njega se posle neuspelog upisa podaci i
+        indeksi ponovo citaju sa diska.
+        """
+        self.azuriraj_indekse(self.klijenti, zapis)
+        try:
+            if self.pisac is not None:
+                self.pisac.primeni(self.klijenti, [zapis], gotovo)
+            else:
+                self.skladiste.primeni(self.klijenti, [zapis])
+                if gotovo is not None:
+                    gotovo(None)
+            return True
+        except Exception as e:
+            print(f"Greška pri čuvanju: {e}")
+            if self.pisac is None:
+                self.ponovo_ucitaj()
+            return False
+
+    def ponovo_ucitaj(self):
+        """Podaci i indeksi ponovo sa diska, npr. posle neuspelog upisa."""
+        try:
+            self.klijenti = self.skladiste.ucitaj()
+        except Exception as e:
+            print(f"Greška pri učitavanju: {e}")
+            return
+        if self.indeks is not None:
+            self.indeks.izgradi(self.klijenti)
+        self.prihodi.izgradi(self.skladiste.svi_paketi(self.klijenti))
+
+    def obradi_zavrsene(self):
+        if self.pisac is not None:
+            self.pisac.obradi_zavrsene()
+
+    def upisi_sve(self):
+        """Ceka pozadinski upis; vraca gresku ako neke izmene i dalje nisu na disku."""
+        if self.pisac is None:
+            return None
+        return self.pisac.upisi_sve()
+
+    def zatvori(self):
+        try:
+            if self.pisac is not None:
+                self.pisac.zatvori()
+        finally:
+            self.skladiste.zatvori()
+
+    def bulk_import(self, redovi, velicina_grupe=VELICINA_GRUPE):
+        """Uvozi niz redova (recnika) u grupama; vidi uvoz.uvezi_grupno."""
+        if self.pisac is None:
+            return uvezi_grupno(self.skladiste, self.klijenti, redovi, velicina_grupe, self.indeksi)
+        self.pisac.isprazni()
+        with self.pisac.brava:
+            return uvezi_grupno(self.skladiste, self.klijenti, redovi, velicina_grupe, self.indeksi)
+
+    def arhiviraj_beleske(self, meseci=ARHIVA_MESECI, ids=None):
+        """Beleske starije od `meseci` meseci premesta u arhivu i vraca
+        koliko ih je premesteno.
+
+        Beleske se dodaju hronoloski, pa se arhivira pocetak liste do prve
+        novije beleske (ili beleske bez datuma). Segmenti se upisuju pre
+        zapisa, indeks reci arhive jednom, a svi zapisi idu u skladiste
+        jednim upisom. `ids` ogranicava arhiviranje na te klijente, pa
+        aplikacija moze da arhivira deo po deo.
+        """
+        if meseci <= 0:
+            return 0
+        granica = granica_arhive(meseci)
+        stavke = []
+        zapisi = []
+        ukupno = 0
+        for id_klijenta in (list(self.klijenti) if ids is None else ids):
+            if id_klijenta not in self.klijenti:
+                continue
+            zaglavlje = self.zaglavlje(id_klijenta)
+            if zaglavlje["broj_beleski"] == zaglavlje["arhivirano"]:
+                continue
+            beleske = self.detalji(id_klijenta)["beleske"]
+            broj = 0
+            for beleszka in beleske:
+                datum = beleszka.get("datum")
+                if not isinstance(datum, str) or not datum or datum >= granica:
+                    break
+                broj += 1
+            if not broj:
+                continue
+            od = zaglavlje["arhivirano"]
+            stavke.append((id_klijenta, od, beleske[:broj]))
+            zapisi.append({"op": "arhiviraj_beleske", "id": id_klijenta, "do": od + broj})
+            ukupno += broj
+        if not zapisi:
+            return 0
+
+        self.arhiva.dodaj_vise(stavke)
+        if self.pisac is None:
+            self._primeni_grupu(zapisi)
+        else:
+            self.pisac.isprazni()
+            with self.pisac.brava:
+                self._primeni_grupu(zapisi)
+        return ukupno
+
+    def _primeni_grupu(self, zapisi):
+        # Svaki zapis je za drugog klijenta, pa indeksi mogu da se azuriraju unapred
+        for zapis in zapisi:
+            self.azuriraj_indekse(self.klijenti, zapis)
+        try:
+            self.skladiste.primeni(self.klijenti, zapisi)
+        except Exception:
+            self.ponovo_ucitaj()
+            raise
+
+    def beleske_od_najnovije(self, id_klijenta):
+        """(pozicija, beleska) od najnovije ka najstarijoj; arhivirane se
+        citaju tek kad se do njih dodje, segment po segment."""
+        klijent = self.detalji(id_klijenta)
+        arhivirano = klijent.get("arhivirano", 0)
+        beleske = list(klijent["beleske"])
+        for i in range(len(beleske) - 1, -1, -1):
+            yield arhivirano + i, beleske[i]
+        if arhivirano:
+            yield from self.arhiva.citaj_unazad(id_klijenta, arhivirano)
+
+    def pretrazi_arhivu(self, tekst):
+        """[(id, pozicija, beleska)] arhiviranih beleski koje sadrze sve reci iz `tekst`."""
+        def arhivirano(id_klijenta):
+            if id_klijenta not in self.klijenti:
+                return None
+            return self.zaglavlje(id_klijenta)["arhivirano"]
+
+        rezultati = self.arhiva.pretrazi(tekst, arhivirano)
+        return sorted(rezultati, key=lambda red: (numericki_id(red[0]), -red[1]))
+
+    def pretrazi(self, upit=None, email=None, telefon=None, prezime=None, beleska=None):
+        """Vraca sortirane ID-jeve klijenata koji odgovaraju pretrazi."""
+        izvor = self.indeks if self.indeks is not None else self.skladiste
+        ids = izvor.pretrazi(upit, email=email, telefon=telefon, prezime=prezime, beleska=beleska)
+        return sorted(ids, key=numericki_id)
+
+    def zaglavlje(self, id_klijenta):
+        """Kontakt i broj paketa/beleski, bez ucitavanja cele istorije."""
+        return self.skladiste.zaglavlje(self.klijenti, id_klijenta)
+
+    def detalji(self, id_klijenta):
+        """Pun zapis klijenta sa paketima i beleskama."""
+        return self.skladiste.detalji(self.klijenti, id_klijenta)
+
+    def dodaj_klijenta(self, ime, prezime, email, telefon, gotovo=None):
+        try:
+            id_klijenta = self.skladiste.sledeci_id()
+        except Exception as e:
+            print(f"Greška pri dodavanju: {e}")
+            return None
+        uspeh = self.zabelezi({
+            "op": "dodaj_klijenta",
+            "id": id_klijenta,
+            "klijent": {
+                "ime": ime,
+                "prezime": prezime,
+                "email": email,
+                "telefon": telefon
+            }
+        }, gotovo)
+        return id_klijenta if uspeh else None
+
+    def dodeli_paket(self, id_klijenta, naziv_paketa, cena, datum_pocetka, gotovo=None):
+        """Cena se cuva u jednom obliku (vidi analitika.cena_u_tekst);
+        neispravna cena baca ValueError."""
+        if id_klijenta not in self.klijenti:
+            return False
+
+        paket = {
+            "naziv": naziv_paketa,
+            "cena": cena_u_tekst(parsiraj_cenu(cena)),
+            "datum_pocetka": datum_pocetka,
+            "datum_dodele": trenutno_vreme()
+        }
+
+        return self.zabelezi({
+            "op": "dodeli_paket",
+            "id": id_klijenta,
+            "poz": self.zaglavlje(id_klijenta)["broj_paketa"],
+            "stavka": paket
+        }, gotovo)
+
+    def dodaj_beleszku(self, id_klijenta, tekst_beleske, gotovo=None):
+        if id_klijenta not in self.klijenti:
+            return False
+
+        beleszka = {
+            "tekst": tekst_beleske,
+            "datum": trenutno_vreme()
+        }
+
+        return self.zabelezi({
+            "op": "dodaj_belesku",
+            "id": id_klijenta,
+            "poz": self.zaglavlje(id_klijenta)["broj_beleski"],
+            "stavka": beleszka
+        }, gotovo)
+
+    def obrisi_klijenta(self, id_klijenta, gotovo=None):
+        if id_klijenta not in self.klijenti:
+            return False
+        arhivirano = self.zaglavlje(id_klijenta)["arhivirano"]
+        uspeh = self.zabelezi({"op": "obrisi_klijenta", "id": id_klijenta}, gotovo)
+        if uspeh and arhivirano:
+            self.arhiva.obrisi(id_klijenta)
+        return uspeh
@@ -0,0 +1,207 @@
+import re
+import sys
+from datetime import date
+
+_VREME = re.compile(r"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})")
+
+
+def vreme_u_broj(tekst):
+    """"YYYY-MM-DD HH:MM:SS" -> ceo broj sekundi od 0001-01-01 00:00:00.
+
+    Vrednost u bilo kom drugom obliku se vraca nepromenjena, pa se u JSON
+    upisuje tacno onako kako je procitana.
+    """
+    if type(tekst) is not str:
+        return tekst
+    poklapanje = _VREME.fullmatch(tekst)
+    if poklapanje is None:
+        return tekst
+    godina, mesec, dan, sat, minut, sekund = map(int, poklapanje.groups())
+    if sat > 23 or minut > 59 or sekund > 59:
+        return tekst
+    try:
+        dani = date(godina, mesec, dan).toordinal()
+    except ValueError:
+        return tekst
+    return (dani * 24 + sat) * 3600 + minut * 60 + sekund
+
+
+def broj_u_vreme(vrednost):
+    if type(vrednost) is not int:
+        return vrednost
+    dani, sekunde = divmod(vrednost, 86400)
+    sat, sekunde = divmod(sekunde, 3600)
+    minut, sekund = divmod(sekunde, 60)
+    return "%s %02d:%02d:%02d" % (date.fromordinal(dani).isoformat(), sat, minut, sekund)
+
+
+def _intern(vrednost):
+    # Nazivi paketa, cene i datumi pocetka se ponavljaju: jedan string za sve
+    return sys.intern(vrednost) if type(vrednost) is str else vrednost
+
+
+class _Zapis:
+    """Zajednicko za Klijent, Paket i Beleska.
+
+    Polja se citaju i kao iz recnika (`klijent["ime"]`, `paket.get(...)`),
+    pa ostatak koda radi isto sa modelom i sa recnikom iz JSON-a. Nepoznata
+    polja iz fajla cuvaju se u `ostalo` i vracaju se pri upisu.
+    """
+
+    __slots__ = ()
+    POLJA = ()
+
+    def __getitem__(self, kljuc):
+        if kljuc in self.POLJA:
+            return getattr(self, kljuc)
+        if self.ostalo is not None and kljuc in self.ostalo:
+            return self.ostalo[kljuc]
+        raise KeyError(kljuc)
+
+    def __setitem__(self, kljuc, vrednost):
+        if kljuc in self.POLJA:
+            setattr(self, kljuc, vrednost)
+        else:
+            if self.ostalo is None:
+                self.ostalo = {}
+            self.ostalo[kljuc] = vrednost
+
+    def get(self, kljuc, podrazumevano=None):
+        try:
+            return self[kljuc]
+        except KeyError:
+            return podrazumevano
+
+    def __contains__(self, kljuc):
+        return kljuc in self.POLJA or (self.ostalo is not None and kljuc in self.ostalo)
+
+    def keys(self):
+        return [kljuc for kljuc, _ in self.items()]
+
+    def items(self):
+        stavke = [(polje, getattr(self, polje)) for polje in self.POLJA]
+        if self.ostalo:
+            stavke.extend(self.ostalo.items())
+        return stavke
+
+    def u_recnik(self):
+        """Obican recnik za JSON (paketi i beleske takodje kao recnici)."""
+        recnik = {polje: getattr(self, polje) for polje in self.POLJA}
+        if self.ostalo:
+            recnik.update(self.ostalo)
+        return recnik
+
+    def _vrednosti(self):
+        return tuple(getattr(self, polje) for polje in self.__slots__)
+
+    def __eq__(self, drugi):
+        if isinstance(drugi, _Zapis):
+            return type(self) is type(drugi) and self._vrednosti() == drugi._vrednosti()
+        if isinstance(drugi, dict):
+            return self.u_recnik() == drugi
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.u_recnik())
+
+
+def _ostalo(podaci, polja):
+    return {k: v for k, v in podaci.items() if k not in polja} or None
+
+
+class Paket(_Zapis):
+    __slots__ = ("naziv", "cena", "datum_pocetka", "_dodela", "ostalo")
+    POLJA = ("naziv", "cena", "datum_pocetka", "datum_dodele")
+
+    def __init__(self, naziv, cena, datum_pocetka="", datum_dodele="", ostalo=None):
+        self.naziv = _intern(naziv)
+        self.cena = _intern(cena)
+        self.datum_pocetka = _intern(datum_pocetka)
+        self._dodela = vreme_u_broj(datum_dodele)
+        self.ostalo = ostalo
+
+    @property
+    def datum_dodele(self):
+        return broj_u_vreme(self._dodela)
+
+    @classmethod
+    def iz_recnika(cls, podaci):
+        if isinstance(podaci, cls):
+            return podaci
+        return cls(podaci["naziv"], podaci["cena"], podaci.get("datum_pocetka", ""),
+                   podaci.get("datum_dodele", ""), _ostalo(podaci, cls.POLJA))
+
+
+class Beleska(_Zapis):
+    __slots__ = ("tekst", "_datum", "ostalo")
+    POLJA = ("tekst", "datum")
+
+    def __init__(self, tekst, datum="", ostalo=None):
+        self.tekst = tekst
+        self._datum = vreme_u_broj(datum)
+        self.ostalo = ostalo
+
+    @property
+    def datum(self):
+        return broj_u_vreme(self._datum)
+
+    @classmethod
+    def iz_recnika(cls, podaci):
+        if isinstance(podaci, cls):
+            return podaci
+        return cls(podaci["tekst"], podaci.get("datum", ""), _ostalo(podaci, cls.POLJA))
+
+
+class Klijent(_Zapis):
+    """`beleske` su samo beleske koje nisu arhivirane; prvih `arhivirano`
+    beleski klijenta je u arhivi (vidi arhiva.ArhivaBeleski)."""
+
+    __slots__ = ("ime", "prezime", "email", "telefon", "paketi", "beleske", "arhivirano", "ostalo")
+    POLJA = ("ime", "prezime", "email", "telefon", "paketi", "beleske", "arhivirano")
+
+    def __init__(self, ime, prezime, email, telefon="", paketi=None, beleske=None, ostalo=None,
+                 arhivirano=0):
+        self.ime = ime
+        self.prezime = prezime
+        self.email = email
+        self.telefon = telefon
+        self.paketi = [] if paketi is None else paketi
+        self.beleske = [] if beleske is None else beleske
+        self.arhivirano = arhivirano
+        self.ostalo = ostalo
+
+    def items(self):
+        # Bez arhiviranih beleski klijent ima isti oblik kao pre arhive
+        return [(kljuc, vrednost) for kljuc, vrednost in super().items()
+                if kljuc != "arhivirano" or vrednost]
+
+    def u_recnik(self):
+        recnik = super().u_recnik()
+        recnik["paketi"] = [paket.u_recnik() for paket in self.paketi]
+        recnik["beleske"] = [beleszka.u_recnik() for beleszka in self.beleske]
+        if not self.arhivirano:
+            del recnik["arhivirano"]
+        return recnik
+
+    @classmethod
+    def iz_recnika(cls, podaci):
+        """Novi klijent iz recnika (JSON snimak ili zapis `dodaj_klijenta`)."""
+        return cls(podaci.get("ime", ""), podaci.get("prezime", ""), podaci.get("email", ""),
+                   podaci.get("telefon", ""),
+                   [Paket.iz_recnika(paket) for paket in podaci.get("paketi", ())],
+                   [Beleska.iz_recnika(beleszka) for beleszka in podaci.get("beleske", ())],
+                   _ostalo(podaci, cls.POLJA), podaci.get("arhivirano", 0))
+
+
+def klijenti_iz_recnika(podaci):
+    """{id: recnik} procitan iz JSON-a -> {id: Klijent}."""
+    return {id_klijenta: Klijent.iz_recnika(klijent) for id_klijenta, klijent in podaci.items()}
+
+
+def u_json(objekat):
+    """`default` za json.dumps, da recnik klijenata moze da se upise direktno."""
+    if isinstance(objekat, _Zapis):
+        return objekat.u_recnik()
+    raise TypeError(f"Objekat tipa {type(objekat).__name__} nije JSON serijalizabilan")
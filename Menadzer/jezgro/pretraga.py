@@ -0,0 +1,130 @@
+import re
+from bisect import bisect_left, insort
+
+_RECI = re.compile(r"\w+", re.UNICODE)
+
+
+def tokeni(tekst):
+    return set(_RECI.findall(tekst.lower()))
+
+
+def normalizuj_telefon(telefon):
+    return "".join(c for c in str(telefon) if c.isdigit())
+
+
+def _dodaj(mapa, kljuc, id_klijenta):
+    if kljuc:
+        mapa.setdefault(kljuc, set()).add(id_klijenta)
+
+
+def _ukloni(mapa, kljuc, id_klijenta):
+    ids = mapa.get(kljuc)
+    if ids is not None:
+        ids.discard(id_klijenta)
+        if not ids:
+            del mapa[kljuc]
+
+
+class IndeksKlijenata:
+    """Sekundarni indeksi nad recnikom klijenata.
+
+    - email i telefon: tacno poklapanje preko recnika
+    - prezime: sortirana lista za pretragu po prefiksu
+    - beleske: invertovani indeks reci -> ID-jevi klijenata (bez arhiviranih)
+
+    Indeks se azurira zapisima iz dnevnika (`azuriraj`) pre nego sto se
+    zapis primeni na recnik, pa uvek prati stanje `klijenti`.
+    """
+
+    def __init__(self):
+        self.po_emailu = {}
+        self.po_telefonu = {}
+        self.prezimena = []
+        self.reci_beleski = {}
+
+    def izgradi(self, klijenti):
+        self.__init__()
+        for id_klijenta, klijent in klijenti.items():
+            self.dodaj_klijenta(id_klijenta, klijent)
+            for beleszka in klijent["beleske"]:
+                self.dodaj_belesku(id_klijenta, beleszka["tekst"])
+        return self
+
+    def azuriraj(self, klijenti, zapis):
+        op = zapis["op"]
+        id_klijenta = zapis["id"]
+        if op in ("dodaj_klijenta", "obrisi_klijenta") and id_klijenta in klijenti:
+            self.ukloni_klijenta(id_klijenta, klijenti[id_klijenta])
+        if op == "dodaj_klijenta":
+            self.dodaj_klijenta(id_klijenta, zapis["klijent"])
+        elif op == "dodaj_belesku" and id_klijenta in klijenti:
+            self.dodaj_belesku(id_klijenta, zapis["stavka"]["tekst"])
+        elif op == "arhiviraj_beleske" and id_klijenta in klijenti:
+            # Arhivirane beleske se traze preko arhive (ArhivaBeleski.pretrazi)
+            klijent = klijenti[id_klijenta]
+            broj = zapis["do"] - klijent.get("arhivirano", 0)
+            if broj > 0:
+                ostaju = set().union(*(tokeni(b["tekst"]) for b in klijent["beleske"][broj:]))
+                for beleszka in klijent["beleske"][:broj]:
+                    for rec in tokeni(beleszka["tekst"]) - ostaju:
+                        _ukloni(self.reci_beleski, rec, id_klijenta)
+
+    def dodaj_klijenta(self, id_klijenta, klijent):
+        _dodaj(self.po_emailu, klijent["email"].strip().lower(), id_klijenta)
+        _dodaj(self.po_telefonu, normalizuj_telefon(klijent.get("telefon", "")), id_klijenta)
+        insort(self.prezimena, (klijent["prezime"].lower(), id_klijenta))
+
+    def dodaj_belesku(self, id_klijenta, tekst):
+        for rec in tokeni(tekst):
+            _dodaj(self.reci_beleski, rec, id_klijenta)
+
+    def ukloni_klijenta(self, id_klijenta, klijent):
+        _ukloni(self.po_emailu, klijent["email"].strip().lower(), id_klijenta)
+        _ukloni(self.po_telefonu, normalizuj_telefon(klijent.get("telefon", "")), id_klijenta)
+        stavka = (klijent["prezime"].lower(), id_klijenta)
+        i = bisect_left(self.prezimena, stavka)
+        if i < len(self.prezimena) and self.prezimena[i] == stavka:
+            del self.prezimena[i]
+        for beleszka in klijent["beleske"]:
+            for rec in tokeni(beleszka["tekst"]):
+                _ukloni(self.reci_beleski, rec, id_klijenta)
+
+    def po_prezimenu(self, prefiks):
+        prefiks = prefiks.lower()
+        rezultat = set()
+        for i in range(bisect_left(self.prezimena, (prefiks,)), len(self.prezimena)):
+            prezime, id_klijenta = self.prezimena[i]
+            if not prezime.startswith(prefiks):
+                break
+            rezultat.add(id_klijenta)
+        return rezultat
+
+    def po_beleskama(self, tekst):
+        reci = tokeni(tekst)
+        if not reci:
+            return set()
+        skupovi = sorted((self.reci_beleski.get(rec, set()) for rec in reci), key=len)
+        return set(skupovi[0]).intersection(*skupovi[1:])
+
+    def pretrazi(self, upit=None, email=None, telefon=None, prezime=None, beleska=None):
+        """Vraca skup ID-jeva. Slobodan `upit` trazi po svim indeksima (unija),
+        a imenovani kriterijumi se kombinuju presekom."""
+        skupovi = []
+        if upit:
+            upit = upit.strip()
+            nadjeni = set(self.po_emailu.get(upit.lower(), ()))
+            nadjeni |= self.po_telefonu.get(normalizuj_telefon(upit), set())
+            nadjeni |= self.po_prezimenu(upit)
+            nadjeni |= self.po_beleskama(upit)
+            skupovi.append(nadjeni)
+        if email:
+            skupovi.append(set(self.po_emailu.get(email.strip().lower(), ())))
+        if telefon:
+            skupovi.append(set(self.po_telefonu.get(normalizuj_telefon(telefon), ())))
+        if prezime:
+            skupovi.append(self.po_prezimenu(prezime))
+        if beleska:
+            skupovi.append(self.po_beleskama(beleska))
+        if not skupovi:
+            return set()
+        return set.intersection(*skupovi)
@@ -0,0 +1,1232 @@
+import gzip
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from .modeli import Beleska, Klijent, Paket, klijenti_iz_recnika, u_json
+from .pretraga import tokeni
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Vrsta skladista se bira preko promenljive okruzenja (json | dnevnik | sqlite)
+PODRAZUMEVANO_SKLADISTE = os.environ.get("MENADZER_SKLADISTE", "dnevnik")
+
+# Posle koliko zapisa u dnevniku se radi sazimanje u novi snimak
+PRAG_SAZIMANJA = 1000
+
+# Grupni fsync dnevnika: najvise jednom u FSYNC_MS milisekundi ili na FSYNC_ZAPISA zapisa
+FSYNC_MS = int(os.environ.get("MENADZER_FSYNC_MS", "200"))
+FSYNC_ZAPISA = int(os.environ.get("MENADZER_FSYNC_ZAPISA", "100"))
+
+# Format snimka: json (citljiv, sa uvlacenjem) | min (JSON bez razmaka) | gzip (min + gzip)
+FORMAT_SNIMKA = os.environ.get("MENADZER_FORMAT", "json")
+FORMATI_SNIMKA = ("json", "min", "gzip")
+
+ZAGLAVLJE_SNIMKA = b"#MENADZER-SNIMAK"
+# Prvi red svakog dnevnika; slucajna oznaka razlikuje dnevnike i kad fajl dobije isti inode
+ZAGLAVLJE_DNEVNIKA = b"#MENADZER-DNEVNIK"
+
+# Koliko klijenata sa paketima i beleskama SQLite skladiste drzi u memoriji
+VELICINA_KESA = 256
+
+
+class OstecenFajl(ValueError):
+    pass
+
+
+def primeni_zapis(klijenti, zapis, umetni=False):
+    """Primenjuje jednu izmenu (zapis iz dnevnika) na recnik klijenata.
+
+    Zapisi za pakete i beleske nose poziciju na koju se dodaju (za beleske
+    racunajuci i arhivirane), pa je ponovno primenjivanje istog zapisa
+    bezopasno (koristi se pri oporavku). Isto vazi za `arhiviraj_beleske`,
+    koji nosi ukupan broj arhiviranih beleski posle arhiviranja.
+    Sa `umetni` se zapis drugog procesa umece ispred nasih stavki koje su
+    u dnevniku zavrsile iza njega.
+    """
+    op = zapis["op"]
+    id_klijenta = zapis["id"]
+
+    if op == "dodaj_klijenta":
+        klijenti[id_klijenta] = Klijent.iz_recnika(zapis["klijent"])
+    elif op == "obrisi_klijenta":
+        klijenti.pop(id_klijenta, None)
+    elif op in ("dodeli_paket", "dodaj_belesku"):
+        klijent = klijenti.get(id_klijenta)
+        if klijent is None:
+            return
+        if op == "dodeli_paket":
+            lista, model, poz = klijent["paketi"], Paket, zapis["poz"]
+        else:
+            lista, model = klijent["beleske"], Beleska
+            poz = zapis["poz"] - klijent.get("arhivirano", 0)
+        if len(lista) == poz:
+            lista.append(model.iz_recnika(zapis["stavka"]))
+        elif umetni and 0 <= poz < len(lista):
+            lista.insert(poz, model.iz_recnika(zapis["stavka"]))
+    elif op == "arhiviraj_beleske":
+        klijent = klijenti.get(id_klijenta)
+        if klijent is None:
+            return
+        broj = zapis["do"] - klijent.get("arhivirano", 0)
+        if broj > 0:
+            del klijent["beleske"][:broj]
+            klijent["arhivirano"] = zapis["do"]
+    else:
+        raise ValueError(f"Nepoznata operacija u dnevniku: {op}")
+
+
+def zapisi_klijenta(id_klijenta, klijent):
+    """Zapisi koji od nule prave klijenta sa svim paketima i beleskama."""
+    zapisi = [{
+        "op": "dodaj_klijenta",
+        "id": id_klijenta,
+        "klijent": {k: v for k, v in klijent.items() if k not in ("paketi", "beleske")}
+    }]
+    zapisi.extend({"op": "dodeli_paket", "id": id_klijenta, "poz": poz, "stavka": paket}
+                  for poz, paket in enumerate(klijent["paketi"]))
+    zapisi.extend({"op": "dodaj_belesku", "id": id_klijenta, "poz": poz, "stavka": beleszka}
+                  for poz, beleszka in enumerate(klijent["beleske"], klijent.get("arhivirano", 0)))
+    return zapisi
+
+
+def razlika(staro, novo):
+    """Zapisi koji `staro` pretvaraju u `novo`, samo za klijente koji se razlikuju."""
+    zapisi = [{"op": "obrisi_klijenta", "id": id_klijenta}
+              for id_klijenta in staro if id_klijenta not in novo]
+    for id_klijenta, klijent in novo.items():
+        if staro.get(id_klijenta) != klijent:
+            zapisi.extend(zapisi_klijenta(id_klijenta, klijent))
+    return zapisi
+
+
+def _fsync_direktorijuma(putanja):
+    # Na Windows-u se direktorijum ne moze otvoriti, a rename je vec trajan
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(putanja)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def zapisi_atomski(putanja, sadrzaj, prethodna=None, trajno=True):
+    """Upisuje u privremeni fajl pa ga preimenuje preko `putanja`.
+
+    Ako je zadata `prethodna`, dosadasnji fajl se prvo cuva pod tim imenom
+    kao poslednja dobra generacija. Sa `trajno=False` nema fsync-a, pa posle
+    pada sistema fajl moze da ostane star ili prazan.
+    """
+    privremeni = putanja + ".tmp"
+    podaci = sadrzaj.encode('utf-8') if isinstance(sadrzaj, str) else sadrzaj
+    with open(privremeni, 'wb') as f:
+        f.write(podaci)
+        if trajno:
+            f.flush()
+            os.fsync(f.fileno())
+    if prethodna is not None and os.path.exists(putanja):
+        os.replace(putanja, prethodna)
+    os.replace(privremeni, putanja)
+    if trajno:
+        _fsync_direktorijuma(putanja)
+
+
+def dopisi_fajl(izvor, cilj):
+    with open(izvor, 'rb') as ulaz, open(cilj, 'ab') as izlaz:
+        izlaz.write(ulaz.read())
+        izlaz.flush()
+        os.fsync(izlaz.fileno())
+    os.remove(izvor)
+
+
+def _identitet_fajla(putanja):
+    try:
+        st = os.stat(putanja)
+    except FileNotFoundError:
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class ZakljucavanjeFajla:
+    """Savetodavna brava nad fajlom koja vazi i izmedju procesa.
+
+    Moze da se uzme vise puta iz iste niti; fajl se otkljucava tek posle
+    poslednjeg izlaska, a ostale niti istog procesa cekaju kao i drugi procesi.
+    """
+
+    def __init__(self, putanja):
+        self.putanja = putanja
+        self._nit_brava = threading.RLock()
+        self._dubina = 0
+        self._fajl = None
+
+    def __enter__(self):
+        self._nit_brava.acquire()
+        if self._dubina == 0:
+            try:
+                self._fajl = open(self.putanja, 'a+b')
+                try:
+                    _zakljucaj(self._fajl)
+                except BaseException:
+                    self._fajl.close()
+                    raise
+            except BaseException:
+                self._fajl = None
+                self._nit_brava.release()
+                raise
+        self._dubina += 1
+        return self
+
+    def __exit__(self, *greska):
+        self._dubina -= 1
+        if self._dubina == 0:
+            try:
+                _otkljucaj(self._fajl)
+            finally:
+                self._fajl.close()
+                self._fajl = None
+        self._nit_brava.release()
+
+
+def _zakljucaj(fajl):
+    if fcntl is not None:
+        fcntl.flock(fajl.fileno(), fcntl.LOCK_EX)
+        return
+    fajl.seek(0)
+    while True:
+        try:
+            msvcrt.locking(fajl.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK odustaje posle ~10 s; drugi proces jos drzi bravu
+            continue
+
+
+def _otkljucaj(fajl):
+    if fcntl is not None:
+        fcntl.flock(fajl.fileno(), fcntl.LOCK_UN)
+    else:
+        fajl.seek(0)
+        msvcrt.locking(fajl.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def kodiraj_snimak(klijenti, format_snimka="json"):
+    if format_snimka == "json":
+        telo = json.dumps(klijenti, ensure_ascii=False, indent=2, default=u_json).encode('utf-8')
+    elif format_snimka in ("min", "gzip"):
+        telo = json.dumps(klijenti, ensure_ascii=False, separators=(",", ":"), default=u_json).encode('utf-8')
+        if format_snimka == "gzip":
+            # mtime=0 da isti podaci daju iste bajtove; nivo 3 je mnogo brzi od 9 uz slican odnos
+            telo = gzip.compress(telo, compresslevel=3, mtime=0)
+    else:
+        raise ValueError(f"Nepoznat format snimka: {format_snimka}")
+    zaglavlje = b"%s crc32=%08x format=%s\n" % (
+        ZAGLAVLJE_SNIMKA, zlib.crc32(telo), format_snimka.encode('ascii'))
+    return zaglavlje + telo
+
+
+def dekodiraj_snimak(podaci):
+    """Cita snimak sa zaglavljem i kontrolnim zbirom (u bilo kom formatu),
+    ili stari cist JSON."""
+    if podaci.startswith(ZAGLAVLJE_SNIMKA):
+        zaglavlje, _, telo = podaci.partition(b"\n")
+        polja = dict(p.split(b"=", 1) for p in zaglavlje.split()[1:] if b"=" in p)
+        if int(polja.get(b"crc32", b"-1"), 16) != zlib.crc32(telo):
+            raise OstecenFajl("kontrolni zbir se ne slaže")
+        if polja.get(b"format") == b"gzip":
+            telo = gzip.decompress(telo)
+        podaci = telo
+    try:
+        data = json.loads(podaci.decode('utf-8'))
+    except ValueError as e:
+        raise OstecenFajl(str(e))
+    return data if isinstance(data, dict) else {}
+
+
+def kodiraj_zapis(zapis):
+    # Tab se u JSON tekstu ne pojavljuje (escape-uje se), pa je siguran separator
+    linija = json.dumps(zapis, ensure_ascii=False, default=u_json)
+    return "%s\t%08x\n" % (linija, zlib.crc32(linija.encode('utf-8')))
+
+
+def dekodiraj_zapis(linija):
+    linija = linija.rstrip("\n")
+    if "\t" in linija:
+        linija, zbir = linija.rsplit("\t", 1)
+        if int(zbir, 16) != zlib.crc32(linija.encode('utf-8')):
+            raise OstecenFajl("kontrolni zbir zapisa se ne slaže")
+    return json.loads(linija)
+
+
+def zaglavlje_klijenta(klijent):
+    """Podaci za liste: kontakt i broj paketa/beleski, bez same istorije."""
+    return {
+        "ime": klijent["ime"],
+        "prezime": klijent["prezime"],
+        "email": klijent["email"],
+        "telefon": klijent.get("telefon", ""),
+        "broj_paketa": len(klijent["paketi"]),
+        # Ukupno, sa arhiviranim; to je i pozicija sledece beleske
+        "broj_beleski": klijent.get("arhivirano", 0) + len(klijent["beleske"]),
+        "arhivirano": klijent.get("arhivirano", 0)
+    }
+
+
+def numericki_id(id_klijenta):
+    try:
+        return int(id_klijenta)
+    except (TypeError, ValueError):
+        return 0
+
+
+class JsonSkladiste:
+    """Ceo recnik klijenata u jednom JSON fajlu, prepisuje se posle svake izmene.
+
+    Fajl se upisuje atomski (privremeni fajl + rename) sa kontrolnim zbirom,
+    a prethodna verzija ostaje kao `<putanja>.1`. Ako je glavni fajl ostecen
+    ili ga nema, ucitava se ta poslednja dobra generacija.
+
+    Poslednji dodeljeni ID se cuva u `<putanja>.seq`, pa se ID obrisanog
+    klijenta nikad ne dodeljuje ponovo.
+
+    Vise procesa (npr. menadzer.py i menadzer_app.py) moze da radi nad istim
+    fajlom: svaki upis ide pod bravom `<putanja>.lock`, a ako je fajl u
+    medjuvremenu promenio drugi proces, izmene se primenjuju na stanje sa
+    diska umesto da ga pregaze. `osvezi()` te tudje izmene prenosi u memoriju.
+    """
+
+    # Podaci su u obicnom recniku u memoriji (vidi PozadinskiPisac)
+    u_memoriji = True
+
+    def __init__(self, putanja, format_snimka=None):
+        self.putanja = putanja
+        self.format_snimka = format_snimka or FORMAT_SNIMKA
+        self.prethodni = putanja + ".1"
+        self.sekvenca = putanja + ".seq"
+        self.brava = ZakljucavanjeFajla(putanja + ".lock")
+        self.generacija = 0
+        self._poslednji_id = 0
+        self._snimak_id = None
+        # Stanje na disku se razlikuje od memorije vise nego sto zapisi kazu
+        self._ponovo_ucitaj = False
+
+    def ucitaj(self):
+        with self.brava:
+            klijenti = self._ucitaj_snimak()
+            self._snimak_id = _identitet_fajla(self.putanja)
+        self._poslednji_id = max([self._procitaj_sekvencu(), self._poslednji_id]
+                                 + [numericki_id(k) for k in klijenti])
+        self._ponovo_ucitaj = False
+        return klijenti
+
+    def _ucitaj_snimak(self):
+        greska = None
+        for generacija, putanja in enumerate((self.putanja, self.prethodni)):
+            if not os.path.exists(putanja):
+                continue
+            try:
+                with open(putanja, 'rb') as f:
+                    klijenti = klijenti_iz_recnika(dekodiraj_snimak(f.read()))
+            except OstecenFajl as e:
+                print(f"Oštećen fajl {putanja}: {e}")
+                greska = e
+                continue
+            self.generacija = generacija
+            return klijenti
+        if greska is not None:
+            raise OstecenFajl(f"Nijedna generacija fajla {self.putanja} nije ispravna")
+        self.generacija = 0
+        return {}
+
+    def _procitaj_sekvencu(self):
+        try:
+            with open(self.sekvenca, 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _upisi_sekvencu(self, poslednji_id, trajno=True):
+        # Drugi proces je mozda vec rezervisao vise ID-jeva; sekvenca ne sme nazad
+        with self.brava:
+            zapisi_atomski(self.sekvenca, str(max(poslednji_id, self._procitaj_sekvencu())),
+                           trajno=trajno)
+
+    def sledeci_id(self):
+        return str(self.rezervisi_id(1))
+
+    def rezervisi_id(self, broj):
+        """Rezervise `broj` uzastopnih ID-jeva i vraca prvi od njih.
+
+        Sekvenca se odmah upisuje pod bravom, pa drugi proces ne moze da
+        dobije iste ID-jeve. Upis je bez fsync-a: trajno se cuva tek uz snimak
+        (`sacuvaj`, sazimanje dnevnika), a posle pada ID-jeve vracaju i zapisi
+        `dodaj_klijenta` iz dnevnika. Izgubiti se moze samo rezervacija koja
+        jos nije upisana ni u jedan fajl, pa je niko nije ni video.
+        """
+        with self.brava:
+            prvi = max(self._poslednji_id, self._procitaj_sekvencu()) + 1
+            self._poslednji_id = prvi + broj - 1
+            self._upisi_sekvencu(self._poslednji_id, trajno=False)
+        return prvi
+
+    def zaglavlje(self, klijenti, id_klijenta):
+        return zaglavlje_klijenta(klijenti[id_klijenta])
+
+    def detalji(self, klijenti, id_klijenta):
+        return klijenti[id_klijenta]
+
+    def svi_paketi(self, klijenti):
+        for klijent in klijenti.values():
+            yield from klijent["paketi"]
+
+    def primeni(self, klijenti, zapisi):
+        for zapis in zapisi:
+            primeni_zapis(klijenti, zapis)
+        self.upisi(klijenti, zapisi)
+
+    def upisi(self, klijenti, zapisi):
+        with self.brava:
+            # Recnik u memoriji nema tudje izmene, pa se one ne smeju pregaziti
+            if self.promenjeno():
+                klijenti = self._spoji_sa_diskom(zapisi)
+            self.sacuvaj(klijenti)
+
+    def sacuvaj(self, klijenti):
+        """Upisuje ceo `klijenti` preko fajla (bez spajanja sa tudjim izmenama)."""
+        with self.brava:
+            self._upisi_sekvencu(self._poslednji_id)
+            zapisi_atomski(self.putanja, kodiraj_snimak(klijenti, self.format_snimka),
+                           self._prethodna_generacija())
+            self._snimak_id = _identitet_fajla(self.putanja)
+        self.generacija = 0
+
+    def _spoji_sa_diskom(self, zapisi):
+        """Ucitava stanje koje su upisali drugi procesi i na njega primenjuje
+        nase `zapisi`. Recnik u memoriji se sa diskom uskladjuje tek u `osvezi()`."""
+        return self._dodaj_na_kraj(self.ucitaj(), zapisi)
+
+    def _dodaj_na_kraj(self, klijenti, zapisi):
+        # Pozicije nasih paketa i beleski se racunaju prema stanju sa diska
+        for zapis in zapisi:
+            klijent = klijenti.get(zapis["id"])
+            if "poz" in zapis and klijent is not None:
+                zapis["poz"] = zaglavlje_klijenta(klijent)[
+                    "broj_paketa" if zapis["op"] == "dodeli_paket" else "broj_beleski"]
+            primeni_zapis(klijenti, zapis)
+        self._ponovo_ucitaj = True
+        return klijenti
+
+    def promenjeno(self):
+        """Brza provera (bez brave) da li je neki drugi proces menjao podatke."""
+        return self._ponovo_ucitaj or _identitet_fajla(self.putanja) != self._snimak_id
+
+    def osvezi(self, klijenti, pre_primene=None):
+        """Primenjuje na `klijenti` izmene drugih procesa i vraca skup ID-jeva
+        promenjenih klijenata. `pre_primene(klijenti, zapis)` se poziva pre
+        svakog zapisa (npr. IndeksKlijenata.azuriraj)."""
+        with self.brava:
+            zapisi = self._nove_izmene(klijenti)
+            for zapis in zapisi:
+                if pre_primene is not None:
+                    pre_primene(klijenti, zapis)
+                primeni_zapis(klijenti, zapis, umetni=True)
+        return {zapis["id"] for zapis in zapisi}
+
+    def _nove_izmene(self, klijenti):
+        if not self.promenjeno():
+            return []
+        return razlika(klijenti, self.ucitaj())
+
+    def _prethodna_generacija(self):
+        # Posle oporavka iz .1 glavni fajl je ostecen i ne sme da zameni dobru generaciju
+        return self.prethodni if self.generacija == 0 else None
+
+    def zatvori(self):
+        pass
+
+
+class DnevnikSkladiste(JsonSkladiste):
+    """Snimak u JSON fajlu + dnevnik izmena (JSON Lines) koji se samo dopisuje.
+
+    Svaka izmena dopisuje jedan mali zapis sa kontrolnim zbirom u
+    `<putanja>.log`; fsync se radi grupno (`fsync_ms` / `fsync_zapisa`).
+    Kad dnevnik naraste preko `prag_sazimanja` zapisa (ili broja klijenata),
+    preimenuje se u `<putanja>.log.stari`, a novi snimak se u pozadinskoj
+    niti upisuje u glavni fajl. Posle toga stari dnevnik postaje
+    `<putanja>.log.1`, pa `<putanja>.1` + `.log.1` uvek daju isto stanje
+    kao novi snimak.
+
+    Pri ucitavanju se na snimak primenjuju `.log.1` (samo ako je ucitana
+    prethodna generacija), `.log.stari` (ako sazimanje nije zavrseno) i
+    `.log`.
+
+    Skladiste pamti dokle je procitalo `.log`, pa pre svakog upisa (pod
+    bravom) cita samo zapise koje su u medjuvremenu dopisali drugi procesi.
+    Nasi paketi i beleske se pomeraju iza njihovih, a tudji zapisi cekaju
+    `osvezi()`. Tek ako je drugi proces u medjuvremenu sazeo dnevnik, sve
+    se ucitava ponovo.
+    """
+
+    def __init__(self, putanja, format_snimka=None, prag_sazimanja=PRAG_SAZIMANJA,
+                 fsync_ms=FSYNC_MS, fsync_zapisa=FSYNC_ZAPISA):
+        super().__init__(putanja, format_snimka)
+        self.dnevnik = putanja + ".log"
+        self.stari_dnevnik = putanja + ".log.stari"
+        self.prethodni_dnevnik = putanja + ".log.1"
+        self.prag_sazimanja = prag_sazimanja
+        self.fsync_ms = fsync_ms
+        self.fsync_zapisa = fsync_zapisa
+        self._broj_zapisa = 0
+        self._nesinhronizovano = 0
+        self._poslednji_fsync = time.monotonic()
+        self._nit = None
+        # Dokle je `.log` procitan: (uredjaj, inode, prvi red) i pozicija u bajtovima
+        self._dnevnik_id = None
+        self._pozicija = 0
+        # Zapisi drugih procesa koji jos nisu primenjeni na recnik u memoriji
+        self._spoljni = []
+        self._pomeraji = {}
+        # Stanje sa diska dok recnik u memoriji zaostaje (posle tudjeg sazimanja)
+        self._sa_diska = None
+
+    def ucitaj(self):
+        with self.brava:
+            klijenti = super().ucitaj()
+            if self.generacija == 1:
+                self.ponovi_dnevnik(klijenti, self.prethodni_dnevnik)
+            self.ponovi_dnevnik(klijenti, self.stari_dnevnik)
+            self._broj_zapisa = self.ponovi_dnevnik(klijenti, self.dnevnik)
+            # Prazan dnevnik se pravi odmah, da bi se kasnije videlo i tudje sazimanje
+            self._novi_dnevnik()
+        self._spoljni = []
+        self._pomeraji = {}
+        self._sa_diska = None
+        return klijenti
+
+    def ponovi_dnevnik(self, klijenti, putanja):
+        if not os.path.exists(putanja):
+            return 0
+        zapisi, _ = self._procitaj_dnevnik(putanja)
+        for zapis in zapisi:
+            primeni_zapis(klijenti, zapis)
+            if zapis["op"] == "dodaj_klijenta":
+                self._poslednji_id = max(self._poslednji_id, numericki_id(zapis["id"]))
+        return len(zapisi)
+
+    def _procitaj_dnevnik(self, putanja, pocetak=0):
+        """Ispravni zapisi od bajta `pocetak` i pozicija iza poslednjeg od njih."""
+        zapisi = []
+        ispravno_bajtova = pocetak
+        with open(putanja, 'rb') as f:
+            f.seek(pocetak)
+            for linija in f:
+                try:
+                    if not linija.endswith(b"\n"):
+                        raise OstecenFajl("nedovrsen red")
+                    if linija.startswith(ZAGLAVLJE_DNEVNIKA):
+                        ispravno_bajtova += len(linija)
+                        continue
+                    zapis = dekodiraj_zapis(linija.decode('utf-8'))
+                except ValueError:
+                    # Nedovrsen ili ostecen red (pad usred upisa): ostatak se odseca,
+                    # inace bi novi zapisi zavrsili iza njega i bili preskoceni
+                    print(f"Dnevnik {putanja} je prekinut posle {len(zapisi)} zapisa")
+                    f.close()
+                    os.truncate(putanja, ispravno_bajtova)
+                    break
+                zapisi.append(zapis)
+                ispravno_bajtova += len(linija)
+        return zapisi, ispravno_bajtova
+
+    def _identitet_dnevnika(self):
+        try:
+            with open(self.dnevnik, 'rb') as f:
+                st = os.fstat(f.fileno())
+                # Prvi red razlikuje novi dnevnik od starog ciji je inode ponovo dodeljen
+                return (st.st_dev, st.st_ino, f.readline()), st.st_size
+        except FileNotFoundError:
+            return None, 0
+
+    def _novi_dnevnik(self):
+        """Pocinje prazan `.log` (posle sazimanja) i od njega prati dnevnik."""
+        if not os.path.exists(self.dnevnik):
+            with open(self.dnevnik, 'ab') as f:
+                f.write(b"%s %s\n" % (ZAGLAVLJE_DNEVNIKA, os.urandom(8).hex().encode('ascii')))
+        self._dnevnik_id, self._pozicija = self._identitet_dnevnika()
+
+    def _isti_dnevnik(self, identitet):
+        if identitet is None or self._dnevnik_id is None:
+            return identitet is self._dnevnik_id
+        return (identitet[:2] == self._dnevnik_id[:2]
+                and self._dnevnik_id[2] in (b"", identitet[2]))
+
+    def _citaj_nove_zapise(self):
+        """Zapisi koje su drugi procesi dopisali posle naseg poslednjeg
+        citanja ili upisa; None ako je dnevnik u medjuvremenu sazet."""
+        identitet, velicina = self._identitet_dnevnika()
+        if not self._isti_dnevnik(identitet) or velicina < self._pozicija:
+            return None
+        if velicina == self._pozicija:
+            return []
+        zapisi, self._pozicija = self._procitaj_dnevnik(self.dnevnik, self._pozicija)
+        return zapisi
+
+    def _zadrzi_spoljne(self, zapisi):
+        for zapis in zapisi:
+            self._spoljni.append(zapis)
+            if "poz" in zapis:
+                kljuc = (zapis["id"], zapis["op"])
+                self._pomeraji[kljuc] = self._pomeraji.get(kljuc, 0) + 1
+            elif zapis["op"] == "dodaj_klijenta":
+                self._poslednji_id = max(self._poslednji_id, numericki_id(zapis["id"]))
+
+    def upisi(self, klijenti, zapisi):
+        with self.brava:
+            spoljni = self._citaj_nove_zapise()
+            if spoljni is None:
+                self._sa_diska = self._spoji_sa_diskom(zapisi)
+            elif self._sa_diska is not None:
+                for zapis in spoljni:
+                    primeni_zapis(self._sa_diska, zapis)
+                self._dodaj_na_kraj(self._sa_diska, zapisi)
+            else:
+                self._zadrzi_spoljne(spoljni)
+                # Tudji paketi/beleske su u dnevniku ispred nasih, pa nasi idu iza njih
+                for zapis in zapisi:
+                    pomeraj = self._pomeraji.get((zapis["id"], zapis["op"]))
+                    if pomeraj and "poz" in zapis:
+                        zapis["poz"] += pomeraj
+
+            if self._dnevnik_id is None:
+                self._novi_dnevnik()
+            with open(self.dnevnik, 'ab') as f:
+                f.write("".join(kodiraj_zapis(z) for z in zapisi).encode('utf-8'))
+                f.flush()
+                self._nesinhronizovano += len(zapisi)
+                sada = time.monotonic()
+                if (self._nesinhronizovano >= self.fsync_zapisa
+                        or (sada - self._poslednji_fsync) * 1000 >= self.fsync_ms):
+                    os.fsync(f.fileno())
+                    self._nesinhronizovano = 0
+                    self._poslednji_fsync = sada
+                self._pozicija = f.tell()
+            self._broj_zapisa += len(zapisi)
+
+            # Prag raste sa bazom, pa je cena snimka rasporedjena na bar len(klijenti) izmena
+            if self._broj_zapisa >= max(self.prag_sazimanja, len(klijenti)):
+                self.sazmi(klijenti)
+
+    def sinhronizuj(self):
+        # Dnevnik se ne drzi otvoren (drugi proces mora moci da ga preimenuje)
+        if self._nesinhronizovano and os.path.exists(self.dnevnik):
+            with open(self.dnevnik, 'ab') as f:
+                os.fsync(f.fileno())
+        self._nesinhronizovano = 0
+        self._poslednji_fsync = time.monotonic()
+
+    def sazmi(self, klijenti):
+        if self._nit is not None and self._nit.is_alive():
+            return
+        if self._spoljni or self._ponovo_ucitaj:
+            # Snimak iz memorije ne bi imao izmene drugih procesa; sazima se posle osvezi()
+            return
+        with self.brava:
+            self.sinhronizuj()
+            self._spoji_u_stari_dnevnik()
+            self._novi_dnevnik()
+            stari = _identitet_fajla(self.stari_dnevnik)
+            # Serijalizacija mora u ovoj niti jer se recnik menja posle povratka
+            sadrzaj = kodiraj_snimak(klijenti, self.format_snimka)
+        self._broj_zapisa = 0
+        self._nit = threading.Thread(target=self._sazmi_u_pozadini,
+                                     args=(sadrzaj, self._poslednji_id, stari))
+        self._nit.start()
+
+    def _sazmi_u_pozadini(self, sadrzaj, poslednji_id, stari):
+        try:
+            self._upisi_snimak(sadrzaj, poslednji_id, stari)
+        except OSError as e:
+            # Stari dnevnik ostaje, pa se nista ne gubi; pokusava se ponovo kasnije
+            print(f"Greška pri sažimanju dnevnika: {e}")
+
+    def _upisi_snimak(self, sadrzaj, poslednji_id, stari):
+        with self.brava:
+            if _identitet_fajla(self.stari_dnevnik) != stari:
+                # Drugi proces je u medjuvremenu dopisao stari dnevnik i sam pravi
+                # noviji snimak; ovaj bi ga pregazio starijim stanjem
+                return
+            # Sekvenca pre snimka: ID-jevi iz dnevnika koji se sklanja ne smeju da se izgube
+            self._upisi_sekvencu(poslednji_id)
+            prethodna = self._prethodna_generacija()
+            zapisi_atomski(self.putanja, sadrzaj, prethodna)
+            if os.path.exists(self.stari_dnevnik):
+                if prethodna is None:
+                    # .1 je ostao isti, pa mu treba i dosadasnji .log.1 i ovaj deo dnevnika
+                    dopisi_fajl(self.stari_dnevnik, self.prethodni_dnevnik)
+                else:
+                    os.replace(self.stari_dnevnik, self.prethodni_dnevnik)
+            self._snimak_id = _identitet_fajla(self.putanja)
+            self.generacija = 0
+
+    def _spoji_u_stari_dnevnik(self):
+        if not os.path.exists(self.dnevnik):
+            return
+        if not os.path.exists(self.stari_dnevnik):
+            os.replace(self.dnevnik, self.stari_dnevnik)
+            return
+        # Prethodno sazimanje nije uspelo: nastavi stari dnevnik tekucim
+        dopisi_fajl(self.dnevnik, self.stari_dnevnik)
+
+    def sacuvaj(self, klijenti):
+        self._sacekaj_sazimanje()
+        with self.brava:
+            self.sinhronizuj()
+            self._spoji_u_stari_dnevnik()
+            self._novi_dnevnik()
+            self._upisi_snimak(kodiraj_snimak(klijenti, self.format_snimka), self._poslednji_id,
+                               _identitet_fajla(self.stari_dnevnik))
+        self._broj_zapisa = 0
+
+    def promenjeno(self):
+        if self._ponovo_ucitaj or self._spoljni:
+            return True
+        identitet, velicina = self._identitet_dnevnika()
+        return not self._isti_dnevnik(identitet) or velicina != self._pozicija
+
+    def _nove_izmene(self, klijenti):
+        spoljni = self._citaj_nove_zapise()
+        if spoljni is None:
+            return razlika(klijenti, self.ucitaj())
+        if self._sa_diska is not None:
+            for zapis in spoljni:
+                primeni_zapis(self._sa_diska, zapis)
+            zapisi = razlika(klijenti, self._sa_diska)
+            self._sa_diska = None
+            self._ponovo_ucitaj = False
+            return zapisi
+        self._zadrzi_spoljne(spoljni)
+        zapisi, self._spoljni, self._pomeraji = self._spoljni, [], {}
+        return zapisi
+
+    def zatvori(self):
+        self._sacekaj_sazimanje()
+        self.sinhronizuj()
+
+    def _sacekaj_sazimanje(self):
+        if self._nit is not None:
+            self._nit.join()
+            self._nit = None
+
+
+SQLITE_SEMA = """
+CREATE TABLE IF NOT EXISTS klijenti (
+    id TEXT PRIMARY KEY,
+    ime TEXT NOT NULL,
+    prezime TEXT NOT NULL,
+    email TEXT NOT NULL,
+    telefon TEXT NOT NULL DEFAULT '',
+    arhivirano INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS paketi (
+    klijent_id TEXT NOT NULL REFERENCES klijenti(id) ON DELETE CASCADE,
+    poz INTEGER NOT NULL,
+    naziv TEXT NOT NULL,
+    cena TEXT NOT NULL,
+    datum_pocetka TEXT NOT NULL DEFAULT '',
+    datum_dodele TEXT NOT NULL,
+    PRIMARY KEY (klijent_id, poz)
+);
+CREATE TABLE IF NOT EXISTS beleske (
+    klijent_id TEXT NOT NULL REFERENCES klijenti(id) ON DELETE CASCADE,
+    poz INTEGER NOT NULL,
+    tekst TEXT NOT NULL,
+    datum TEXT NOT NULL,
+    PRIMARY KEY (klijent_id, poz)
+);
+CREATE TABLE IF NOT EXISTS sekvenca (
+    ime TEXT PRIMARY KEY,
+    vrednost INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reci_beleski (
+    rec TEXT NOT NULL,
+    klijent_id TEXT NOT NULL REFERENCES klijenti(id) ON DELETE CASCADE,
+    PRIMARY KEY (rec, klijent_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_klijenti_email ON klijenti(email COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_klijenti_telefon ON klijenti(telefon);
+CREATE INDEX IF NOT EXISTS idx_klijenti_ime ON klijenti(prezime COLLATE NOCASE, ime);
+CREATE INDEX IF NOT EXISTS idx_reci_beleski_klijent ON reci_beleski(klijent_id);
+"""
+
+
+def _escape_like(tekst):
+    return tekst.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class KlijentiPogled(Mapping):
+    """Recnik klijenata iz SQLite baze: kljucevi dolaze iz zaglavlja u
+    memoriji, a pun klijent se cita tek kad zatreba (vidi `detalji`)."""
+
+    def __init__(self, skladiste):
+        self.skladiste = skladiste
+
+    def __getitem__(self, id_klijenta):
+        return self.skladiste.detalji(self, id_klijenta)
+
+    def __contains__(self, id_klijenta):
+        return str(id_klijenta) in self.skladiste.zaglavlja()
+
+    def __iter__(self):
+        return iter(list(self.skladiste.zaglavlja()))
+
+    def __len__(self):
+        return len(self.skladiste.zaglavlja())
+
+
+class SqliteSkladiste:
+    """Normalizovane tabele klijenti/paketi/beleske u SQLite bazi.
+
+    Svaka izmena je jedna mala transakcija, a `ucitaj()` ne cita nista
+    unapred vec vraca `KlijentiPogled` koji ide u bazu po potrebi.
+    Zaglavlja svih klijenata (bez paketa i beleski) se citaju jednim upitom
+    i ostaju u memoriji, a pun zapis poslednjih `velicina_kesa` otvorenih
+    klijenata se cuva u LRU kesu.
+
+    Vise procesa zakljucava bazu preko samog SQLite-a; upise drugih procesa
+    `osvezi()` prepoznaje po `PRAGMA data_version`.
+    """
+
+    u_memoriji = False
+
+    def __init__(self, putanja, velicina_kesa=VELICINA_KESA):
+        self.putanja = putanja
+        self.velicina_kesa = velicina_kesa
+        self._zaglavlja = None
+        self._detalji = OrderedDict()
+        self.veza = sqlite3.connect(putanja)
+        self.veza.execute("PRAGMA foreign_keys = ON")
+        self.veza.execute("PRAGMA journal_mode = WAL")
+        self.veza.executescript(SQLITE_SEMA)
+        with self.veza:
+            # Baze napravljene pre arhive beleski
+            kolone = {red[1] for red in self.veza.execute("PRAGMA table_info(klijenti)")}
+            if "arhivirano" not in kolone:
+                self.veza.execute("ALTER TABLE klijenti ADD COLUMN arhivirano INTEGER NOT NULL DEFAULT 0")
+            self.veza.execute(
+                "INSERT OR IGNORE INTO sekvenca (ime, vrednost) "
+                "SELECT 'klijenti', COALESCE(MAX(CAST(id AS INTEGER)), 0) FROM klijenti")
+            # Baze napravljene pre indeksa reci iz beleski
+            if (self.veza.execute("SELECT 1 FROM beleske LIMIT 1").fetchone()
+                    and not self.veza.execute("SELECT 1 FROM reci_beleski LIMIT 1").fetchone()):
+                for id_klijenta, tekst in self.veza.execute("SELECT klijent_id, tekst FROM beleske").fetchall():
+                    self._indeksiraj_belesku(id_klijenta, tekst)
+        self._verzija = self._verzija_baze()
+
+    def _verzija_baze(self):
+        return self.veza.execute("PRAGMA data_version").fetchone()[0]
+
+    def promenjeno(self):
+        return self._verzija_baze() != self._verzija
+
+    def osvezi(self, klijenti, pre_primene=None):
+        """Posle upisa drugog procesa ponovo cita zaglavlja i vraca ID-jeve
+        klijenata cija su se zaglavlja promenila."""
+        verzija = self._verzija_baze()
+        if verzija == self._verzija:
+            return set()
+        self._verzija = verzija
+        stara = self._zaglavlja
+        self._isprazni_kes()
+        if stara is None:
+            return set()
+        nova = self.zaglavlja()
+        return {id_klijenta for id_klijenta in stara.keys() | nova.keys()
+                if stara.get(id_klijenta) != nova.get(id_klijenta)}
+
+    def zaglavlja(self):
+        if self._zaglavlja is None:
+            self._zaglavlja = {
+                id_klijenta: {
+                    "ime": ime,
+                    "prezime": prezime,
+                    "email": email,
+                    "telefon": telefon,
+                    "broj_paketa": broj_paketa,
+                    "broj_beleski": arhivirano + broj_beleski,
+                    "arhivirano": arhivirano
+                }
+                for id_klijenta, ime, prezime, email, telefon, arhivirano, broj_paketa, broj_beleski
+                in self.veza.execute(
+                    "SELECT id, ime, prezime, email, telefon, arhivirano, "
+                    "(SELECT COUNT(*) FROM paketi WHERE klijent_id = klijenti.id), "
+                    "(SELECT COUNT(*) FROM beleske WHERE klijent_id = klijenti.id) "
+                    "FROM klijenti ORDER BY rowid")
+            }
+        return self._zaglavlja
+
+    def zaglavlje(self, klijenti, id_klijenta):
+        try:
+            return self.zaglavlja()[str(id_klijenta)]
+        except KeyError:
+            raise KeyError(id_klijenta) from None
+
+    def detalji(self, klijenti, id_klijenta):
+        id_klijenta = str(id_klijenta)
+        klijent = self._detalji.get(id_klijenta)
+        if klijent is not None:
+            self._detalji.move_to_end(id_klijenta)
+            return klijent
+        klijent = self._procitaj_klijenta(id_klijenta)
+        self._detalji[id_klijenta] = klijent
+        if len(self._detalji) > self.velicina_kesa:
+            self._detalji.popitem(last=False)
+        return klijent
+
+    def svi_paketi(self, klijenti):
+        # Jedan prolaz kroz tabelu paketa, bez citanja klijenata
+        for naziv, cena, datum_pocetka in self.veza.execute(
+                "SELECT naziv, cena, datum_pocetka FROM paketi"):
+            yield {"naziv": naziv, "cena": cena, "datum_pocetka": datum_pocetka}
+
+    def _procitaj_klijenta(self, id_klijenta):
+        red = self.veza.execute(
+            "SELECT ime, prezime, email, telefon, arhivirano FROM klijenti WHERE id = ?",
+            (str(id_klijenta),)).fetchone()
+        if red is None:
+            raise KeyError(id_klijenta)
+        paketi = self.veza.execute(
+            "SELECT naziv, cena, datum_pocetka, datum_dodele FROM paketi "
+            "WHERE klijent_id = ? ORDER BY poz", (str(id_klijenta),))
+        beleske = self.veza.execute(
+            "SELECT tekst, datum FROM beleske WHERE klijent_id = ? ORDER BY poz",
+            (str(id_klijenta),))
+        return Klijent(red[0], red[1], red[2], red[3],
+                       [Paket(*p) for p in paketi],
+                       [Beleska(*b) for b in beleske], arhivirano=red[4])
+
+    def sledeci_id(self):
+        return str(self.rezervisi_id(1))
+
+    def rezervisi_id(self, broj):
+        with self.veza:
+            self.veza.execute("UPDATE sekvenca SET vrednost = vrednost + ? WHERE ime = 'klijenti'", (broj,))
+            (vrednost,) = self.veza.execute(
+                "SELECT vrednost FROM sekvenca WHERE ime = 'klijenti'").fetchone()
+        return vrednost - broj + 1
+
+    def ucitaj(self):
+        return KlijentiPogled(self)
+
+    def primeni(self, klijenti, zapisi):
+        try:
+            with self.veza:
+                for zapis in zapisi:
+                    self._izvrsi(zapis)
+        except Exception:
+            # Transakcija je ponistena, pa kes vise ne odgovara bazi
+            self._isprazni_kes()
+            raise
+
+    def _isprazni_kes(self):
+        self._zaglavlja = None
+        self._detalji.clear()
+
+    def upisi(self, klijenti, zapisi):
+        self.primeni(klijenti, zapisi)
+
+    def _izvrsi(self, zapis):
+        op = zapis["op"]
+        id_klijenta = str(zapis["id"])
+        self._detalji.pop(id_klijenta, None)
+        zaglavlja = self._zaglavlja if self._zaglavlja is not None else {}
+
+        if op == "dodaj_klijenta":
+            k = zapis["klijent"]
+            self.veza.execute("DELETE FROM klijenti WHERE id = ?", (id_klijenta,))
+            self.veza.execute(
+                "INSERT INTO klijenti (id, ime, prezime, email, telefon, arhivirano) VALUES (?, ?, ?, ?, ?, ?)",
+                (id_klijenta, k["ime"], k["prezime"], k["email"], k.get("telefon", ""),
+                 k.get("arhivirano", 0)))
+            if self._zaglavlja is not None:
+                self._zaglavlja.pop(id_klijenta, None)
+                self._zaglavlja[id_klijenta] = zaglavlje_klijenta(dict(k, paketi=[], beleske=[]))
+        elif op == "obrisi_klijenta":
+            self.veza.execute("DELETE FROM klijenti WHERE id = ?", (id_klijenta,))
+            zaglavlja.pop(id_klijenta, None)
+        elif op == "dodeli_paket":
+            # Pozicija se racuna u transakciji: drugi proces je mozda vec dodao paket
+            p = zapis["stavka"]
+            kursor = self.veza.execute(
+                "INSERT INTO paketi (klijent_id, poz, naziv, cena, datum_pocetka, datum_dodele) "
+                "SELECT id, (SELECT COUNT(*) FROM paketi WHERE klijent_id = klijenti.id), ?, ?, ?, ? "
+                "FROM klijenti WHERE id = ?",
+                (p["naziv"], p["cena"], p["datum_pocetka"], p["datum_dodele"], id_klijenta))
+            if kursor.rowcount > 0 and id_klijenta in zaglavlja:
+                zaglavlja[id_klijenta]["broj_paketa"] += 1
+        elif op == "dodaj_belesku":
+            b = zapis["stavka"]
+            kursor = self.veza.execute(
+                "INSERT INTO beleske (klijent_id, poz, tekst, datum) "
+                "SELECT id, (SELECT COALESCE(MAX(poz) + 1, klijenti.arhivirano) "
+                "FROM beleske WHERE klijent_id = klijenti.id), ?, ? "
+                "FROM klijenti WHERE id = ?",
+                (b["tekst"], b["datum"], id_klijenta))
+            if kursor.rowcount > 0 and id_klijenta in zaglavlja:
+                zaglavlja[id_klijenta]["broj_beleski"] += 1
+            self._indeksiraj_belesku(id_klijenta, b["tekst"])
+        elif op == "arhiviraj_beleske":
+            kursor = self.veza.execute(
+                "UPDATE klijenti SET arhivirano = ? WHERE id = ? AND arhivirano < ?",
+                (zapis["do"], id_klijenta, zapis["do"]))
+            if kursor.rowcount > 0:
+                self.veza.execute("DELETE FROM beleske WHERE klijent_id = ? AND poz < ?",
+                                  (id_klijenta, zapis["do"]))
+                # Indeks reci vazi samo za beleske koje su ostale u bazi
+                self.veza.execute("DELETE FROM reci_beleski WHERE klijent_id = ?", (id_klijenta,))
+                for (tekst,) in self.veza.execute(
+                        "SELECT tekst FROM beleske WHERE klijent_id = ?", (id_klijenta,)).fetchall():
+                    self._indeksiraj_belesku(id_klijenta, tekst)
+                if id_klijenta in zaglavlja:
+                    zaglavlja[id_klijenta]["arhivirano"] = zapis["do"]
+        else:
+            raise ValueError(f"Nepoznata operacija u dnevniku: {op}")
+
+    def _indeksiraj_belesku(self, id_klijenta, tekst):
+        self.veza.executemany(
+            "INSERT OR IGNORE INTO reci_beleski (rec, klijent_id) SELECT ?, id FROM klijenti WHERE id = ?",
+            ((rec, str(id_klijenta)) for rec in tokeni(tekst)))
+
+    def pretrazi(self, upit=None, email=None, telefon=None, prezime=None, beleska=None):
+        """Isto kao IndeksKlijenata.pretrazi, ali preko indeksa u bazi
+        (telefon se poredi tacno onako kako je unet)."""
+        uslovi = []
+        parametri = []
+
+        def uslov_beleske(tekst):
+            reci = sorted(tokeni(tekst))
+            if not reci:
+                return "0"
+            parametri.extend(reci)
+            parametri.append(len(reci))
+            return ("id IN (SELECT klijent_id FROM reci_beleski WHERE rec IN (%s) "
+                    "GROUP BY klijent_id HAVING COUNT(*) = ?)" % ", ".join("?" * len(reci)))
+
+        if upit:
+            upit = upit.strip()
+            parametri.extend([upit, upit, _escape_like(upit) + "%"])
+            uslovi.append("(email = ? COLLATE NOCASE OR telefon = ? "
+                          "OR prezime LIKE ? ESCAPE '\\' OR %s)" % uslov_beleske(upit))
+        if email:
+            uslovi.append("email = ? COLLATE NOCASE")
+            parametri.append(email.strip())
+        if telefon:
+            uslovi.append("telefon = ?")
+            parametri.append(telefon.strip())
+        if prezime:
+            uslovi.append("prezime LIKE ? ESCAPE '\\'")
+            parametri.append(_escape_like(prezime) + "%")
+        if beleska:
+            uslovi.append(uslov_beleske(beleska))
+        if not uslovi:
+            return set()
+        upit_sql = "SELECT id FROM klijenti WHERE " + " AND ".join(uslovi)
+        return {id_klijenta for (id_klijenta,) in self.veza.execute(upit_sql, parametri)}
+
+    def sacuvaj(self, klijenti):
+        # Pogled je uvek sinhronizovan sa bazom; pun upis samo za obican recnik
+        if isinstance(klijenti, KlijentiPogled):
+            return
+        self._isprazni_kes()
+        with self.veza:
+            self.veza.execute("DELETE FROM klijenti")
+            self._upisi_sve(klijenti)
+
+    def uvezi_json(self, json_putanja):
+        """Jednokratni uvoz postojeceg `klijenti_podaci.json` (sa dnevnikom) u bazu."""
+        izvor = DnevnikSkladiste(json_putanja)
+        klijenti = izvor.ucitaj()
+        self._isprazni_kes()
+        with self.veza:
+            self._upisi_sve(klijenti)
+            self.veza.execute(
+                "UPDATE sekvenca SET vrednost = MAX(vrednost, ?) WHERE ime = 'klijenti'",
+                (izvor._poslednji_id,))
+        return len(klijenti)
+
+    def _upisi_sve(self, klijenti):
+        self.veza.executemany(
+            "INSERT OR REPLACE INTO klijenti (id, ime, prezime, email, telefon, arhivirano) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((str(id_klijenta), k["ime"], k["prezime"], k["email"], k.get("telefon", ""),
+              k.get("arhivirano", 0))
+             for id_klijenta, k in klijenti.items()))
+        self.veza.executemany(
+            "INSERT OR REPLACE INTO paketi (klijent_id, poz, naziv, cena, datum_pocetka, datum_dodele) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((str(id_klijenta), poz, p["naziv"], p["cena"], p.get("datum_pocetka", ""), p["datum_dodele"])
+             for id_klijenta, k in klijenti.items()
+             for poz, p in enumerate(k["paketi"])))
+        self.veza.executemany(
+            "INSERT OR REPLACE INTO beleske (klijent_id, poz, tekst, datum) VALUES (?, ?, ?, ?)",
+            ((str(id_klijenta), poz, b["tekst"], b["datum"])
+             for id_klijenta, k in klijenti.items()
+             for poz, b in enumerate(k["beleske"], k.get("arhivirano", 0))))
+        self.veza.executemany(
+            "INSERT OR IGNORE INTO reci_beleski (rec, klijent_id) VALUES (?, ?)",
+            ((rec, str(id_klijenta))
+             for id_klijenta, k in klijenti.items()
+             for b in k["beleske"]
+             for rec in tokeni(b["tekst"])))
+
+    def zatvori(self):
+        self.veza.close()
+
+
+class PozadinskiPisac:
+    """Upisuje izmene u skladiste iz pozadinske niti.
+
+    `primeni()` odmah menja recnik u memoriji i stavlja zapise u red, a nit
+    ih posle kratkog `odlaganje` skuplja i upisuje jednim `upisi()` pozivom.
+    Povratni pozivi `gotovo(greska)` se ne zovu iz niti, vec ih pozivalac
+    izvrsava sam preko `obradi_zavrsene()` (npr. iz Tk `after` petlje).
+    Radi samo sa skladistima koja drze podatke u memoriji.
+
+    Zapisi cije upisivanje nije uspelo ostaju u `neupisani` i upisuju se
+    ponovo ispred sledecih izmena, a poslednji put u `zatvori()`.
+    """
+
+    def __init__(self, skladiste, odlaganje=0.05):
+        self.skladiste = skladiste
+        self.odlaganje = odlaganje
+        self.brava = threading.Lock()
+        self.red = queue.Queue()
+        self.zavrseni = queue.Queue()
+        self.neupisani = []
+        self._klijenti = None
+        self._nit = threading.Thread(target=self._radi, daemon=True)
+        self._nit.start()
+
+    def primeni(self, klijenti, zapisi, gotovo=None):
+        with self.brava:
+            for zapis in zapisi:
+                primeni_zapis(klijenti, zapis)
+            self.red.put((klijenti, zapisi, gotovo))
+
+    def _radi(self):
+        kraj = False
+        while not kraj:
+            stavke = [self.red.get()]
+            time.sleep(self.odlaganje)
+            # Pod bravom recnik ima tacno upisane zapise i ove iz reda, pa je
+            # i snimak pri sazimanju u skladu sa dnevnikom
+            with self.brava:
+                while True:
+                    try:
+                        stavke.append(self.red.get_nowait())
+                    except queue.Empty:
+                        break
+
+                kraj = None in stavke
+                stavke = [stavka for stavka in stavke if stavka is not None]
+                if stavke:
+                    self._klijenti = stavke[-1][0]
+                greska = self._upisi_neupisane([zapis for stavka in stavke for zapis in stavka[1]])
+            for _, _, gotovo in stavke:
+                if gotovo is not None:
+                    self.zavrseni.put((gotovo, greska))
+
+            for _ in range(len(stavke) + (1 if kraj else 0)):
+                self.red.task_done()
+
+    def _upisi_neupisane(self, zapisi=()):
+        """Upisuje ranije neupisane zapise pa `zapisi`; vraca gresku ili None."""
+        zapisi = self.neupisani + list(zapisi)
+        if not zapisi:
+            return None
+        try:
+            self.skladiste.upisi(self._klijenti, zapisi)
+        except Exception as e:
+            # Recnik u memoriji vec ima ove izmene, pa se ne smeju izgubiti
+            self.neupisani = zapisi
+            return e
+        self.neupisani = []
+        return None
+
+    def obradi_zavrsene(self):
+        while True:
+            try:
+                gotovo, greska = self.zavrseni.get_nowait()
+            except queue.Empty:
+                return
+            gotovo(greska)
+
+    def isprazni(self):
+        self.red.join()
+
+    def upisi_sve(self):
+        """Ceka da se red upise i ponovo pokusava neupisane; vraca gresku ili None."""
+        self.isprazni()
+        with self.brava:
+            return self._upisi_neupisane()
+
+    def zatvori(self):
+        """Upisuje sve iz reda; baca gresku ako ni poslednji pokusaj ne uspe."""
+        if self._nit.is_alive():
+            self.red.put(None)
+            self._nit.join()
+        with self.brava:
+            greska = self._upisi_neupisane()
+        if greska is not None:
+            raise greska
+
+
+def sqlite_putanja(putanja):
+    return os.path.splitext(putanja)[0] + ".db"
+
+
+def _napravi_sqlite(putanja, format_snimka=None):
+    # Prvo pokretanje nad postojecim JSON fajlom prenosi klijente u bazu; pre
+    # prvog sazimanja dnevnika postoji samo dnevnik
+    db_putanja = sqlite_putanja(putanja)
+    nova_baza = not os.path.exists(db_putanja)
+    skladiste = SqliteSkladiste(db_putanja)
+    if nova_baza and (os.path.exists(putanja) or os.path.exists(putanja + ".log")):
+        skladiste.uvezi_json(putanja)
+    return skladiste
+
+
+# Vrsta skladista -> funkcija (putanja, format_snimka) koja ga pravi
+VRSTE_SKLADISTA = {
+    "json": JsonSkladiste,
+    "dnevnik": DnevnikSkladiste,
+    "sqlite": _napravi_sqlite,
+}
+
+
+def registruj_skladiste(vrsta, napravi):
+    """Dodaje vrstu skladista koju bira napravi_skladiste (i MENADZER_SKLADISTE).
+
+    `napravi(putanja, format_snimka)` vraca objekat sa interfejsom opisanim
+    u jezgro/__init__.py.
+    """
+    VRSTE_SKLADISTA[vrsta] = napravi
+
+
+def napravi_skladiste(putanja, vrsta=None, format_snimka=None):
+    vrsta = vrsta or PODRAZUMEVANO_SKLADISTE
+    if vrsta not in VRSTE_SKLADISTA:
+        raise ValueError(f"Nepoznata vrsta skladista: {vrsta}")
+    return VRSTE_SKLADISTA[vrsta](putanja, format_snimka)
+
@@ -0,0 +1,175 @@
+import csv
+import json
+import time
+from datetime import datetime
+from itertools import islice
+
+from .analitika import cena_u_tekst, parsiraj_cenu
+from .skladiste import primeni_zapis
+
+VELICINA_GRUPE = 1000
+
+OBAVEZNA_POLJA = ("ime", "prezime", "email")
+
+
+def citaj_csv(putanja):
+    """Redovi CSV fajla sa kolonama ime, prezime, email, telefon i opciono
+    paket_naziv, paket_cena, paket_datum_pocetka, beleska."""
+    with open(putanja, 'r', encoding='utf-8-sig', newline='') as f:
+        for red in csv.DictReader(f):
+            red = {k.strip(): (v or "").strip() for k, v in red.items() if k}
+            klijent = {
+                "ime": red.get("ime", ""),
+                "prezime": red.get("prezime", ""),
+                "email": red.get("email", ""),
+                "telefon": red.get("telefon", ""),
+                "paketi": [],
+                "beleske": []
+            }
+            if red.get("paket_naziv"):
+                klijent["paketi"].append({
+                    "naziv": red["paket_naziv"],
+                    "cena": red.get("paket_cena", ""),
+                    "datum_pocetka": red.get("paket_datum_pocetka", "")
+                })
+            if red.get("beleska"):
+                klijent["beleske"].append(red["beleska"])
+            yield klijent
+
+
+def citaj_jsonl(putanja):
+    """Jedan JSON objekat po redu: ime, prezime, email, telefon, paketi, beleske."""
+    with open(putanja, 'r', encoding='utf-8') as f:
+        for linija in f:
+            linija = linija.strip()
+            if not linija:
+                continue
+            try:
+                yield json.loads(linija)
+            except ValueError:
+                # Neispravan red se prijavljuje kao odbijen, ne prekida uvoz
+                yield None
+
+
+def citaj_redove(putanja, format_fajla=None):
+    if format_fajla is None:
+        format_fajla = "csv" if putanja.lower().endswith(".csv") else "jsonl"
+    if format_fajla == "csv":
+        return citaj_csv(putanja)
+    if format_fajla == "jsonl":
+        return citaj_jsonl(putanja)
+    raise ValueError(f"Nepoznat format: {format_fajla}")
+
+
+def proveri_red(red):
+    """Vraca opis greske ili None ako je red ispravan."""
+    if not isinstance(red, dict):
+        return "neispravan red"
+    for polje in OBAVEZNA_POLJA:
+        if not str(red.get(polje) or "").strip():
+            return f"nedostaje polje '{polje}'"
+    for polje in ("paketi", "beleske"):
+        # Niz se ocekuje i za jednu stavku; string bi postao stavka po znaku
+        if not isinstance(red.get(polje) or [], list):
+            return f"polje '{polje}' mora biti lista"
+    for paket in red.get("paketi") or []:
+        if not isinstance(paket, dict) or not paket.get("naziv") or not str(paket.get("cena") or "").strip():
+            return "paket mora imati naziv i cenu"
+        try:
+            parsiraj_cenu(paket["cena"])
+        except ValueError:
+            return f"neispravna cena paketa '{paket['cena']}'"
+    for beleszka in red.get("beleske") or []:
+        if isinstance(beleszka, dict):
+            beleszka = beleszka.get("tekst")
+        if not isinstance(beleszka, str) or not beleszka.strip():
+            return "beleska mora biti neprazan tekst ili objekat sa poljem 'tekst'"
+    return None
+
+
+def napravi_zapise(id_klijenta, red, sada):
+    zapisi = [{
+        "op": "dodaj_klijenta",
+        "id": id_klijenta,
+        "klijent": {
+            "ime": str(red["ime"]).strip(),
+            "prezime": str(red["prezime"]).strip(),
+            "email": str(red["email"]).strip(),
+            "telefon": str(red.get("telefon") or "").strip()
+        }
+    }]
+    for poz, paket in enumerate(red.get("paketi") or []):
+        zapisi.append({
+            "op": "dodeli_paket",
+            "id": id_klijenta,
+            "poz": poz,
+            "stavka": {
+                "naziv": paket["naziv"],
+                "cena": cena_u_tekst(parsiraj_cenu(paket["cena"])),
+                "datum_pocetka": paket.get("datum_pocetka", ""),
+                "datum_dodele": paket.get("datum_dodele") or sada
+            }
+        })
+    for poz, beleszka in enumerate(red.get("beleske") or []):
+        if isinstance(beleszka, str):
+            beleszka = {"tekst": beleszka}
+        zapisi.append({
+            "op": "dodaj_belesku",
+            "id": id_klijenta,
+            "poz": poz,
+            "stavka": {"tekst": beleszka["tekst"], "datum": beleszka.get("datum") or sada}
+        })
+    return zapisi
+
+
+def uvezi_grupno(skladiste, klijenti, redovi, velicina_grupe=VELICINA_GRUPE, indeksi=()):
+    """Uvozi redove u grupama: ID-jevi se rezervisu i podaci upisuju jednom po grupi.
+
+    `indeksi` (npr. IndeksKlijenata, IndeksPrihoda) se azuriraju pre primene zapisa.
+    """
+    pocetak = time.perf_counter()
+    uvezeno = 0
+    odbijeno = []
+    broj_reda = 0
+    redovi = iter(redovi)
+
+    while True:
+        grupa = list(islice(redovi, velicina_grupe))
+        if not grupa:
+            break
+
+        ispravni = []
+        for red in grupa:
+            broj_reda += 1
+            greska = proveri_red(red)
+            if greska:
+                odbijeno.append((broj_reda, greska))
+            else:
+                ispravni.append(red)
+        if not ispravni:
+            continue
+
+        prvi_id = skladiste.rezervisi_id(len(ispravni))
+        sada = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        zapisi = []
+        for i, red in enumerate(ispravni):
+            zapisi.extend(napravi_zapise(str(prvi_id + i), red, sada))
+        if indeksi:
+            # Uvezeni klijenti su novi, pa indeksi stanje pre svakog zapisa
+            # vide u zasebnom recniku samo sa njima
+            novi = {}
+            for zapis in zapisi:
+                for indeks in indeksi:
+                    indeks.azuriraj(novi, zapis)
+                primeni_zapis(novi, zapis)
+        skladiste.primeni(klijenti, zapisi)
+        uvezeno += len(ispravni)
+
+    trajanje = time.perf_counter() - pocetak
+    return {
+        "uvezeno": uvezeno,
+        "odbijeno": odbijeno,
+        "sekundi": trajanje,
+        "redova_u_sekundi": broj_reda / trajanje if trajanje > 0 else 0.0
+    }
+
@@ -1,91 +1,185 @@
-import json
-import os
-from datetime import datetime
+import sys
+from itertools import groupby, islice
 
-PODACI_FAJL = "klijenti_podaci.json"
+from jezgro import MenazerKlijenata
+from jezgro.analitika import formatiraj_iznos
 
-class MenazerKlijenata:
-    def __init__(self):
-        self.klijenti = self.ucitaj_podatke()
-    
-    def ucitaj_podatke(self):
-        if os.path.exists(PODACI_FAJL):
-            with open(PODACI_FAJL, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-    
-    def sacuvaj_podatke(self):
-        with open(PODACI_FAJL, 'w', encoding='utf-8') as f:
-            json.dump(self.klijenti, f, ensure_ascii=False, indent=2)
-        print("Podaci su uspesno sacuvani!")
+# Broj klijenata na jednoj stranici liste
+STRANICA = 20
+
+class KonzolniMenadzer(MenazerKlijenata):
+    """MenazerKlijenata sa ispisom u terminalu i listom po stranicama."""
     
     def dodaj_klijenta(self, ime, prezime, email, telefon):
-        id_klijenta = str(len(self.klijenti) + 1)
-        self.klijenti[id_klijenta] = {
-            "ime": ime,
-            "prezime": prezime,
-            "email": email,
-            "telefon": telefon,
-            "paketi": [],
-            "beleske": []
-        }
-        self.sacuvaj_podatke()
-        print(f"Klijent {ime} {prezime} je dodat! (ID: {id_klijenta})")
+        id_klijenta = super().dodaj_klijenta(ime, prezime, email, telefon)
+        if id_klijenta is not None:
+            print(f"Klijent {ime} {prezime} je dodat! (ID: {id_klijenta})")
         return id_klijenta
     
     def dodeli_paket(self, id_klijenta, naziv_paketa, cena, datum_pocetka):
         if id_klijenta not in self.klijenti:
             print("Klijent sa tim ID-om nije pronadjen!")
-            return
-        
-        paket = {
-            "naziv": naziv_paketa,
-            "cena": cena,
-            "datum_pocetka": datum_pocetka,
-            "datum_dodele": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        self.klijenti[id_klijenta]["paketi"].append(paket)
-        self.sacuvaj_podatke()
-        print(f"Paket '{naziv_paketa}' je dodeljen klijentu!")
+            return False
+        try:
+            uspeh = super().dodeli_paket(id_klijenta, naziv_paketa, cena, datum_pocetka)
+        except ValueError:
+            print("Cena mora biti broj (npr. 1500 ili 1.500,50)!")
+            return False
+        if uspeh:
+            print(f"Paket '{naziv_paketa}' je dodeljen klijentu!")
+        return uspeh
     
     def dodaj_beleszku(self, id_klijenta, tekst_beleske):
         if id_klijenta not in self.klijenti:
             print("Klijent sa tim ID-om nije pronadjen!")
-            return
-        
-        beleszka = {
-            "tekst": tekst_beleske,
-            "datum": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        self.klijenti[id_klijenta]["beleske"].append(beleszka)
-        self.sacuvaj_podatke()
-        print("Beliska je dodana!")
+            return False
+        uspeh = super().dodaj_beleszku(id_klijenta, tekst_beleske)
+        if uspeh:
+            print("Beliska je dodana!")
+        return uspeh
+    
+    def obrisi_klijenta(self, id_klijenta):
+        if id_klijenta not in self.klijenti:
+            print("Klijent sa tim ID-om nije pronadjen!")
+            return False
+        uspeh = super().obrisi_klijenta(id_klijenta)
+        if uspeh:
+            print("Klijent je obrisan!")
+        return uspeh
     
     def prikazi_sve_klijente(self):
+        """Lista svih klijenata po stranicama; vraca ID koji je korisnik izabrao."""
         if not self.klijenti:
             print("Nema registrovanih klijenata.")
+            return None
+        return self.listaj(self.klijenti, "LISTA KLIJENATA")
+    
+    def stranica(self, ids, pocetak, naslov):
+        """Tekst jedne stranice liste; ispisuje se jednim upisom u terminal."""
+        ukupno = len(ids)
+        kraj = min(pocetak + STRANICA, ukupno)
+        linije = [
+            "",
+            "=" * 60,
+            f"{naslov} ({pocetak + 1}-{kraj} od {ukupno})",
+            "=" * 60,
+            f"{'ID':>6}  {'Ime i prezime':<28} {'Email':<28} {'Telefon':<14} {'Pak.':>4} {'Bel.':>4}"
+        ]
+        # islice ne pravi listu svih ID-jeva, cita se samo do trazene stranice
+        for id_klijenta in islice(ids, pocetak, kraj):
+            klijent = self.zaglavlje(id_klijenta)
+            linije.append(
+                f"{id_klijenta:>6}  {klijent['ime'] + ' ' + klijent['prezime']:<28.28} "
+                f"{klijent['email']:<28.28} {klijent['telefon']:<14.14} "
+                f"{klijent['broj_paketa']:>4} {klijent['broj_beleski']:>4}")
+        return "\n".join(linije) + "\n"
+    
+    def listaj(self, ids, naslov):
+        """Prikazuje `ids` po stranicama od STRANICA klijenata.
+        
+        Komande: Enter - sledeca stranica, "-" - prethodna, "/prefiks" - samo
+        klijenti cije prezime pocinje prefiksom ("/" vraca sve), ID - izbor
+        klijenta, "k" - kraj. Vraca izabrani ID ili None.
+        """
+        svi, naslov_svih = ids, naslov
+        pocetak = 0
+        while True:
+            if ids:
+                sys.stdout.write(self.stranica(ids, pocetak, naslov))
+            else:
+                print("Nijedan klijent ne odgovara filteru.")
+            odgovor = input("[Enter] dalje, [-] nazad, [/prefiks] filter, [ID] izbor, [k] kraj: ").strip()
+            
+            if not odgovor:
+                if pocetak + STRANICA >= len(ids):
+                    return None
+                pocetak += STRANICA
+            elif odgovor == "-":
+                pocetak = max(pocetak - STRANICA, 0)
+            elif odgovor.startswith("/"):
+                prefiks = odgovor[1:].strip()
+                if prefiks:
+                    ids = self.pretrazi(prezime=prefiks)
+                    naslov = f"PREZIME: {prefiks}*"
+                else:
+                    ids, naslov = svi, naslov_svih
+                pocetak = 0
+            elif odgovor.lower() == "k":
+                return None
+            elif odgovor in self.klijenti:
+                return odgovor
+            else:
+                print("Klijent sa tim ID-om nije pronadjen!")
+    
+    def izaberi_klijenta(self):
+        """ID klijenta za sledecu akciju, bez ispisivanja cele liste.
+        
+        Unosi se ID ili pojam za pretragu; ako pretragu zadovoljava samo jedan
+        klijent, on je izabran. Prazan unos otvara listu po stranicama.
+        """
+        unos = input("\nUnesi ID klijenta ili pojam za pretragu (Enter za listu): ").strip()
+        if not unos:
+            return self.prikazi_sve_klijente()
+        if unos in self.klijenti:
+            return unos
+        
+        rezultati = self.pretrazi(unos)
+        if not rezultati:
+            print("Nijedan klijent ne odgovara pretrazi.")
+            return None
+        if len(rezultati) == 1:
+            self.prikazi_klijenta(rezultati[0])
+            return rezultati[0]
+        return self.listaj(rezultati, "REZULTATI PRETRAGE")
+    
+    def prikazi_klijenta(self, id_klijenta):
+        klijent = self.zaglavlje(id_klijenta)
+        sys.stdout.write(
+            f"\nID: {id_klijenta}\n"
+            f"Ime i prezime: {klijent['ime']} {klijent['prezime']}\n"
+            f"Email: {klijent['email']}\n"
+            f"Telefon: {klijent['telefon']}\n"
+            f"Broj paketa: {klijent['broj_paketa']}\n"
+            f"Broj beleski: {klijent['broj_beleski']}\n")
+    
+    def prikazi_pretragu(self, upit):
+        """Rezultati pretrage po stranicama; vraca izabrani ID ili None."""
+        rezultati = self.pretrazi(upit)
+        if not rezultati:
+            print("Nijedan klijent ne odgovara pretrazi.")
+            return None
+        return self.listaj(rezultati, "REZULTATI PRETRAGE")
+    
+    def prikazi_prihode(self):
+        """Prihodi po paketu i po mesecu pocetka iz indeksa, bez prolaza kroz klijente."""
+        ukupno_para, ukupno_paketa = self.prihodi.ukupno()
+        if not ukupno_paketa:
+            print("Nema dodeljenih paketa.")
             return
         
-        print("\n" + "="*60)
-        print("LISTA KLIJENATA")
-        print("="*60)
+        zaglavlje_tabele = f"{'':<34} {'Paketa':>8} {'Prihod (din)':>16}"
+        linije = ["", "=" * 60, "PRIHODI PO PAKETU", "=" * 60, zaglavlje_tabele]
+        for naziv, para, broj in self.prihodi.izvestaj_po_paketu():
+            linije.append(f"{naziv:<34.34} {broj:>8} {formatiraj_iznos(para):>16}")
         
-        for id_klijenta, klijent in self.klijenti.items():
-            print(f"\nID: {id_klijenta}")
-            print(f"Ime i prezime: {klijent['ime']} {klijent['prezime']}")
-            print(f"Email: {klijent['email']}")
-            print(f"Telefon: {klijent['telefon']}")
-            print(f"Broj paketa: {len(klijent['paketi'])}")
-            print(f"Broj beleski: {len(klijent['beleske'])}")
+        linije += ["", "=" * 60, "PRIHODI PO MESECU POCETKA", "=" * 60, zaglavlje_tabele]
+        for mesec, redovi in groupby(self.prihodi.izvestaj_po_paketu_i_mesecu(), key=lambda red: red[0]):
+            para, broj = self.prihodi.po_mesecu[mesec]
+            linije.append(f"{mesec or 'bez datuma':<34} {broj:>8} {formatiraj_iznos(para):>16}")
+            for _, naziv, para, broj in redovi:
+                linije.append(f"  {naziv:<32.32} {broj:>8} {formatiraj_iznos(para):>16}")
+        
+        linije += ["-" * 60, f"{'UKUPNO':<34} {ukupno_paketa:>8} {formatiraj_iznos(ukupno_para):>16}"]
+        if self.prihodi.neispravnih:
+            linije.append(f"Paketa bez ispravne cene (nisu u iznosu): {self.prihodi.neispravnih}")
+        sys.stdout.write("\n".join(linije) + "\n")
     
     def prikazi_detalje_klijenta(self, id_klijenta):
         if id_klijenta not in self.klijenti:
             print("Klijent sa tim ID-om nije pronadjen!")
             return
         
-        klijent = self.klijenti[id_klijenta]
+        klijent = self.detalji(id_klijenta)
         
         print("\n" + "="*60)
         print(f"DETALJI KLIJENTA - {klijent['ime']} {klijent['prezime']}")
@@ -102,14 +196,34 @@ class MenazerKlijenata:
             print("  Nema dodeljenih paketa.")
         
         print("\nBELESKE:")
+        arhivirano = klijent.get('arhivirano', 0)
+        if arhivirano:
+            print(f"  ({arhivirano} starijih beleski je u arhivi)")
         if klijent['beleske']:
-            for i, beleszka in enumerate(klijent['beleske'], 1):
+            for i, beleszka in enumerate(klijent['beleske'], arhivirano + 1):
                 print(f"  {i}. [{beleszka['datum']}] {beleszka['tekst']}")
-        else:
+        elif not arhivirano:
             print("  Nema beleski.")
+    
+    def prikazi_arhivu(self, upit):
+        """Arhivirane beleske sa svim recima iz upita, grupisane po klijentu."""
+        rezultati = self.pretrazi_arhivu(upit)
+        if not rezultati:
+            print("Nijedna arhivirana beleska ne odgovara pretrazi.")
+            return
+        linije = ["", "=" * 60, f"ARHIVA BELESKI: {upit} ({len(rezultati)})", "=" * 60]
+        for id_klijenta, redovi in groupby(rezultati, key=lambda red: red[0]):
+            klijent = self.zaglavlje(id_klijenta)
+            linije.append(f"{id_klijenta:>6}  {klijent['ime']} {klijent['prezime']}")
+            for _, poz, beleszka in redovi:
+                linije.append(f"        {poz + 1}. [{beleszka['datum']}] {beleszka['tekst']}")
+        sys.stdout.write("\n".join(linije) + "\n")
 
 def meni():
-    menadzer = MenazerKlijenata()
+    menadzer = KonzolniMenadzer()
+    arhivirano = menadzer.arhiviraj_beleske()
+    if arhivirano:
+        print(f"U arhivu je premesteno {arhivirano} starih beleski.")
     
     while True:
         print("\n" + "="*60)
@@ -120,10 +234,14 @@ def meni():
         print("3. Dodaj belsku za klijenta")
         print("4. Prikazi sve klijente")
         print("5. Prikazi detalje klijenta")
-        print("6. Izlaz")
+        print("6. Pretrazi klijente")
+        print("7. Izvestaj o prihodima")
+        print("8. Pretrazi arhivu beleski")
+        print("9. Izlaz")
         print("="*60)
         
-        izbor = input("Odaberi opciju (1-6): ").strip()
+        izbor = input("Odaberi opciju (1-9): ").strip()
+        menadzer.osvezi()
         
         if izbor == "1":
             print("\n--- DODAVANJE NOVOG KLIJENTA ---")
@@ -139,10 +257,9 @@ def meni():
         
         elif izbor == "2":
             print("\n--- DODELJIVANJE PAKETA ---")
-            menadzer.prikazi_sve_klijente()
-            id_klijenta = input("\nUnesi ID klijenta: ").strip()
+            id_klijenta = menadzer.izaberi_klijenta()
             
-            if id_klijenta in menadzer.klijenti:
+            if id_klijenta is not None:
                 naziv_paketa = input("Unesi naziv paketa: ").strip()
                 cena = input("Unesi cenu (dinara): ").strip()
                 datum_pocetka = input("Unesi datum pocetka (YYYY-MM-DD): ").strip()
@@ -152,37 +269,60 @@ def meni():
                 else:
                     print("Molim unesi sve obavezne podatke!")
             else:
-                print("Klijent sa tim ID-om nije pronadjen!")
+                print("Klijent nije izabran.")
         
         elif izbor == "3":
             print("\n--- DODAVANJE BELESKE ---")
-            menadzer.prikazi_sve_klijente()
-            id_klijenta = input("\nUnesi ID klijenta: ").strip()
+            id_klijenta = menadzer.izaberi_klijenta()
             
-            if id_klijenta in menadzer.klijenti:
+            if id_klijenta is not None:
                 tekst_beleske = input("Unesi belsku: ").strip()
                 if tekst_beleske:
                     menadzer.dodaj_beleszku(id_klijenta, tekst_beleske)
                 else:
                     print("Beliska ne moze biti prazna!")
             else:
-                print("Klijent sa tim ID-om nije pronadjen!")
+                print("Klijent nije izabran.")
         
         elif izbor == "4":
-            menadzer.prikazi_sve_klijente()
+            id_klijenta = menadzer.prikazi_sve_klijente()
+            if id_klijenta is not None:
+                menadzer.prikazi_detalje_klijenta(id_klijenta)
         
         elif izbor == "5":
             print("\n--- DETALJI KLIJENTA ---")
-            menadzer.prikazi_sve_klijente()
-            id_klijenta = input("\nUnesi ID klijenta: ").strip()
-            menadzer.prikazi_detalje_klijenta(id_klijenta)
+            id_klijenta = menadzer.izaberi_klijenta()
+            if id_klijenta is not None:
+                menadzer.prikazi_detalje_klijenta(id_klijenta)
         
         elif izbor == "6":
+            print("\n--- PRETRAGA KLIJENATA ---")
+            upit = input("Unesi email, telefon, prezime ili rec iz beleske: ").strip()
+            if upit:
+                id_klijenta = menadzer.prikazi_pretragu(upit)
+                if id_klijenta is not None:
+                    menadzer.prikazi_detalje_klijenta(id_klijenta)
+            else:
+                print("Unesi pojam za pretragu!")
+        
+        elif izbor == "7":
+            menadzer.prikazi_prihode()
+        
+        elif izbor == "8":
+            print("\n--- ARHIVA BELESKI ---")
+            upit = input("Unesi reci iz beleske: ").strip()
+            if upit:
+                menadzer.prikazi_arhivu(upit)
+            else:
+                print("Unesi pojam za pretragu!")
+        
+        elif izbor == "9":
+            menadzer.zatvori()
             print("\nDo vidjenja!")
             break
         
         else:
-            print("Nevalidna opcija! Molim odaberi broj od 1 do 6.")
+            print("Nevalidna opcija! Molim odaberi broj od 1 do 9.")
 
 if __name__ == "__main__":
     meni()
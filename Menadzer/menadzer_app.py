@@ -1,93 +1,30 @@
-import json
 import os
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
+from bisect import bisect_left
 from datetime import datetime
+from itertools import islice
 
-PODACI_FAJL = "klijenti_podaci.json"
+from jezgro import MenazerKlijenata, numericki_id
+from jezgro.arhiva import ARHIVA_MESECI
+from jezgro.analitika import formatiraj_iznos, parsiraj_cenu
+
+# Koliko redova tabela drzi odjednom; pri skrolovanju se prozor pomera kroz listu
+STRANICA_TABELE = 200
+
+# Koliko beleski detaljni pregled dodaje odjednom (od najnovije)
+STRANICA_BELESKI = 50
+
+# Koliko klijenata se arhivira u jednom prolazu Tk petlje
+ARHIVA_DEO = 50
+
+# Koliko cesto se proverava da li je drugi proces menjao podatke
+PROVERA_IZMENA_MS = 2000
+
+# Fajl u koji se upisuje vreme prvog prikaza prozora (vidi merenje_pokretanja.py)
+MERENJE_FAJL = os.environ.get("MENADZER_MERENJE")
 
-class MenazerKlijenata:
-    def __init__(self):
-        self.klijenti = self.ucitaj_podatke()
-    
-    def ucitaj_podatke(self):
-        if os.path.exists(PODACI_FAJL):
-            try:
-                with open(PODACI_FAJL, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data if isinstance(data, dict) else {}
-            except:
-                return {}
-        return {}
-    
-    def sacuvaj_podatke(self):
-        try:
-            with open(PODACI_FAJL, 'w', encoding='utf-8') as f:
-                json.dump(self.klijenti, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"Greška pri čuvanju: {e}")
-            return False
-    
-    def dodaj_klijenta(self, ime, prezime, email, telefon):
-        try:
-            max_id = 0
-            for k_id in self.klijenti.keys():
-                try:
-                    if int(k_id) > max_id:
-                        max_id = int(k_id)
-                except:
-                    pass
-            
-            id_klijenta = str(max_id + 1)
-            self.klijenti[id_klijenta] = {
-                "ime": ime,
-                "prezime": prezime,
-                "email": email,
-                "telefon": telefon,
-                "paketi": [],
-                "beleske": []
-            }
-            self.sacuvaj_podatke()
-            return id_klijenta
-        except Exception as e:
-            print(f"Greška pri dodavanju: {e}")
-            return None
-    
-    def dodeli_paket(self, id_klijenta, naziv_paketa, cena, datum_pocetka):
-        if id_klijenta not in self.klijenti:
-            return False
-        
-        paket = {
-            "naziv": naziv_paketa,
-            "cena": cena,
-            "datum_pocetka": datum_pocetka,
-            "datum_dodele": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        self.klijenti[id_klijenta]["paketi"].append(paket)
-        self.sacuvaj_podatke()
-        return True
-    
-    def dodaj_beleszku(self, id_klijenta, tekst_beleske):
-        if id_klijenta not in self.klijenti:
-            return False
-        
-        beleszka = {
-            "tekst": tekst_beleske,
-            "datum": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        self.klijenti[id_klijenta]["beleske"].append(beleszka)
-        self.sacuvaj_podatke()
-        return True
-    
-    def obrisi_klijenta(self, id_klijenta):
-        if id_klijenta in self.klijenti:
-            del self.klijenti[id_klijenta]
-            self.sacuvaj_podatke()
-            return True
-        return False
 
 class GUIApp:
     def __init__(self, root):
@@ -96,7 +33,12 @@ class GUIApp:
         self.root.geometry("1200x700")
         self.root.configure(bg='#ecf0f1')
         
-        self.menadzer = MenazerKlijenata()
+        try:
+            self.menadzer = MenazerKlijenata(u_pozadini=True)
+        except Exception as e:
+            messagebox.showerror("Greška", f"Podaci klijenata ne mogu da se učitaju:\n{e}")
+            raise
+        self.root.protocol("WM_DELETE_WINDOW", self.zatvori)
         
         # Moderan stil
         self.setup_style()
@@ -112,7 +54,62 @@ class GUIApp:
         self.setup_content()
         
         # Učitaj klijente
+        self.redosled = []
+        self.pocetak = 0
+        self.kraj = 0
         self.ucitaj_klijente()
+        
+        self.proveri_upise()
+        self.root.after(PROVERA_IZMENA_MS, self.proveri_izmene)
+        # Stare beleske idu u arhivu tek kad je prozor vec prikazan (MENADZER_ARHIVA_MESECI)
+        if ARHIVA_MESECI > 0:
+            self.root.after_idle(self.arhiviraj_postepeno, list(self.menadzer.klijenti))
+    
+    def arhiviraj_postepeno(self, ids):
+        # Deo po deo, da prozor ostane odziv i kad ima mnogo klijenata za arhivu
+        self.menadzer.arhiviraj_beleske(ids=ids[:ARHIVA_DEO])
+        if len(ids) > ARHIVA_DEO:
+            self.root.after(1, self.arhiviraj_postepeno, ids[ARHIVA_DEO:])
+    
+    def proveri_upise(self):
+        # Povratni pozivi pozadinskog upisa se izvrsavaju u Tk niti
+        self.menadzer.obradi_zavrsene()
+        self.root.after(100, self.proveri_upise)
+    
+    def proveri_izmene(self):
+        self.osvezi_klijente()
+        self.root.after(PROVERA_IZMENA_MS, self.proveri_izmene)
+    
+    def osvezi_klijente(self):
+        # Menjaju se samo redovi klijenata koje je promenio drugi proces
+        for id_klijenta in sorted(self.menadzer.osvezi(), key=numericki_id):
+            if id_klijenta not in self.menadzer.klijenti:
+                self.ukloni_red(id_klijenta)
+            elif self.pozicija_u_listi(id_klijenta) is not None:
+                self.osvezi_red(id_klijenta)
+            elif not self.pretraga_aktivna:
+                self.dodaj_red(id_klijenta)
+    
+    def posle_upisa(self, poruka):
+        def gotovo(greska):
+            if greska is None:
+                messagebox.showinfo("Uspeh", poruka)
+            else:
+                messagebox.showerror("Greška", f"Greška pri čuvanju: {greska}\n\n"
+                                     "Izmena će biti ponovo upisana uz sledeću izmenu i pri zatvaranju.")
+        return gotovo
+    
+    def zatvori(self):
+        # Sve izmene iz reda moraju na disk pre zatvaranja prozora
+        greska = self.menadzer.upisi_sve()
+        if greska is not None and not messagebox.askyesno(
+                "Greška", f"Izmene nisu sačuvane: {greska}\n\nZatvoriti bez njih?"):
+            return
+        try:
+            self.menadzer.zatvori()
+        except Exception as e:
+            print(f"Greška pri čuvanju: {e}")
+        self.root.destroy()
     
     def setup_style(self):
         style = ttk.Style()
@@ -150,7 +147,9 @@ class GUIApp:
             ("📦 Dodeli Paket", self.dodeli_paket_dijalog, '#3498db'),
             ("📝 Dodaj Belešku", self.dodaj_beleszku_dijalog, '#f39c12'),
             ("🗑️ Obriši", self.obrisi_klijenta_dijalog, '#e74c3c'),
-            ("🔄 Osveži", self.ucitaj_klijente, '#34495e'),
+            ("🔄 Osveži", self.osvezi_klijente, '#34495e'),
+            ("📊 Statistika", self.statistika_dijalog, '#8e44ad'),
+            ("🗄️ Arhiva", self.arhiva_dijalog, '#7f8c8d'),
         ]
         
         for text, command, color in buttons_data:
@@ -162,6 +161,20 @@ class GUIApp:
                            activebackground=self.darker_color(color))
             btn.pack(side=tk.LEFT, padx=5)
         
+        # Pretraga
+        self.pretraga_var = tk.StringVar()
+        pretraga_btn = tk.Button(button_frame, text="🔍 Pretraži", command=self.pretrazi_klijente,
+                                font=('Segoe UI', 10, 'bold'),
+                                bg='#16a085', fg='white',
+                                padx=15, pady=10,
+                                border=0, cursor='hand2',
+                                activebackground=self.darker_color('#16a085'))
+        pretraga_btn.pack(side=tk.RIGHT, padx=5)
+        
+        pretraga_entry = tk.Entry(button_frame, textvariable=self.pretraga_var, font=('Segoe UI', 10), width=28)
+        pretraga_entry.pack(side=tk.RIGHT, padx=5, ipady=8)
+        pretraga_entry.bind('<Return>', lambda event: self.pretrazi_klijente())
+        
         # Tabela
         tree_frame = ttk.Frame(content_frame, style='Main.TFrame')
         tree_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
@@ -169,10 +182,12 @@ class GUIApp:
         scrollbar = ttk.Scrollbar(tree_frame)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        self.scrollbar = scrollbar
         self.tree = ttk.Treeview(tree_frame, 
                                 columns=('ID', 'Ime', 'Prezime', 'Email', 'Telefon', 'Paketi', 'Beleške'),
-                                height=20, yscrollcommand=scrollbar.set, style='Treeview')
-        scrollbar.config(command=self.tree.yview)
+                                height=20, yscrollcommand=self.na_skrol, style='Treeview')
+        # Klizac pokazuje celu listu, ne samo redove koji su trenutno u tabeli
+        scrollbar.config(command=self.skroluj)
         
         self.tree.column('#0', width=0, stretch=tk.NO)
         self.tree.column('ID', anchor=tk.CENTER, width=50)
@@ -197,21 +212,126 @@ class GUIApp:
                               border=0, cursor='hand2',
                               activebackground='#8e44ad')
         detail_btn.pack(side=tk.LEFT, padx=5)
+        
+        self.status_label = ttk.Label(content_frame, text="", style='TLabel')
+        self.status_label.pack(side=tk.RIGHT, padx=5)
     
     def darker_color(self, hex_color):
         hex_color = hex_color.lstrip('#')
         return '#' + ''.join([hex(max(0, int(hex_color[i:i+2], 16) - 30))[2:].zfill(2) for i in (0, 2, 4)])
     
     def ucitaj_klijente(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for id_klijenta in sorted(self.menadzer.klijenti.keys(), key=lambda x: int(x) if x.isdigit() else 0):
-            klijent = self.menadzer.klijenti[id_klijenta]
-            self.tree.insert('', tk.END, text='',
-                           values=(id_klijenta, klijent['ime'], klijent['prezime'],
-                                 klijent['email'], klijent['telefon'],
-                                 len(klijent['paketi']), len(klijent['beleske'])))
+        self.pretraga_var.set("")
+        self.pretraga_aktivna = False
+        self.prikazi_listu(sorted(self.menadzer.klijenti.keys(), key=numericki_id))
+    
+    def prikazi_listu(self, redosled):
+        # Tabela drzi samo redove self.redosled[pocetak:kraj] (najvise STRANICA_TABELE)
+        self.redosled = redosled
+        self.prikazi_od(0)
+    
+    def prikazi_od(self, vrh):
+        """Pravi redove oko pozicije `vrh` i skroluje tabelu tako da je ona prva vidljiva."""
+        ukupno = len(self.redosled)
+        pocetak = max(0, min(vrh - STRANICA_TABELE // 2, ukupno - STRANICA_TABELE))
+        izabrani = self.tree.selection()
+        self.tree.delete(*self.tree.get_children())
+        self.pocetak = pocetak
+        self.kraj = min(pocetak + STRANICA_TABELE, ukupno)
+        for id_klijenta in self.redosled[self.pocetak:self.kraj]:
+            self.tree.insert('', tk.END, iid=id_klijenta, text='', values=self.vrednosti_reda(id_klijenta))
+        self.tree.selection_set([id_klijenta for id_klijenta in izabrani if self.tree.exists(id_klijenta)])
+        if self.kraj > self.pocetak:
+            self.tree.yview_moveto((vrh - self.pocetak) / (self.kraj - self.pocetak))
+        self.osvezi_status()
+    
+    def skroluj(self, *args):
+        # Povlacenje klizaca ide na bilo koje mesto u listi; strelice i stranice
+        # skroluju samu tabelu, a na_skrol pomera prozor kad se dodje do ivice
+        if args[0] == 'moveto':
+            self.prikazi_od(int(float(args[1]) * len(self.redosled)))
+        else:
+            self.tree.yview(*args)
+    
+    def na_skrol(self, prvi, poslednji):
+        ukupno = len(self.redosled)
+        redova = self.kraj - self.pocetak
+        if not ukupno or not redova:
+            self.scrollbar.set(prvi, poslednji)
+            return
+        vrh = self.pocetak + round(float(prvi) * redova)
+        dno = self.pocetak + round(float(poslednji) * redova)
+        self.scrollbar.set(vrh / ukupno, dno / ukupno)
+        if (dno >= self.kraj and self.kraj < ukupno) or (vrh <= self.pocetak and self.pocetak > 0):
+            # Posle pomeranja vidljivi redovi su u sredini prozora, pa se ovo ne ponavlja
+            self.root.after_idle(self.pomeri_prozor, vrh)
+    
+    def pomeri_prozor(self, vrh):
+        if (vrh < self.pocetak or vrh >= self.kraj
+                or (self.pocetak <= vrh - STRANICA_TABELE // 4
+                    and vrh + STRANICA_TABELE // 4 < self.kraj)):
+            # Tabela je u medjuvremenu vec pomerena ili prikazana iz pocetka
+            return
+        self.prikazi_od(vrh)
+    
+    def osvezi_status(self):
+        if self.kraj > self.pocetak:
+            tekst = f"Redovi {self.pocetak + 1}-{self.kraj} od {len(self.redosled)}"
+        else:
+            tekst = "Prikazano 0 od 0"
+        self.status_label.config(text=tekst)
+    
+    def vrednosti_reda(self, id_klijenta):
+        klijent = self.menadzer.zaglavlje(id_klijenta)
+        return (id_klijenta, klijent['ime'], klijent['prezime'],
+                klijent['email'], klijent['telefon'],
+                klijent['broj_paketa'], klijent['broj_beleski'])
+    
+    def pozicija_u_listi(self, id_klijenta):
+        i = bisect_left(self.redosled, numericki_id(id_klijenta), key=numericki_id)
+        if i < len(self.redosled) and self.redosled[i] == id_klijenta:
+            return i
+        return None
+    
+    def dodaj_red(self, id_klijenta):
+        # Nasi novi klijenti idu na kraj, ali klijent iz drugog procesa moze imati i manji ID
+        i = bisect_left(self.redosled, numericki_id(id_klijenta), key=numericki_id)
+        self.redosled.insert(i, id_klijenta)
+        if i < self.pocetak:
+            self.pocetak += 1
+            self.kraj += 1
+        elif i < self.kraj or self.kraj == len(self.redosled) - 1:
+            # Unutar prozora ili odmah iza njega kad prozor prikazuje kraj liste
+            self.tree.insert('', i - self.pocetak, iid=id_klijenta, text='',
+                             values=self.vrednosti_reda(id_klijenta))
+            self.kraj += 1
+        self.osvezi_status()
+    
+    def osvezi_red(self, id_klijenta):
+        if self.tree.exists(id_klijenta):
+            self.tree.item(id_klijenta, values=self.vrednosti_reda(id_klijenta))
+    
+    def ukloni_red(self, id_klijenta):
+        i = self.pozicija_u_listi(id_klijenta)
+        if i is not None:
+            del self.redosled[i]
+            if i < self.pocetak:
+                self.pocetak -= 1
+                self.kraj -= 1
+            elif i < self.kraj:
+                self.kraj -= 1
+        if self.tree.exists(id_klijenta):
+            self.tree.delete(id_klijenta)
+        self.osvezi_status()
+    
+    def pretrazi_klijente(self):
+        upit = self.pretraga_var.get().strip()
+        if not upit:
+            self.ucitaj_klijente()
+            return
+        
+        self.pretraga_aktivna = True
+        self.prikazi_listu(self.menadzer.pretrazi(upit))
     
     def dodaj_klijenta_dijalog(self):
         dialog = tk.Toplevel(self.root)
@@ -261,10 +381,13 @@ class GUIApp:
                 messagebox.showerror("Greška", "Molim unesi: Ime, Prezime i Email!")
                 return
             
-            id_klijenta = self.menadzer.dodaj_klijenta(ime, prezime, email, telefon)
+            id_klijenta = self.menadzer.dodaj_klijenta(
+                ime, prezime, email, telefon,
+                gotovo=self.posle_upisa(f"✓ Klijent {ime} {prezime} je uspešno dodat!"))
             if id_klijenta:
-                messagebox.showinfo("Uspeh", f"✓ Klijent {ime} {prezime} je uspešno dodat!")
-                self.ucitaj_klijente()
+                # Za vreme pretrage lista prikazuje samo pogotke
+                if not self.pretraga_aktivna:
+                    self.dodaj_red(id_klijenta)
                 dialog.destroy()
             else:
                 messagebox.showerror("Greška", "Greška pri dodavanju klijenta!")
@@ -291,7 +414,7 @@ class GUIApp:
             messagebox.showerror("Greška", "Molim odaberi klijenta!")
             return
         
-        id_klijenta = self.tree.item(selected[0])['values'][0]
+        id_klijenta = selected[0]
         ime = self.tree.item(selected[0])['values'][1]
         prezime = self.tree.item(selected[0])['values'][2]
         
@@ -340,10 +463,15 @@ class GUIApp:
             if not naziv or not cena:
                 messagebox.showerror("Greška", "Molim unesi Naziv i Cenu!")
                 return
+            try:
+                parsiraj_cenu(cena)
+            except ValueError:
+                messagebox.showerror("Greška", "Cena mora biti broj (npr. 1500 ili 1.500,50)!")
+                return
             
-            if self.menadzer.dodeli_paket(id_klijenta, naziv, cena, datum):
-                messagebox.showinfo("Uspeh", f"✓ Paket je uspešno dodeljen!")
-                self.ucitaj_klijente()
+            if self.menadzer.dodeli_paket(id_klijenta, naziv, cena, datum,
+                                          gotovo=self.posle_upisa("✓ Paket je uspešno dodeljen!")):
+                self.osvezi_red(id_klijenta)
                 dialog.destroy()
         
         # Dugmići
@@ -368,7 +496,7 @@ class GUIApp:
             messagebox.showerror("Greška", "Molim odaberi klijenta!")
             return
         
-        id_klijenta = self.tree.item(selected[0])['values'][0]
+        id_klijenta = selected[0]
         ime = self.tree.item(selected[0])['values'][1]
         prezime = self.tree.item(selected[0])['values'][2]
         
@@ -405,9 +533,9 @@ class GUIApp:
                 messagebox.showerror("Greška", "Beleška ne može biti prazna!")
                 return
             
-            if self.menadzer.dodaj_beleszku(id_klijenta, tekst):
-                messagebox.showinfo("Uspeh", "✓ Belešku je uspešno dodana!")
-                self.ucitaj_klijente()
+            if self.menadzer.dodaj_beleszku(id_klijenta, tekst,
+                                            gotovo=self.posle_upisa("✓ Belešku je uspešno dodana!")):
+                self.osvezi_red(id_klijenta)
                 dialog.destroy()
         
         # Dugmići
@@ -432,14 +560,93 @@ class GUIApp:
             messagebox.showerror("Greška", "Molim odaberi klijenta!")
             return
         
-        id_klijenta = self.tree.item(selected[0])['values'][0]
+        id_klijenta = selected[0]
         ime = self.tree.item(selected[0])['values'][1]
         prezime = self.tree.item(selected[0])['values'][2]
         
         if messagebox.askyesno("Potvrda", f"Da li želiš da obrišeš:\n\n{ime} {prezime}?"):
-            if self.menadzer.obrisi_klijenta(id_klijenta):
-                messagebox.showinfo("Uspeh", "✓ Klijent je uspešno obrisan!")
-                self.ucitaj_klijente()
+            if self.menadzer.obrisi_klijenta(id_klijenta,
+                                             gotovo=self.posle_upisa("✓ Klijent je uspešno obrisan!")):
+                self.ukloni_red(id_klijenta)
+    
+    def statistika_dijalog(self):
+        prozor = tk.Toplevel(self.root)
+        prozor.title("Statistika Prihoda")
+        prozor.geometry("900x600")
+        prozor.transient(self.root)
+        prozor.configure(bg='#ecf0f1')
+        
+        # Zaglavlje
+        header = tk.Frame(prozor, bg='#8e44ad', height=50)
+        header.pack(fill=tk.X)
+        tk.Label(header, text="📊 Prihodi po Paketu i Mesecu", font=('Segoe UI', 14, 'bold'),
+                bg='#8e44ad', fg='white').pack(pady=10)
+        
+        # Sadržaj
+        content = tk.Frame(prozor, bg='#ecf0f1')
+        content.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        
+        ukupno_label = tk.Label(content, text="", font=('Segoe UI', 11, 'bold'),
+                               bg='#ecf0f1', fg='#2c3e50')
+        ukupno_label.pack(anchor=tk.W, pady=(0, 10))
+        
+        btn_frame = tk.Frame(content, bg='#ecf0f1')
+        btn_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=(15, 0))
+        
+        tabele = {}
+        for kljuc, naslov, prva_kolona in (("paket", "📦 Po Paketu", "Paket"),
+                                           ("mesec", "📅 Po Mesecu Početka", "Mesec / Paket")):
+            okvir = tk.Frame(content, bg='white', relief=tk.RIDGE, bd=1)
+            okvir.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+            
+            tk.Label(okvir, text=naslov, font=('Segoe UI', 11, 'bold'),
+                    bg='#34495e', fg='white').pack(fill=tk.X, padx=10, pady=(10, 0))
+            
+            tabela = ttk.Treeview(okvir, columns=('Paketa', 'Prihod'), style='Treeview')
+            tabela.heading('#0', text=prva_kolona)
+            tabela.heading('Paketa', text='Paketa')
+            tabela.heading('Prihod', text='Prihod (din)')
+            tabela.column('#0', anchor=tk.W, width=180)
+            tabela.column('Paketa', anchor=tk.CENTER, width=70)
+            tabela.column('Prihod', anchor=tk.E, width=130)
+            tabela.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            tabele[kljuc] = tabela
+        
+        def popuni():
+            # Zbirovi dolaze iz indeksa prihoda, pa je ovo brzo i za veliku bazu
+            self.osvezi_klijente()
+            prihodi = self.menadzer.prihodi
+            for tabela in tabele.values():
+                tabela.delete(*tabela.get_children())
+            
+            for naziv, para, broj in prihodi.izvestaj_po_paketu():
+                tabele['paket'].insert('', tk.END, text=naziv, values=(broj, formatiraj_iznos(para)))
+            for mesec, para, broj in prihodi.izvestaj_po_mesecu():
+                tabele['mesec'].insert('', tk.END, iid=f"mesec:{mesec}", text=mesec or "bez datuma",
+                                       values=(broj, formatiraj_iznos(para)))
+            for mesec, naziv, para, broj in prihodi.izvestaj_po_paketu_i_mesecu():
+                tabele['mesec'].insert(f"mesec:{mesec}", tk.END, text=naziv,
+                                       values=(broj, formatiraj_iznos(para)))
+            
+            ukupno_para, ukupno_paketa = prihodi.ukupno()
+            tekst = f"Ukupno: {formatiraj_iznos(ukupno_para)} din za {ukupno_paketa} paketa"
+            if prihodi.neispravnih:
+                tekst += f" ({prihodi.neispravnih} bez ispravne cene)"
+            ukupno_label.config(text=tekst)
+        
+        refresh_btn = tk.Button(btn_frame, text="🔄 Osveži", command=popuni,
+                               font=('Segoe UI', 10, 'bold'), bg='#34495e', fg='white',
+                               padx=20, pady=8, border=0, cursor='hand2',
+                               activebackground=self.darker_color('#34495e'))
+        refresh_btn.pack(side=tk.LEFT, padx=5)
+        
+        close_btn = tk.Button(btn_frame, text="✕ Zatvori", command=prozor.destroy,
+                             font=('Segoe UI', 10, 'bold'), bg='#e74c3c', fg='white',
+                             padx=20, pady=8, border=0, cursor='hand2',
+                             activebackground='#cb4335')
+        close_btn.pack(side=tk.LEFT, padx=5)
+        
+        popuni()
     
     def detaljni_pregled(self):
         selected = self.tree.selection()
@@ -447,8 +654,8 @@ class GUIApp:
             messagebox.showerror("Greška", "Molim odaberi klijenta!")
             return
         
-        id_klijenta = self.tree.item(selected[0])['values'][0]
-        klijent = self.menadzer.klijenti[id_klijenta]
+        id_klijenta = selected[0]
+        klijent = self.menadzer.detalji(id_klijenta)
         
         detail_window = tk.Toplevel(self.root)
         detail_window.title(f"Detaljni Pregled - {klijent['ime']} {klijent['prezime']}")
@@ -511,24 +718,115 @@ class GUIApp:
         beleske_frame = tk.Frame(content, bg='white', relief=tk.RIDGE, bd=1)
         beleske_frame.pack(fill=tk.BOTH, expand=True)
         
-        beleske_label = tk.Label(beleske_frame, text="📝 Beleške", font=('Segoe UI', 11, 'bold'),
+        zaglavlje = self.menadzer.zaglavlje(id_klijenta)
+        naslov_beleski = f"📝 Beleške ({zaglavlje['broj_beleski']}"
+        if zaglavlje['arhivirano']:
+            naslov_beleski += f", arhivirano {zaglavlje['arhivirano']}"
+        beleske_label = tk.Label(beleske_frame, text=naslov_beleski + ")", font=('Segoe UI', 11, 'bold'),
                                 bg='#34495e', fg='white')
         beleske_label.pack(fill=tk.X, padx=10, pady=(10, 0))
         
+        beleske_skrol = ttk.Scrollbar(beleske_frame)
+        beleske_skrol.pack(side=tk.RIGHT, fill=tk.Y, pady=10)
         beleske_text = tk.Text(beleske_frame, height=8, bg='white', fg='#2c3e50',
                               font=('Segoe UI', 9), wrap=tk.WORD)
-        beleske_text.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
-        
-        if klijent['beleske']:
-            for i, beleszka in enumerate(klijent['beleske'], 1):
-                beleske_text.insert(tk.END, f"{i}. [{beleszka['datum']}]\n")
-                beleske_text.insert(tk.END, f"   {beleszka['tekst']}\n\n")
-        else:
+        beleske_text.pack(fill=tk.BOTH, expand=True, padx=(15, 0), pady=10)
+        beleske_skrol.config(command=beleske_text.yview)
+        
+        # Prvo najnovije beleske; starije (i arhivirane) se dodaju kad se doskroluje do kraja
+        beleske = self.menadzer.beleske_od_najnovije(id_klijenta)
+        ima_jos = [True]
+        
+        def ucitaj_jos():
+            stranica = list(islice(beleske, STRANICA_BELESKI))
+            ima_jos[0] = len(stranica) == STRANICA_BELESKI
+            tekst = "".join(f"{poz + 1}. [{beleszka['datum']}]\n   {beleszka['tekst']}\n\n"
+                            for poz, beleszka in stranica)
+            beleske_text.config(state=tk.NORMAL)
+            beleske_text.insert(tk.END, tekst)
+            beleske_text.config(state=tk.DISABLED)
+        
+        def na_skrol(prvi, poslednji):
+            beleske_skrol.set(prvi, poslednji)
+            if float(poslednji) >= 0.98 and ima_jos[0]:
+                ucitaj_jos()
+        
+        beleske_text.config(yscrollcommand=na_skrol)
+        ucitaj_jos()
+        if beleske_text.compare("end-1c", "==", "1.0"):
+            beleske_text.config(state=tk.NORMAL)
             beleske_text.insert(tk.END, "Nema beleški.")
+            beleske_text.config(state=tk.DISABLED)
+    
+    def arhiva_dijalog(self):
+        prozor = tk.Toplevel(self.root)
+        prozor.title("Arhiva Beleški")
+        prozor.geometry("900x550")
+        prozor.transient(self.root)
+        prozor.configure(bg='#ecf0f1')
         
-        beleske_text.config(state=tk.DISABLED)
+        # Zaglavlje
+        header = tk.Frame(prozor, bg='#7f8c8d', height=50)
+        header.pack(fill=tk.X)
+        tk.Label(header, text="🗄️ Pretraga Arhiviranih Beleški", font=('Segoe UI', 14, 'bold'),
+                bg='#7f8c8d', fg='white').pack(pady=10)
+        
+        sadrzaj = tk.Frame(prozor, bg='#ecf0f1')
+        sadrzaj.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        
+        upit_var = tk.StringVar()
+        red_pretrage = tk.Frame(sadrzaj, bg='#ecf0f1')
+        red_pretrage.pack(fill=tk.X, pady=(0, 10))
+        upit_entry = tk.Entry(red_pretrage, textvariable=upit_var, font=('Segoe UI', 10), width=40)
+        upit_entry.pack(side=tk.LEFT, ipady=6)
+        upit_entry.focus()
+        
+        tabela = ttk.Treeview(sadrzaj, columns=('ID', 'Klijent', 'Datum', 'Beleška'), show='headings', height=15)
+        tabela.column('ID', anchor=tk.CENTER, width=50)
+        tabela.column('Klijent', anchor=tk.W, width=180)
+        tabela.column('Datum', anchor=tk.W, width=140)
+        tabela.column('Beleška', anchor=tk.W, width=480)
+        for kolona in tabela['columns']:
+            tabela.heading(kolona, text=kolona)
+        tabela.pack(fill=tk.BOTH, expand=True)
+        
+        status = ttk.Label(sadrzaj, text="Unesi reči iz beleške.", style='TLabel')
+        status.pack(anchor=tk.W, pady=(10, 0))
+        
+        def trazi():
+            tabela.delete(*tabela.get_children())
+            rezultati = self.menadzer.pretrazi_arhivu(upit_var.get())
+            for id_klijenta, poz, beleszka in rezultati:
+                klijent = self.menadzer.zaglavlje(id_klijenta)
+                tabela.insert('', tk.END, values=(id_klijenta, f"{klijent['ime']} {klijent['prezime']}",
+                                                  beleszka['datum'], beleszka['tekst']))
+            status.config(text=f"Pronađeno {len(rezultati)} arhiviranih beleški")
+        
+        tk.Button(red_pretrage, text="🔍 Pretraži", command=trazi,
+                  font=('Segoe UI', 10, 'bold'), bg='#16a085', fg='white',
+                  padx=15, pady=6, border=0, cursor='hand2',
+                  activebackground=self.darker_color('#16a085')).pack(side=tk.LEFT, padx=5)
+        upit_entry.bind('<Return>', lambda event: trazi())
+
+def zabelezi_prvi_prikaz(app):
+    """Kad se prozor prvi put iscrta, upisuje vreme u MERENJE_FAJL i zatvara aplikaciju."""
+    def prikazan(event):
+        if event.widget is app.root:
+            app.root.unbind('<Map>')
+            app.root.after_idle(upisi)
+
+    def upisi():
+        app.root.update_idletasks()
+        with open(MERENJE_FAJL, 'w', encoding='utf-8') as f:
+            f.write(repr(time.time()))
+        app.zatvori()
+
+    app.root.bind('<Map>', prikazan)
+
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = GUIApp(root)
+    if MERENJE_FAJL:
+        zabelezi_prvi_prikaz(app)
     root.mainloop()
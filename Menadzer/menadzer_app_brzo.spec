@@ -0,0 +1,66 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Profil za brzo pokretanje: pyinstaller menadzer_app_brzo.spec
+#
+# Za razliku od menadzer_app.spec (jedan .exe koji pri svakom pokretanju
+# raspakuje PYZ-00.pyz i base_library.zip u privremeni direktorijum), ovde
+# je izlaz direktorijum dist/menadzer_app_brzo/ i program se pokrece
+# direktno iz njega. Vreme pokretanja meri merenje_pokretanja.py.
+
+# Moduli koje Analysis povuce iz standardne biblioteke (vidi
+# warn-menadzer_app.txt i xref-menadzer_app.html), a aplikacija ih nikad ne
+# uvozi: mreza, e-posta, arhive, logging, decimal...
+IZOSTAVLJENI = [
+    'asyncio', 'concurrent', 'multiprocessing',
+    'ssl', 'socket', 'selectors', 'http', 'urllib', 'email', 'ftplib', 'netrc',
+    'mimetypes', 'quopri', 'ipaddress',
+    'tarfile', 'zipfile', 'py_compile',
+    'pickle', '_compat_pickle',
+    'logging', 'tracemalloc', 'difflib', 'pprint', 'pydoc', 'pydoc_data',
+    'decimal', '_pydecimal', 'fractions', 'statistics', 'random',
+    'unittest', 'doctest', 'test', 'lib2to3', 'xml', 'xmlrpc',
+    'tkinter.tix', 'tkinter.test',
+]
+
+a = Analysis(
+    ['menadzer_app.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=IZOSTAVLJENI,
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='menadzer_app_brzo',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    # UPX bi DLL-ove raspakivao pri svakom pokretanju
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='menadzer_app_brzo',
+)
@@ -1,72 +1,8 @@
-import json
-import os
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from datetime import datetime
 
-PODACI_FAJL = "klijenti_podaci.json"
-
-class MenazerKlijenata:
-    def __init__(self):
-        self.klijenti = self.ucitaj_podatke()
-    
-    def ucitaj_podatke(self):
-        if os.path.exists(PODACI_FAJL):
-            with open(PODACI_FAJL, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {}
-    
-    def sacuvaj_podatke(self):
-        with open(PODACI_FAJL, 'w', encoding='utf-8') as f:
-            json.dump(self.klijenti, f, ensure_ascii=False, indent=2)
-    
-    def dodaj_klijenta(self, ime, prezime, email, telefon):
-        id_klijenta = str(len(self.klijenti) + 1)
-        self.klijenti[id_klijenta] = {
-            "ime": ime,
-            "prezime": prezime,
-            "email": email,
-            "telefon": telefon,
-            "paketi": [],
-            "beleske": []
-        }
-        self.sacuvaj_podatke()
-        return id_klijenta
-    
-    def dodeli_paket(self, id_klijenta, naziv_paketa, cena, datum_pocetka):
-        if id_klijenta not in self.klijenti:
-            return False
-        
-        paket = {
-            "naziv": naziv_paketa,
-            "cena": cena,
-            "datum_pocetka": datum_pocetka,
-            "datum_dodele": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        self.klijenti[id_klijenta]["paketi"].append(paket)
-        self.sacuvaj_podatke()
-        return True
-    
-    def dodaj_beleszku(self, id_klijenta, tekst_beleske):
-        if id_klijenta not in self.klijenti:
-            return False
-        
-        beleszka = {
-            "tekst": tekst_beleske,
-            "datum": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        self.klijenti[id_klijenta]["beleske"].append(beleszka)
-        self.sacuvaj_podatke()
-        return True
-    
-    def obrisi_klijenta(self, id_klijenta):
-        if id_klijenta in self.klijenti:
-            del self.klijenti[id_klijenta]
-            self.sacuvaj_podatke()
-            return True
-        return False
+from jezgro import MenazerKlijenata
+from jezgro.analitika import parsiraj_cenu
 
 class GUIApp:
     def __init__(self, root):
@@ -75,7 +11,12 @@ class GUIApp:
         self.root.geometry("900x600")
         self.root.configure(bg='#f0f0f0')
         
-        self.menadzer = MenazerKlijenata()
+        try:
+            self.menadzer = MenazerKlijenata()
+        except Exception as e:
+            messagebox.showerror("Greška", f"Podaci klijenata ne mogu da se učitaju:\n{e}")
+            raise
+        self.root.protocol("WM_DELETE_WINDOW", self.zatvori)
         
         # Stil
         style = ttk.Style()
@@ -147,17 +88,23 @@ class GUIApp:
         # Učitaj klijente
         self.ucitaj_klijente()
     
+    def zatvori(self):
+        self.menadzer.zatvori()
+        self.root.destroy()
+    
     def ucitaj_klijente(self):
         # Očisti tabelu
         for item in self.tree.get_children():
             self.tree.delete(item)
         
         # Učitaj klijente
-        for id_klijenta, klijent in self.menadzer.klijenti.items():
-            self.tree.insert('', tk.END, text='',
+        for id_klijenta in self.menadzer.klijenti:
+            klijent = self.menadzer.zaglavlje(id_klijenta)
+            # ID je iid reda: 'values' bi ga vratio kao broj, a kljucevi su stringovi
+            self.tree.insert('', tk.END, iid=id_klijenta, text='',
                            values=(id_klijenta, klijent['ime'], klijent['prezime'],
                                  klijent['email'], klijent['telefon'],
-                                 len(klijent['paketi']), len(klijent['beleske'])))
+                                 klijent['broj_paketa'], klijent['broj_beleski']))
     
     def dodaj_klijenta_dijalog(self):
         dialog = tk.Toplevel(self.root)
@@ -192,7 +139,9 @@ class GUIApp:
                 messagebox.showerror("Greška", "Molim unesi sve obavezne podatke!")
                 return
             
-            self.menadzer.dodaj_klijenta(ime, prezime, email, telefon)
+            if self.menadzer.dodaj_klijenta(ime, prezime, email, telefon) is None:
+                messagebox.showerror("Greška", "Greška pri dodavanju klijenta!")
+                return
             messagebox.showinfo("Uspeh", f"Klijent {ime} {prezime} je dodat!")
             self.ucitaj_klijente()
             dialog.destroy()
@@ -205,7 +154,7 @@ class GUIApp:
             messagebox.showerror("Greška", "Molim odaberi klijenta!")
             return
         
-        id_klijenta = self.tree.item(selected[0])['values'][0]
+        id_klijenta = selected[0]
         
         dialog = tk.Toplevel(self.root)
         dialog.title("Dodeli Paket")
@@ -233,6 +182,11 @@ class GUIApp:
             if not naziv or not cena:
                 messagebox.showerror("Greška", "Molim unesi sve obavezne podatke!")
                 return
+            try:
+                parsiraj_cenu(cena)
+            except ValueError:
+                messagebox.showerror("Greška", "Cena mora biti broj (npr. 1500 ili 1.500,50)!")
+                return
             
             if self.menadzer.dodeli_paket(id_klijenta, naziv, cena, datum):
                 messagebox.showinfo("Uspeh", f"Paket '{naziv}' je dodeljen!")
@@ -249,7 +203,7 @@ class GUIApp:
             messagebox.showerror("Greška", "Molim odaberi klijenta!")
             return
         
-        id_klijenta = self.tree.item(selected[0])['values'][0]
+        id_klijenta = selected[0]
         
         dialog = tk.Toplevel(self.root)
         dialog.title("Dodaj Belešku")
@@ -283,7 +237,7 @@ class GUIApp:
             messagebox.showerror("Greška", "Molim odaberi klijenta!")
             return
         
-        id_klijenta = self.tree.item(selected[0])['values'][0]
+        id_klijenta = selected[0]
         ime = self.tree.item(selected[0])['values'][1]
         prezime = self.tree.item(selected[0])['values'][2]
         
@@ -300,8 +254,8 @@ class GUIApp:
             messagebox.showerror("Greška", "Molim odaberi klijenta!")
             return
         
-        id_klijenta = self.tree.item(selected[0])['values'][0]
-        klijent = self.menadzer.klijenti[id_klijenta]
+        id_klijenta = selected[0]
+        klijent = self.menadzer.detalji(id_klijenta)
         
         detail_window = tk.Toplevel(self.root)
         detail_window.title(f"Detaljni Pregled - {klijent['ime']} {klijent['prezime']}")
@@ -0,0 +1,108 @@
+"""Merenje vremena od pokretanja menadzer_app do prvog prikaza prozora.
+
+Svaki program se pokrece vise puta sa promenljivom MENADZER_MERENJE; aplikacija
+upisuje vreme kad se prozor prvi put iscrta i odmah se zatvara. Programi su
+menadzer_app.py (pokrece se ovim Python-om) ili izvrsni fajlovi napravljeni iz
+menadzer_app.spec (jedan fajl) i menadzer_app_brzo.spec (direktorijum).
+
+Prvo pokretanje posle izgradnje je obicno sporije (disk kes, antivirus), pa
+se pored najboljeg i medijane ispisuje i prvo vreme.
+
+Primeri:
+    python merenje_pokretanja.py
+    python merenje_pokretanja.py dist/menadzer_app.exe dist/menadzer_app_brzo/menadzer_app_brzo.exe
+    python merenje_pokretanja.py menadzer_app.py --klijenata 10000 --ponavljanja 10
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from jezgro import PODACI_FAJL, napravi_skladiste
+
+OVDE = os.path.dirname(os.path.abspath(__file__))
+
+
+def komanda(program):
+    if program.endswith(".py"):
+        return [sys.executable, os.path.abspath(program)]
+    return [os.path.abspath(program)]
+
+
+def izmeri_pokretanje(program, direktorijum, ogranicenje=60):
+    """Sekunde od pokretanja procesa do prvog prikaza prozora."""
+    fd, merenje = tempfile.mkstemp(prefix="menadzer_merenje_", suffix=".txt")
+    os.close(fd)
+    os.remove(merenje)
+    okruzenje = dict(os.environ, MENADZER_MERENJE=merenje)
+    try:
+        pocetak = time.time()
+        proces = subprocess.run(komanda(program), cwd=direktorijum, env=okruzenje,
+                                timeout=ogranicenje, capture_output=True, text=True)
+        try:
+            with open(merenje, 'r', encoding='utf-8') as f:
+                prikazan = float(f.read())
+        except FileNotFoundError:
+            raise RuntimeError(f"{program} se završio bez prikaza prozora "
+                               f"(kod {proces.returncode}):\n{proces.stderr}") from None
+        return prikazan - pocetak
+    finally:
+        if os.path.exists(merenje):
+            os.remove(merenje)
+
+
+def pripremi_podatke(broj, direktorijum):
+    """Sinteticka baza iz benchmark.py, u skladistu koje ce aplikacija otvoriti."""
+    from benchmark import napravi_klijente
+
+    klijenti = napravi_klijente(broj)
+    skladiste = napravi_skladiste(os.path.join(direktorijum, PODACI_FAJL))
+    skladiste.ucitaj()
+    skladiste.rezervisi_id(len(klijenti))
+    skladiste.sacuvaj(klijenti)
+    skladiste.zatvori()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vreme do prvog prozora menadžera klijenata")
+    parser.add_argument("programi", nargs="*", default=[os.path.join(OVDE, "menadzer_app.py")],
+                        help="menadzer_app.py ili izvrsni fajlovi iz PyInstaller-a")
+    parser.add_argument("--ponavljanja", type=int, default=5)
+    parser.add_argument("--klijenata", type=int,
+                        help="pokretanje nad sintetickom bazom ove velicine umesto nad "
+                             "podacima iz trenutnog direktorijuma")
+    parser.add_argument("--izlaz", help="JSON fajl sa rezultatima")
+    args = parser.parse_args()
+
+    if args.klijenata is not None:
+        direktorijum = tempfile.mkdtemp(prefix="menadzer_pokretanje_")
+        pripremi_podatke(args.klijenata, direktorijum)
+    else:
+        direktorijum = os.getcwd()
+
+    rezultati = []
+    try:
+        print(f"{'program':<45} {'prvo':>8} {'najbolje':>9} {'medijana':>9}")
+        for program in args.programi:
+            vremena = [izmeri_pokretanje(program, direktorijum) for _ in range(args.ponavljanja)]
+            rezultati.append({
+                "program": program,
+                "klijenata": args.klijenata,
+                "vremena_s": vremena,
+                "najbolje_s": min(vremena),
+                "medijana_s": statistics.median(vremena),
+            })
+            print(f"{os.path.basename(program):<45} {vremena[0]:>7.3f}s {min(vremena):>8.3f}s "
+                  f"{statistics.median(vremena):>8.3f}s")
+    finally:
+        if args.klijenata is not None:
+            shutil.rmtree(direktorijum, ignore_errors=True)
+
+    if args.izlaz:
+        with open(args.izlaz, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(rezultati, ensure_ascii=False, indent=2) + "\n")
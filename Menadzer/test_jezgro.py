@@ -0,0 +1,613 @@
+import json
+import os
+
+import pytest
+
+from jezgro import MenazerKlijenata, OstecenFajl, napravi_skladiste, numericki_id
+from jezgro import arhiva
+from jezgro.analitika import BEZ_DATUMA, IndeksPrihoda, parsiraj_cenu
+from jezgro.modeli import Klijent, Paket, klijenti_iz_recnika, u_json
+from jezgro.pretraga import IndeksKlijenata
+from jezgro.skladiste import DnevnikSkladiste, SqliteSkladiste
+from jezgro.uvoz import citaj_csv
+
+
+def otvori(direktorijum, vrsta):
+    return MenazerKlijenata(napravi_skladiste(os.path.join(direktorijum, "klijenti.json"), vrsta))
+
+
+def sadrzaj(menadzer):
+    return {id_klijenta: menadzer.detalji(id_klijenta).u_recnik() for id_klijenta in menadzer.klijenti}
+
+
+def dodaj(menadzer, ime):
+    id_klijenta = menadzer.dodaj_klijenta(ime, "Test", f"{ime.lower()}@primer.rs", "")
+    assert id_klijenta is not None
+    return id_klijenta
+
+
+@pytest.mark.parametrize("vrsta", ["json", "dnevnik", "sqlite"])
+def test_id_obrisanog_klijenta_se_ne_dodeljuje_ponovo(tmp_path, vrsta):
+    menadzer = otvori(tmp_path, vrsta)
+    prvi = dodaj(menadzer, "Ana")
+    drugi = dodaj(menadzer, "Bojan")
+    assert menadzer.obrisi_klijenta(drugi)
+    treci = dodaj(menadzer, "Cvijeta")
+    assert numericki_id(treci) > numericki_id(drugi) > numericki_id(prvi)
+
+    # I posle ponovnog ucitavanja, kad najveci ID vise nije ni u podacima
+    assert menadzer.obrisi_klijenta(treci)
+    menadzer.zatvori()
+    menadzer = otvori(tmp_path, vrsta)
+    assert list(menadzer.klijenti) == [prvi]
+    assert numericki_id(dodaj(menadzer, "Dejan")) > numericki_id(treci)
+    menadzer.zatvori()
+
+
+
+def test_dnevnik_dopisuje_izmene_i_ponavlja_ih_pri_ucitavanju(tmp_path):
+    menadzer = otvori(tmp_path, "dnevnik")
+    ana = dodaj(menadzer, "Ana")
+    bojan = dodaj(menadzer, "Bojan")
+    assert menadzer.dodeli_paket(ana, "Osnovni", "1.500", "2024-01-15")
+    assert menadzer.dodaj_beleszku(ana, "prvi poziv")
+    assert menadzer.obrisi_klijenta(bojan)
+    ocekivano = sadrzaj(menadzer)
+    menadzer.zatvori()
+
+    # Bez sazimanja glavni fajl se ne pise, sve je u dnevniku
+    assert not os.path.exists(menadzer.skladiste.putanja)
+    with open(menadzer.skladiste.dnevnik, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1 + 5
+
+    menadzer = otvori(tmp_path, "dnevnik")
+    assert sadrzaj(menadzer) == ocekivano
+    assert menadzer.detalji(ana)["paketi"][0]["cena"] == "1500"
+    menadzer.zatvori()
+
+
+def test_dnevnik_se_sazima_u_snimak(tmp_path):
+    putanja = os.path.join(tmp_path, "klijenti.json")
+    menadzer = MenazerKlijenata(DnevnikSkladiste(putanja, prag_sazimanja=5))
+    for i in range(12):
+        id_klijenta = dodaj(menadzer, f"Klijent{i}")
+        assert menadzer.dodaj_beleszku(id_klijenta, f"beleska {i}")
+    ocekivano = sadrzaj(menadzer)
+    menadzer.zatvori()
+
+    assert os.path.exists(putanja)
+    assert os.path.exists(putanja + ".log.1")
+    assert not os.path.exists(putanja + ".log.stari")
+    menadzer = MenazerKlijenata(DnevnikSkladiste(putanja, prag_sazimanja=5))
+    assert sadrzaj(menadzer) == ocekivano
+    menadzer.zatvori()
+
+    # Ostecen snimak: prethodna generacija sa svojim dnevnikom daje isto stanje
+    with open(putanja, "r+b") as f:
+        f.seek(-5, os.SEEK_END)
+        f.write(b"xxxxx")
+    menadzer = MenazerKlijenata(DnevnikSkladiste(putanja))
+    assert sadrzaj(menadzer) == ocekivano
+    menadzer.zatvori()
+
+
+def test_dnevnik_sa_prekinutim_poslednjim_redom(tmp_path):
+    menadzer = otvori(tmp_path, "dnevnik")
+    ids = [dodaj(menadzer, ime) for ime in ("Ana", "Bojan", "Cvijeta")]
+    menadzer.zatvori()
+
+    # Pad usred upisa poslednjeg zapisa
+    dnevnik = menadzer.skladiste.dnevnik
+    os.truncate(dnevnik, os.path.getsize(dnevnik) - 10)
+
+    menadzer = otvori(tmp_path, "dnevnik")
+    assert list(menadzer.klijenti) == ids[:2]
+    novi = dodaj(menadzer, "Dejan")
+    assert novi not in ids[:2]
+    menadzer.zatvori()
+
+    # Novi zapis je iza odsecenog dela, pa se vidi pri sledecem ucitavanju
+    menadzer = otvori(tmp_path, "dnevnik")
+    assert list(menadzer.klijenti) == ids[:2] + [novi]
+    menadzer.zatvori()
+
+
+def test_sqlite_uvozi_postojeci_json_i_pretrazuje_preko_baze(tmp_path):
+    menadzer = otvori(tmp_path, "dnevnik")
+    ana = dodaj(menadzer, "Ana")
+    obrisan = dodaj(menadzer, "Bojan")
+    assert menadzer.dodeli_paket(ana, "Osnovni", "1500", "2024-01-15")
+    assert menadzer.dodaj_beleszku(ana, "Dogovoren sastanak u utorak")
+    assert menadzer.obrisi_klijenta(obrisan)
+    ocekivano = sadrzaj(menadzer)
+    menadzer.zatvori()
+
+    # Prvo otvaranje SQLite skladista prenosi podatke iz JSON-a i dnevnika
+    menadzer = otvori(tmp_path, "sqlite")
+    assert os.path.exists(os.path.join(tmp_path, "klijenti.db"))
+    assert sadrzaj(menadzer) == ocekivano
+    assert menadzer.zaglavlje(ana)["broj_paketa"] == 1
+    assert menadzer.pretrazi(email="ANA@primer.rs") == [ana]
+    assert menadzer.pretrazi(prezime="te") == [ana]
+    assert menadzer.pretrazi(beleska="sastanak utorak") == [ana]
+    assert menadzer.pretrazi(beleska="sreda") == []
+    # Sekvenca je preneta, pa ni ID obrisanog klijenta nije slobodan
+    assert numericki_id(dodaj(menadzer, "Cvijeta")) > numericki_id(obrisan)
+    menadzer.zatvori()
+
+
+def test_dnevnik_vraca_sekvencu_bez_seq_fajla(tmp_path):
+    menadzer = otvori(tmp_path, "dnevnik")
+    prvi = dodaj(menadzer, "Ana")
+    drugi = dodaj(menadzer, "Bojan")
+    assert menadzer.obrisi_klijenta(drugi)
+    menadzer.zatvori()
+
+    # Sekvenca se upisuje bez fsync-a, pa posle pada sistema moze da nestane
+    os.remove(menadzer.skladiste.sekvenca)
+    menadzer = otvori(tmp_path, "dnevnik")
+    assert list(menadzer.klijenti) == [prvi]
+    assert numericki_id(dodaj(menadzer, "Cvijeta")) > numericki_id(drugi)
+    menadzer.zatvori()
+
+
+@pytest.mark.parametrize("vrsta", ["json", "dnevnik", "sqlite"])
+def test_dva_procesa_ne_dobijaju_iste_id_jeve(tmp_path, vrsta):
+    prvo = napravi_skladiste(os.path.join(tmp_path, "klijenti.json"), vrsta)
+    drugo = napravi_skladiste(os.path.join(tmp_path, "klijenti.json"), vrsta)
+    prvo.ucitaj()
+    drugo.ucitaj()
+    blokovi = [(prvo.rezervisi_id(10), 10), (drugo.rezervisi_id(5), 5),
+               (prvo.rezervisi_id(1), 1), (drugo.rezervisi_id(3), 3)]
+    ids = [prvi + i for prvi, broj in blokovi for i in range(broj)]
+    assert sorted(ids) == list(range(1, 20))
+    prvo.zatvori()
+    drugo.zatvori()
+
+
+@pytest.mark.parametrize("vrsta", ["json", "dnevnik", "sqlite"])
+def test_grupni_uvoz_odbija_neispravne_redove(tmp_path, vrsta):
+    menadzer = otvori(tmp_path, vrsta)
+    postojeci = dodaj(menadzer, "Ana")
+    redovi = [
+        {"ime": "Bojan", "prezime": "Uvoz", "email": "bojan@primer.rs",
+         "paketi": [{"naziv": "Osnovni", "cena": "1.500,00", "datum_pocetka": "2024-02-01"}],
+         "beleske": ["prva", {"tekst": "druga", "datum": "2024-02-02 10:00:00"}]},
+        {"ime": "Bez", "prezime": "Emaila"},
+        {"ime": "Losa", "prezime": "Cena", "email": "c@primer.rs", "paketi": [{"naziv": "X", "cena": "abc"}]},
+        {"ime": "Losa", "prezime": "Beleska", "email": "d@primer.rs", "beleske": [{"text": "x"}]},
+        {"ime": "Beleske", "prezime": "Tekst", "email": "e@primer.rs", "beleske": "nije lista"},
+        None,
+        {"ime": "Cvijeta", "prezime": "Uvoz", "email": "cvijeta@primer.rs", "telefon": "064 123"},
+    ]
+    rezultat = menadzer.bulk_import(redovi, velicina_grupe=2)
+    assert rezultat["uvezeno"] == 2
+    assert [broj_reda for broj_reda, _ in rezultat["odbijeno"]] == [2, 3, 4, 5, 6]
+
+    bojan, cvijeta = menadzer.pretrazi(prezime="uvoz")
+    assert numericki_id(postojeci) < numericki_id(bojan) < numericki_id(cvijeta)
+    assert menadzer.detalji(bojan)["paketi"][0]["cena"] == "1500"
+    assert [b["tekst"] for b in menadzer.detalji(bojan)["beleske"]] == ["prva", "druga"]
+    assert menadzer.pretrazi(telefon="064 123") == [cvijeta]
+    assert menadzer.prihodi.ukupno() == (150000, 1)
+    ocekivano = sadrzaj(menadzer)
+    menadzer.zatvori()
+
+    menadzer = otvori(tmp_path, vrsta)
+    assert sadrzaj(menadzer) == ocekivano
+    menadzer.zatvori()
+
+
+def test_citaj_csv(tmp_path):
+    putanja = os.path.join(tmp_path, "klijenti.csv")
+    with open(putanja, "w", encoding="utf-8-sig") as f:
+        f.write("ime,prezime,email,telefon,paket_naziv,paket_cena,beleska\n"
+                "Ana,Test,ana@primer.rs,,Osnovni,1500,Prvi poziv\n"
+                "Bojan,Test,bojan@primer.rs,064,,,\n")
+    ana, bojan = citaj_csv(putanja)
+    assert ana["paketi"] == [{"naziv": "Osnovni", "cena": "1500", "datum_pocetka": ""}]
+    assert ana["beleske"] == ["Prvi poziv"]
+    assert bojan["telefon"] == "064" and bojan["paketi"] == [] and bojan["beleske"] == []
+
+
+def test_indeksi_prate_izmene(tmp_path):
+    menadzer = otvori(tmp_path, "dnevnik")
+    ana = menadzer.dodaj_klijenta("Ana", "Petrović", "Ana@Primer.rs", "064/111-222")
+    marko = menadzer.dodaj_klijenta("Marko", "Petrov", "marko@primer.rs", "")
+    jovan = menadzer.dodaj_klijenta("Jovan", "Jovanović", "jovan@primer.rs", "065 333")
+    assert menadzer.dodaj_beleszku(ana, "Zeli godisnji paket")
+    assert menadzer.dodaj_beleszku(jovan, "Zeli mesecni paket")
+
+    assert menadzer.pretrazi(email=" ana@primer.rs ") == [ana]
+    assert menadzer.pretrazi(telefon="064111222") == [ana]
+    assert menadzer.pretrazi(prezime="petrov") == [ana, marko]
+    assert menadzer.pretrazi(beleska="zeli paket") == [ana, jovan]
+    assert menadzer.pretrazi(beleska="zeli godisnji") == [ana]
+    # Slobodan upit je unija po svim indeksima, imenovani kriterijumi presek
+    assert menadzer.pretrazi("jovanović") == [jovan]
+    assert menadzer.pretrazi("paket") == [ana, jovan]
+    assert menadzer.pretrazi(prezime="petrov", beleska="paket") == [ana]
+
+    assert menadzer.obrisi_klijenta(ana)
+    assert menadzer.pretrazi(prezime="petrov") == [marko]
+    assert menadzer.pretrazi(beleska="paket") == [jovan]
+    assert menadzer.pretrazi(email="ana@primer.rs") == []
+
+    # Inkrementalno azuriran indeks je isti kao indeks izgradjen iz pocetka
+    novi = IndeksKlijenata().izgradi(menadzer.klijenti)
+    assert vars(menadzer.indeks) == vars(novi)
+    menadzer.zatvori()
+
+
+class NepouzdanoSkladiste(DnevnikSkladiste):
+    """Dnevnik ciji upis ne uspeva dok je `kvar` postavljen."""
+
+    kvar = False
+    upisa = 0
+
+    def upisi(self, klijenti, zapisi):
+        if self.kvar:
+            raise OSError("disk je pun")
+        self.upisa += 1
+        super().upisi(klijenti, zapisi)
+
+
+class NepouzdanaBaza(SqliteSkladiste):
+    kvar = False
+
+    def primeni(self, klijenti, zapisi):
+        if self.kvar:
+            raise OSError("baza je zakljucana")
+        super().primeni(klijenti, zapisi)
+
+
+def test_pozadinski_upis_spaja_izmene_i_upisuje_ih_pri_zatvaranju(tmp_path):
+    skladiste = NepouzdanoSkladiste(os.path.join(tmp_path, "klijenti.json"))
+    menadzer = MenazerKlijenata(skladiste, u_pozadini=True)
+    menadzer.pisac.odlaganje = 0.2
+    ids = [dodaj(menadzer, f"Klijent{i}") for i in range(20)]
+    # Izmene su odmah u memoriji, a na disk idu zajedno
+    assert list(menadzer.klijenti) == ids
+    menadzer.zatvori()
+    assert skladiste.upisa < 5
+
+    menadzer = otvori(tmp_path, "dnevnik")
+    assert list(menadzer.klijenti) == ids
+    menadzer.zatvori()
+
+
+def test_neuspeo_pozadinski_upis_se_ponavlja(tmp_path):
+    skladiste = NepouzdanoSkladiste(os.path.join(tmp_path, "klijenti.json"))
+    menadzer = MenazerKlijenata(skladiste, u_pozadini=True)
+    greske = []
+    skladiste.kvar = True
+    ana = menadzer.dodaj_klijenta("Ana", "Test", "ana@primer.rs", "", gotovo=greske.append)
+    assert menadzer.upisi_sve() is not None
+    menadzer.obradi_zavrsene()
+    assert isinstance(greske[0], OSError)
+    # Izmena ostaje u memoriji i u indeksima i ceka sledeci upis
+    assert menadzer.pretrazi(email="ana@primer.rs") == [ana]
+    assert menadzer.pisac.neupisani
+
+    skladiste.kvar = False
+    bojan = menadzer.dodaj_klijenta("Bojan", "Test", "bojan@primer.rs", "", gotovo=greske.append)
+    assert menadzer.upisi_sve() is None
+    menadzer.obradi_zavrsene()
+    assert greske[1:] == [None]
+    skladiste.kvar = True
+    cvijeta = dodaj(menadzer, "Cvijeta")
+    skladiste.kvar = False
+    menadzer.zatvori()
+
+    menadzer = otvori(tmp_path, "dnevnik")
+    assert list(menadzer.klijenti) == [ana, bojan, cvijeta]
+    menadzer.zatvori()
+
+
+def test_zatvaranje_prijavljuje_izmene_koje_nisu_upisane(tmp_path):
+    skladiste = NepouzdanoSkladiste(os.path.join(tmp_path, "klijenti.json"))
+    menadzer = MenazerKlijenata(skladiste, u_pozadini=True)
+    skladiste.kvar = True
+    dodaj(menadzer, "Ana")
+    with pytest.raises(OSError):
+        menadzer.zatvori()
+
+
+@pytest.mark.parametrize("napravi", [NepouzdanoSkladiste, NepouzdanaBaza])
+def test_neuspeo_upis_bez_pisca_vraca_podatke_i_indekse_sa_diska(tmp_path, napravi):
+    menadzer = MenazerKlijenata(napravi(os.path.join(tmp_path, "klijenti.json")))
+    ana = dodaj(menadzer, "Ana")
+    assert menadzer.dodeli_paket(ana, "Osnovni", "1500", "2024-01-01")
+    menadzer.skladiste.kvar = True
+    assert menadzer.dodaj_klijenta("Bojan", "Test", "bojan@primer.rs", "") is None
+    assert not menadzer.dodeli_paket(ana, "Dodatni", "700", "2024-01-01")
+    assert not menadzer.dodaj_beleszku(ana, "sastanak")
+
+    assert list(menadzer.klijenti) == [ana]
+    assert menadzer.zaglavlje(ana)["broj_paketa"] == 1
+    assert menadzer.pretrazi(prezime="test") == [ana]
+    assert menadzer.pretrazi(beleska="sastanak") == []
+    assert menadzer.prihodi.ukupno() == (150000, 1)
+    menadzer.zatvori()
+
+
+def test_json_skladiste_pada_na_prethodnu_generaciju(tmp_path):
+    menadzer = otvori(tmp_path, "json")
+    ana = dodaj(menadzer, "Ana")
+    bojan = dodaj(menadzer, "Bojan")
+    menadzer.zatvori()
+    putanja = menadzer.skladiste.putanja
+    assert not os.path.exists(putanja + ".tmp")
+
+    # Kontrolni zbir otkriva i izmenu koja ostavlja ispravan JSON
+    with open(putanja, "rb") as f:
+        podaci = f.read()
+    with open(putanja, "wb") as f:
+        f.write(podaci.replace(b"Bojan", b"Bojna"))
+    menadzer = otvori(tmp_path, "json")
+    assert list(menadzer.klijenti) == [ana]
+    # Prvi upis posle oporavka ne sme da pregazi dobru generaciju
+    cvijeta = dodaj(menadzer, "Cvijeta")
+    assert numericki_id(cvijeta) > numericki_id(bojan)
+    menadzer.zatvori()
+    menadzer = otvori(tmp_path, "json")
+    assert list(menadzer.klijenti) == [ana, cvijeta]
+    menadzer.zatvori()
+
+    for generacija in (putanja, putanja + ".1"):
+        with open(generacija, "wb") as f:
+            f.write(b"{nedovrsen")
+    with pytest.raises(OstecenFajl):
+        otvori(tmp_path, "json")
+
+
+def test_stari_json_bez_zaglavlja_se_cita(tmp_path):
+    with open(os.path.join(tmp_path, "klijenti.json"), "w", encoding="utf-8") as f:
+        json.dump({"7": {"ime": "Ana", "prezime": "Test", "email": "ana@primer.rs", "telefon": "",
+                         "paketi": [], "beleske": [{"tekst": "stara", "datum": "2020-01-01 08:00:00"}]}},
+                  f, ensure_ascii=False, indent=2)
+    for vrsta in ("json", "dnevnik"):
+        menadzer = otvori(tmp_path, vrsta)
+        assert menadzer.detalji("7")["beleske"][0]["tekst"] == "stara"
+        assert dodaj(menadzer, f"Novi{vrsta}") in ("8", "9")
+        menadzer.zatvori()
+
+
+def test_dnevnik_grupise_fsync(tmp_path, monkeypatch):
+    skladiste = DnevnikSkladiste(os.path.join(tmp_path, "klijenti.json"),
+                                 fsync_ms=60_000, fsync_zapisa=10)
+    menadzer = MenazerKlijenata(skladiste)
+    fsync = os.fsync
+    pozivi = []
+    monkeypatch.setattr(os, "fsync", lambda fd: (pozivi.append(fd), fsync(fd)))
+    for i in range(25):
+        dodaj(menadzer, f"Klijent{i}")
+    assert len(pozivi) == 2
+    menadzer.zatvori()
+    assert len(pozivi) == 3
+
+
+def test_formati_snimka_se_citaju_bez_obzira_na_podesavanje(tmp_path):
+    velicine = {}
+    for format_snimka in ("json", "min", "gzip"):
+        putanja = os.path.join(tmp_path, f"klijenti_{format_snimka}.json")
+        menadzer = MenazerKlijenata(napravi_skladiste(putanja, "json", format_snimka))
+        for i in range(20):
+            id_klijenta = dodaj(menadzer, f"Klijent{i}")
+            assert menadzer.dodaj_beleszku(id_klijenta, "ista beleska za sve klijente")
+        ocekivano = sadrzaj(menadzer)
+        menadzer.zatvori()
+        velicine[format_snimka] = os.path.getsize(putanja)
+        with open(putanja, "rb") as f:
+            assert f.readline().split()[-1] == b"format=" + format_snimka.encode()
+
+        # Skladiste podeseno na drugi format cita i ovaj snimak
+        menadzer = MenazerKlijenata(napravi_skladiste(putanja, "json", "json"))
+        assert sadrzaj(menadzer) == ocekivano
+        menadzer.zatvori()
+    assert velicine["gzip"] < velicine["min"] < velicine["json"]
+
+
+def test_sqlite_ucitava_pakete_i_beleske_tek_na_zahtev(tmp_path):
+    putanja = os.path.join(tmp_path, "klijenti.db")
+    menadzer = MenazerKlijenata(SqliteSkladiste(putanja))
+    ids = [dodaj(menadzer, f"Klijent{i}") for i in range(3)]
+    for i, id_klijenta in enumerate(ids):
+        for j in range(i + 1):
+            assert menadzer.dodeli_paket(id_klijenta, f"Paket{j}", "100", "2024-01-01")
+    menadzer.zatvori()
+
+    skladiste = SqliteSkladiste(putanja, velicina_kesa=2)
+    menadzer = MenazerKlijenata(skladiste)
+    assert [menadzer.zaglavlje(id_klijenta)["broj_paketa"] for id_klijenta in ids] == [1, 2, 3]
+    assert not skladiste._detalji
+    for id_klijenta in ids:
+        menadzer.detalji(id_klijenta)
+    assert list(skladiste._detalji) == ids[1:]
+
+    # Izmena klijenta izbacuje ga iz kesa, pa detalji prate bazu
+    assert menadzer.dodeli_paket(ids[2], "Novi", "100", "2024-02-01")
+    assert [p["naziv"] for p in menadzer.detalji(ids[2])["paketi"]][-1] == "Novi"
+    assert menadzer.zaglavlje(ids[2])["broj_paketa"] == 4
+    menadzer.zatvori()
+
+
+@pytest.mark.parametrize("vrsta", ["json", "dnevnik", "sqlite"])
+def test_dva_procesa_ne_gaze_izmene_jedan_drugom(tmp_path, vrsta):
+    prvi = otvori(tmp_path, vrsta)
+    ana = dodaj(prvi, "Ana")
+    drugi = otvori(tmp_path, vrsta)
+
+    # Drugi ne zna za izmene prvog dok ne osvezi, ali ih njegov upis ne brise
+    bojan = dodaj(prvi, "Bojan")
+    assert drugi.dodeli_paket(ana, "Od drugog", "100", "2024-01-01")
+    assert prvi.dodeli_paket(ana, "Od prvog", "200", "2024-01-01")
+    cvijeta = dodaj(drugi, "Cvijeta")
+
+    assert cvijeta in prvi.osvezi()
+    drugi.osvezi()
+    for menadzer in (prvi, drugi):
+        assert sorted(menadzer.klijenti, key=numericki_id) == [ana, bojan, cvijeta]
+        assert sorted(p["naziv"] for p in menadzer.detalji(ana)["paketi"]) == ["Od drugog", "Od prvog"]
+        assert menadzer.prihodi.ukupno() == (30000, 2)
+    assert sadrzaj(prvi) == sadrzaj(drugi)
+    ocekivano = sadrzaj(prvi)
+    prvi.zatvori()
+    drugi.zatvori()
+
+    menadzer = otvori(tmp_path, vrsta)
+    assert sadrzaj(menadzer) == ocekivano
+    menadzer.zatvori()
+
+
+def test_izmena_posle_tudjeg_sazimanja_dnevnika(tmp_path):
+    putanja = os.path.join(tmp_path, "klijenti.json")
+    prvi = MenazerKlijenata(DnevnikSkladiste(putanja))
+    ana = dodaj(prvi, "Ana")
+    drugi = MenazerKlijenata(DnevnikSkladiste(putanja, prag_sazimanja=3))
+    # Drugi sazima dnevnik dok prvi jos drzi stari
+    ostali = [dodaj(drugi, f"Klijent{i}") for i in range(6)]
+    drugi.skladiste.zatvori()
+    assert prvi.dodaj_beleszku(ana, "posle sazimanja")
+    assert set(prvi.osvezi()) == set(ostali)
+    prvi.zatvori()
+    drugi.zatvori()
+
+    menadzer = otvori(tmp_path, "dnevnik")
+    assert list(menadzer.klijenti) == [ana] + ostali
+    assert menadzer.detalji(ana)["beleske"][0]["tekst"] == "posle sazimanja"
+    menadzer.zatvori()
+
+
+@pytest.mark.parametrize("tekst, para", [
+    ("1500", 150000), ("1.500", 150000), ("1.500.000", 150000000), ("1,500,000", 150000000),
+    ("1500,50", 150050), ("1500.5", 150050), ("1.500,00 din", 150000), ("1,500.25", 150025),
+    (" 99 din. ", 9900),
+])
+def test_parsiraj_cenu(tekst, para):
+    assert parsiraj_cenu(tekst) == para
+
+
+@pytest.mark.parametrize("tekst", ["", "abc", "-100", "1,2,3.4.5", "12.3456"])
+def test_parsiraj_cenu_odbija_neispravne(tekst):
+    with pytest.raises(ValueError):
+        parsiraj_cenu(tekst)
+
+
+@pytest.mark.parametrize("vrsta", ["dnevnik", "sqlite"])
+def test_prihodi_se_azuriraju_inkrementalno(tmp_path, vrsta):
+    menadzer = otvori(tmp_path, vrsta)
+    ana = dodaj(menadzer, "Ana")
+    bojan = dodaj(menadzer, "Bojan")
+    assert menadzer.dodeli_paket(ana, "Osnovni", "1.500", "2024-01-10")
+    assert menadzer.dodeli_paket(ana, "Premium", "3000,50", "2024-02-01")
+    assert menadzer.dodeli_paket(bojan, "Osnovni", "1500", "2024-02-15")
+    assert menadzer.dodeli_paket(bojan, "Osnovni", "1500", "")
+    with pytest.raises(ValueError):
+        menadzer.dodeli_paket(bojan, "Los", "hiljadu", "2024-03-01")
+
+    prihodi = menadzer.prihodi
+    assert prihodi.izvestaj_po_paketu() == [("Osnovni", 450000, 3), ("Premium", 300050, 1)]
+    assert prihodi.izvestaj_po_mesecu() == [
+        ("2024-01", 150000, 1), ("2024-02", 450050, 2), (BEZ_DATUMA, 150000, 1)]
+    assert prihodi.izvestaj_po_paketu_i_mesecu()[1:3] == [
+        ("2024-02", "Premium", 300050, 1), ("2024-02", "Osnovni", 150000, 1)]
+
+    assert menadzer.obrisi_klijenta(bojan)
+    assert prihodi.izvestaj_po_paketu() == [("Premium", 300050, 1), ("Osnovni", 150000, 1)]
+    novi = IndeksPrihoda().izgradi(menadzer.skladiste.svi_paketi(menadzer.klijenti))
+    assert vars(prihodi) == vars(novi)
+    menadzer.zatvori()
+
+
+def test_model_cuva_isti_json():
+    podaci = {"7": {
+        "ime": "Ana", "prezime": "Test", "email": "ana@primer.rs", "telefon": "", "vip": True,
+        "paketi": [{"naziv": "Osnovni", "cena": "1500", "datum_pocetka": "2024-01-10",
+                    "datum_dodele": "2024-01-09 08:30:00", "popust": 10}],
+        "beleske": [{"tekst": "prva", "datum": "2024-01-09 08:31:05"},
+                    {"tekst": "stara", "datum": "09.01.2024"}],
+    }}
+    klijenti = klijenti_iz_recnika(podaci)
+    klijent = klijenti["7"]
+    assert klijent["vip"] is True and klijent.ostalo == {"vip": True}
+    assert type(klijent.paketi[0]._dodela) is int
+    assert type(klijent.beleske[0]._datum) is int
+    assert klijent.beleske[1]._datum == "09.01.2024"
+    assert json.loads(json.dumps(klijenti, default=u_json)) == podaci
+    assert klijent == podaci["7"]
+
+
+def test_model_deli_ponovljene_vrednosti():
+    prvi = Paket("".join(["Osno", "vni"]), "1500", "2024-01-10")
+    drugi = Paket.iz_recnika({"naziv": "Osnov" + "ni", "cena": "15" + "00"})
+    assert prvi.naziv is drugi.naziv and prvi.cena is drugi.cena
+    klijent = Klijent("Ana", "Test", "ana@primer.rs")
+    assert "arhivirano" not in klijent.u_recnik() and "arhivirano" not in klijent.keys()
+    with pytest.raises(AttributeError):
+        klijent.nepoznato = 1
+
+
+def upisi_klijente_sa_beleskama(direktorijum):
+    def beleske(*tekstovi):
+        return [{"tekst": tekst, "datum": datum} for tekst, datum in tekstovi]
+
+    with open(os.path.join(direktorijum, "klijenti.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "1": {"ime": "Ana", "prezime": "Test", "email": "ana@primer.rs", "telefon": "",
+                  "paketi": [], "beleske": beleske(
+                      ("ugovor poslat na potpis", "2015-03-01 09:00:00"),
+                      ("poslata ponuda", "2015-04-01 09:00:00"),
+                      ("novi ugovor", "2099-01-01 09:00:00"))},
+            "2": {"ime": "Bojan", "prezime": "Test", "email": "bojan@primer.rs", "telefon": "",
+                  "paketi": [], "beleske": beleske(("ugovor raskinut", "2016-01-01 09:00:00"))},
+        }, f)
+
+
+@pytest.mark.parametrize("vrsta", ["json", "dnevnik", "sqlite"])
+def test_arhiviranje_pretraga_i_citanje_unazad(tmp_path, vrsta):
+    upisi_klijente_sa_beleskama(tmp_path)
+    menadzer = otvori(tmp_path, vrsta)
+    assert menadzer.arhiviraj_beleske(meseci=12) == 3
+    assert menadzer.arhiviraj_beleske(meseci=12) == 0
+    assert [b["tekst"] for b in menadzer.detalji("1")["beleske"]] == ["novi ugovor"]
+
+    assert [(poz, b["tekst"]) for poz, b in menadzer.beleske_od_najnovije("1")] == [
+        (2, "novi ugovor"), (1, "poslata ponuda"), (0, "ugovor poslat na potpis")]
+    assert [(id_klijenta, poz) for id_klijenta, poz, _ in menadzer.pretrazi_arhivu("ugovor")] == [
+        ("1", 0), ("2", 0)]
+    assert menadzer.pretrazi_arhivu("ponuda poslata")[0][:2] == ("1", 1)
+    assert menadzer.pretrazi_arhivu("ponuda raskinut") == []
+    menadzer.zatvori()
+
+    menadzer = otvori(tmp_path, vrsta)
+    assert len(list(menadzer.beleske_od_najnovije("1"))) == 3
+    assert len(menadzer.pretrazi_arhivu("ugovor")) == 2
+    menadzer.zatvori()
+
+
+def test_indeks_arhive_se_dopisuje_i_sazima(tmp_path):
+    upisi_klijente_sa_beleskama(tmp_path)
+    menadzer = otvori(tmp_path, "dnevnik")
+    arhiva_beleski = menadzer.arhiva
+    assert menadzer.arhiviraj_beleske(meseci=12, ids=["1"]) == 2
+    assert menadzer.arhiviraj_beleske(meseci=12, ids=["2"]) == 1
+    # Arhiviranje samo dopisuje u dnevnik; reci.json jos ne postoji
+    assert not os.path.exists(arhiva_beleski.putanja_indeksa)
+    with open(arhiva_beleski.dnevnik_indeksa, encoding="utf-8") as f:
+        assert [json.loads(linija)["id"] for linija in f] == ["1", "2"]
+
+    # Drugi proces vidi isti indeks, a posle brisanja u njemu nema obrisanog klijenta
+    drugi = arhiva.ArhivaBeleski(arhiva_beleski.direktorijum)
+    assert drugi.indeks()["ugovor"] == {"1", "2"}
+    assert menadzer.obrisi_klijenta("2")
+    assert drugi.indeks()["ugovor"] == {"1"} and "raskinut" not in drugi.indeks()
+    assert menadzer.pretrazi_arhivu("raskinut") == []
+
+    arhiva_beleski.sazmi_indeks()
+    assert not os.path.exists(arhiva_beleski.dnevnik_indeksa)
+    with open(arhiva_beleski.putanja_indeksa, encoding="utf-8") as f:
+        assert json.load(f)["ugovor"] == ["1"]
+    assert drugi.indeks() == arhiva_beleski.indeks()
+    assert [red[:2] for red in menadzer.pretrazi_arhivu("ugovor")] == [("1", 0)]
+    menadzer.zatvori()
@@ -0,0 +1,28 @@
+import argparse
+import os
+
+from jezgro import PODACI_FAJL, VRSTE_SKLADISTA, napravi_skladiste
+from jezgro.uvoz import VELICINA_GRUPE, citaj_redove, uvezi_grupno
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grupni uvoz klijenata iz CSV ili JSON Lines fajla")
+    parser.add_argument("ulaz", help="CSV ili JSON Lines fajl sa klijentima")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="format ulaza (podrazumevano po ekstenziji)")
+    parser.add_argument("--grupa", type=int, default=VELICINA_GRUPE, help="broj redova po upisu")
+    parser.add_argument("--fajl", default=PODACI_FAJL, help="fajl sa podacima klijenata")
+    parser.add_argument("--skladiste", choices=tuple(VRSTE_SKLADISTA), help="vrsta skladista")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.ulaz):
+        parser.error(f"Fajl {args.ulaz} ne postoji")
+
+    skladiste = napravi_skladiste(args.fajl, args.skladiste)
+    klijenti = skladiste.ucitaj()
+    rezultat = uvezi_grupno(skladiste, klijenti, citaj_redove(args.ulaz, args.format), args.grupa)
+    skladiste.zatvori()
+
+    for broj_reda, greska in rezultat["odbijeno"]:
+        print(f"Red {broj_reda} odbijen: {greska}")
+    print(f"Uvezeno {rezultat['uvezeno']} klijenata, odbijeno {len(rezultat['odbijeno'])} "
+          f"za {rezultat['sekundi']:.2f} s ({rezultat['redova_u_sekundi']:.0f} redova/s)")
@@ -1,8 +1,18 @@
 from flask import Flask, render_template, request, jsonify, send_file
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from contextlib import contextmanager
 from datetime import datetime
+import atexit
+import csv
+import math
 import os
+import re
 import sys
+import threading
+import time
 from werkzeug.utils import secure_filename
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -18,10 +28,12 @@ from docx.shared import Pt
 # When packaged with PyInstaller, resources are extracted to sys._MEIPASS.
 # Use that as base; otherwise use the project directory.
 BASE_DIR = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+# The database and per-user history live here (tests point it at a temporary directory)
+DATA_DIR = os.environ.get('TROSKOVI_DATA_DIR', BASE_DIR)
 
 # Create Flask with explicit template/static folders so bundled exe can find them
 app = Flask(__name__, template_folder=os.path.join(BASE_DIR, 'app', 'templates'), static_folder=os.path.join(BASE_DIR, 'app', 'static'))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(BASE_DIR, 'troskovi.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(DATA_DIR, 'troskovi.db')
 app.config['UPLOAD_FOLDER'] = os.path.join(BASE_DIR, 'app', 'uploads')
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -29,10 +41,24 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+# CSV / bank statement columns accepted by the import routes (first match wins)
+CSV_COLUMNS = {
+    'naziv': ('naziv', 'name', 'description', 'opis'),
+    'iznos': ('iznos', 'amount', 'suma'),
+    'kategorija': ('kategorija', 'category'),
+    'opis': ('opis', 'napomena', 'note'),
+}
+
+# History changes of a user queued within this many seconds are written together
+HISTORY_DEBOUNCE_SECONDS = float(os.environ.get('HISTORY_DEBOUNCE_SECONDS', '2'))
+# A full checkpoint of the user's history is written every this many changes
+HISTORY_CHECKPOINT_EVERY = int(os.environ.get('HISTORY_CHECKPOINT_EVERY', '500'))
+CHECKPOINT_NAME = re.compile(r'checkpoint-(\d+)(?:-(\d+))?\.json')
+
 db = SQLAlchemy(app)
 
 # Ensure app data directory exists for per-user storage
-APP_DATA_DIR = os.path.join(BASE_DIR, 'app', 'data')
+APP_DATA_DIR = os.path.join(DATA_DIR, 'app', 'data')
 os.makedirs(APP_DATA_DIR, exist_ok=True)
 
 def ensure_user_folder(osoba_id: int):
@@ -41,29 +67,278 @@ def ensure_user_folder(osoba_id: int):
     os.makedirs(hist_dir, exist_ok=True)
     return user_dir, hist_dir
 
-def save_month_snapshot(osoba_id: int, mesec: str):
-    """Save a JSON snapshot of incomes and expenses for the given user and month."""
-    prihodi_list = Prihod.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
-    troskovi_list = Trosak.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
+def apply_change(state, change):
+    """Apply one history change to a {'prihodi': {...}, 'troskovi': {...}} state."""
+    items = state['prihodi' if change['tip'] == 'prihod' else 'troskovi']
+    if change['op'] == 'add':
+        items[str(change['id'])] = dict(change['stavka'], mesec=change['mesec'])
+    else:
+        items.pop(str(change['id']), None)
 
-    prihodi = [{'id': p.id, 'naziv': p.naziv, 'iznos': p.iznos} for p in prihodi_list]
-    troskovi = [{'id': t.id, 'naziv': t.naziv, 'iznos': t.iznos, 'kategorija': t.kategorija.naziv} for t in troskovi_list]
+def undo_change(state, change):
+    """Reverse apply_change(); a delete is undone only if it logged the deleted item."""
+    items = state['prihodi' if change['tip'] == 'prihod' else 'troskovi']
+    if change['op'] == 'add':
+        items.pop(str(change['id']), None)
+    elif 'stavka' in change:
+        items[str(change['id'])] = dict(change['stavka'], mesec=change['mesec'])
 
-    user_dir, hist_dir = ensure_user_folder(osoba_id)
-    filename = os.path.join(hist_dir, f'{mesec}.json')
-    snapshot = {
-        'osoba_id': osoba_id,
-        'mesec': mesec,
-        'prihodi': prihodi,
-        'troskovi': troskovi,
-        'generated_at': datetime.utcnow().isoformat()
-    }
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(snapshot, f, ensure_ascii=False, indent=2)
-    except Exception:
-        # don't break main flow if write fails
-        pass
+def time_key(t):
+    """Digits of an ISO time; they sort like the time and are safe in a file name."""
+    return re.sub(r'\D', '', t)
+
+class HistoryStore:
+    """Append-only history of each user's incomes and expenses.
+
+    history/changes.jsonl gets one line per insert or delete: version, time,
+    op ('add'/'delete'), tip ('prihod'/'trosak'), id, mesec and the item
+    itself (for a delete, the removed item, so the change can be undone).
+    Every HISTORY_CHECKPOINT_EVERY changes the full state of all months is
+    written to history/checkpoint-<version>-<time>.json together with the log
+    offset it covers, so a month at any point in time is rebuilt from the
+    nearest older checkpoint plus the changes after it. The time in the name
+    lets that checkpoint be picked without reading the others.
+
+    The first checkpoint is taken from the database when the first batch of a
+    user's changes is written. The rows already include that batch, so its
+    changes are undone to get the state just before it. A changes.jsonl
+    without any checkpoint is kept as it is; the checkpoint starts after it.
+    Replaying is idempotent ('add' sets, 'delete' removes), so a change that
+    is already in a checkpoint can safely be replayed.
+
+    The per-month history/<mesec>.json snapshots of earlier versions are not
+    read or converted. They only held each month's latest state, which the
+    first checkpoint takes from the database anyway.
+    """
+
+    def __init__(self, checkpoint_every):
+        self.checkpoint_every = checkpoint_every
+        self.lock = threading.Lock()
+        self.log_end = {}  # osoba_id -> (version, offset) of the end of the log
+        self.last_change = {}  # osoba_id -> {mesec: time of the last logged change}
+
+    def _paths(self, osoba_id):
+        user_dir, hist_dir = ensure_user_folder(osoba_id)
+        return hist_dir, os.path.join(hist_dir, 'changes.jsonl')
+
+    def _checkpoints(self, hist_dir):
+        """[(version, time key or None, path)] of the user's checkpoints, newest first."""
+        checkpoints = []
+        for name in os.listdir(hist_dir):
+            match = CHECKPOINT_NAME.fullmatch(name)
+            if match:
+                checkpoints.append((int(match.group(1)), match.group(2), os.path.join(hist_dir, name)))
+        return sorted(checkpoints, reverse=True)
+
+    def _read_log_end(self, osoba_id, log_path):
+        if osoba_id in self.log_end:
+            return self.log_end[osoba_id]
+        version, offset, last_change = 0, 0, {}
+        if os.path.exists(log_path):
+            with open(log_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    change = json.loads(line)
+                    version = change['v']
+                    offset += len(line)
+                    last_change[change['mesec']] = change['t']
+            # A line cut short by a crash is dropped before the next append
+            if offset != os.path.getsize(log_path):
+                os.truncate(log_path, offset)
+        self.log_end[osoba_id] = (version, offset)
+        self.last_change[osoba_id] = last_change
+        return version, offset
+
+    def _write_checkpoint(self, hist_dir, checkpoint):
+        filename = os.path.join(hist_dir, f"checkpoint-{checkpoint['v']:08d}-{time_key(checkpoint['t'])}.json")
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_filename, filename)
+
+    def _state_from_db(self, osoba_id):
+        state = {'prihodi': {}, 'troskovi': {}}
+        for p in Prihod.query.filter_by(osoba_id=osoba_id):
+            state['prihodi'][str(p.id)] = {'naziv': p.naziv, 'iznos': p.iznos, 'mesec': p.mesec}
+        for t in Trosak.query.filter_by(osoba_id=osoba_id):
+            state['troskovi'][str(t.id)] = {'naziv': t.naziv, 'iznos': t.iznos, 'kategorija_id': t.kategorija_id,
+                                            'opis': t.opis, 'mesec': t.mesec}
+        return state
+
+    def append(self, osoba_id, changes):
+        """Append changes (in order) to the user's log, checkpointing when due."""
+        with self.lock:
+            hist_dir, log_path = self._paths(osoba_id)
+            version, offset = self._read_log_end(osoba_id, log_path)
+            checkpoints = self._checkpoints(hist_dir)
+            if not checkpoints:
+                # History starts with this batch: the state just before it
+                state = self._state_from_db(osoba_id)
+                for change in reversed(changes):
+                    undo_change(state, change)
+                self._write_checkpoint(hist_dir, {'v': version, 't': changes[0]['t'], 'offset': offset, **state})
+                checkpoints = [(version, None, None)]
+
+            lines = []
+            for change in changes:
+                version += 1
+                lines.append(json.dumps({'v': version, **change}, ensure_ascii=False) + '\n')
+                self.last_change[osoba_id][change['mesec']] = change['t']
+            data = ''.join(lines).encode('utf-8')
+            with open(log_path, 'ab') as f:
+                f.write(data)
+            offset += len(data)
+            self.log_end[osoba_id] = (version, offset)
+
+            if version - checkpoints[0][0] >= self.checkpoint_every:
+                state, t = self._replay(hist_dir, log_path, None)
+                self._write_checkpoint(hist_dir, {'v': version, 't': t, 'offset': offset, **state})
+
+    def _replay(self, hist_dir, log_path, at):
+        """(state, time of the last applied change) at time `at` (None - now)."""
+        for version, key, path in self._checkpoints(hist_dir):
+            if key is None:
+                # Named before the time was part of the name
+                with open(path, 'r', encoding='utf-8') as f:
+                    checkpoint = json.load(f)
+                if at is None or checkpoint['t'] <= at:
+                    break
+            elif at is None or key <= time_key(at):
+                with open(path, 'r', encoding='utf-8') as f:
+                    checkpoint = json.load(f)
+                break
+        else:
+            return None, None
+
+        state = {'prihodi': checkpoint['prihodi'], 'troskovi': checkpoint['troskovi']}
+        t = checkpoint['t']
+        if os.path.exists(log_path):
+            with open(log_path, 'rb') as f:
+                f.seek(checkpoint['offset'])
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    change = json.loads(line)
+                    # Changes are logged in time order
+                    if at is not None and change['t'] > at:
+                        break
+                    apply_change(state, change)
+                    t = change['t']
+        return state, t
+
+    def month_at(self, osoba_id, mesec, at=None):
+        """Incomes and expenses of a month as they were at time `at` (ISO, UTC).
+
+        Returns None if the user's history starts after `at`.
+        """
+        hist_dir, log_path = self._paths(osoba_id)
+        state, t = self._replay(hist_dir, log_path, at)
+        if state is None:
+            return None
+        return {
+            'osoba_id': osoba_id,
+            'mesec': mesec,
+            'at': t,
+            'prihodi': [dict(item, id=int(id)) for id, item in state['prihodi'].items() if item['mesec'] == mesec],
+            'troskovi': [dict(item, id=int(id)) for id, item in state['troskovi'].items() if item['mesec'] == mesec]
+        }
+
+    def month_changes(self, osoba_id, mesec):
+        """All logged changes of a month, oldest first."""
+        hist_dir, log_path = self._paths(osoba_id)
+        changes = []
+        if os.path.exists(log_path):
+            with open(log_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    change = json.loads(line)
+                    if change['mesec'] == mesec:
+                        changes.append(change)
+        return changes
+
+    def last_change_time(self, osoba_id, mesec):
+        with self.lock:
+            hist_dir, log_path = self._paths(osoba_id)
+            self._read_log_end(osoba_id, log_path)
+            return self.last_change[osoba_id].get(mesec)
+
+class HistoryWorker:
+    """Writes history changes in a background thread instead of the request.
+
+    record() only queues a change. HISTORY_DEBOUNCE_SECONDS after the first
+    queued change of a user, everything queued for that user is appended to
+    the history store in one write.
+    """
+
+    def __init__(self, app, store, debounce):
+        self.app = app
+        self.store = store
+        self.debounce = debounce
+        self.pending = {}  # osoba_id -> [time the write is due, [changes]]
+        self.condition = threading.Condition()
+        # Held while a batch is taken and written, so batches stay in order
+        self.write_lock = threading.Lock()
+        self.thread = None
+
+    def record(self, osoba_id, op, tip, stavka_id, mesec, stavka=None):
+        with self.condition:
+            # Time is taken under the lock, so each user's log is in time order
+            change = {'t': datetime.utcnow().isoformat(), 'op': op, 'tip': tip, 'id': stavka_id, 'mesec': mesec}
+            if stavka is not None:
+                change['stavka'] = stavka
+            self.pending.setdefault(osoba_id, [time.monotonic() + self.debounce, []])[1].append(change)
+            if self.thread is None:
+                # Started on first use, so only the serving process runs it
+                self.thread = threading.Thread(target=self._run, name='history-worker', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    due = min((entry[0] for entry in self.pending.values()), default=None)
+                    if due is not None and due <= now:
+                        break
+                    self.condition.wait(None if due is None else due - now)
+            self._write_due()
+
+    def _write_due(self, everything=False):
+        with self.write_lock:
+            with self.condition:
+                now = time.monotonic()
+                batch = {osoba_id: changes for osoba_id, (due, changes) in self.pending.items()
+                         if everything or due <= now}
+                for osoba_id in batch:
+                    del self.pending[osoba_id]
+            if not batch:
+                return
+            with self.app.app_context():
+                for osoba_id, changes in batch.items():
+                    try:
+                        self.store.append(osoba_id, changes)
+                    except Exception:
+                        # don't stop the worker if one write fails
+                        self.app.logger.exception('Writing history for user %s failed', osoba_id)
+                    finally:
+                        db.session.remove()
+
+    def flush(self):
+        """Write all queued changes now (before reading history and at exit)."""
+        self._write_due(everything=True)
+
+    def status(self, osoba_id, mesec):
+        with self.condition:
+            changes = self.pending.get(osoba_id, [None, []])[1]
+            pending = any(change['mesec'] == mesec for change in changes)
+        return {'generated_at': self.store.last_change_time(osoba_id, mesec), 'pending': pending}
+
+history_store = HistoryStore(HISTORY_CHECKPOINT_EVERY)
+history_worker = HistoryWorker(app, history_store, HISTORY_DEBOUNCE_SECONDS)
+atexit.register(history_worker.flush)
 
 # Database Models
 class Person(db.Model):
@@ -79,6 +354,9 @@ class Person(db.Model):
     meseci = db.relationship('MesecniIzvestaj', backref='osoba', lazy=True, cascade='all, delete-orphan')
 
 class Prihod(db.Model):
+    # Every month view filters by (osoba_id, mesec)
+    __table_args__ = (db.Index('ix_prihod_osoba_mesec', 'osoba_id', 'mesec'),)
+
     id = db.Column(db.Integer, primary_key=True)
     osoba_id = db.Column(db.Integer, db.ForeignKey('person.id'), nullable=False)
     naziv = db.Column(db.String(100), nullable=False)
@@ -94,9 +372,11 @@ class TrosakKategorija(db.Model):
     troskovi = db.relationship('Trosak', backref='kategorija', lazy=True, cascade='all, delete-orphan')
 
 class Trosak(db.Model):
+    __table_args__ = (db.Index('ix_trosak_osoba_mesec', 'osoba_id', 'mesec'),)
+
     id = db.Column(db.Integer, primary_key=True)
     osoba_id = db.Column(db.Integer, db.ForeignKey('person.id'), nullable=False)
-    kategorija_id = db.Column(db.Integer, db.ForeignKey('trosak_kategorija.id'), nullable=False)
+    kategorija_id = db.Column(db.Integer, db.ForeignKey('trosak_kategorija.id'), nullable=False, index=True)
     naziv = db.Column(db.String(100), nullable=False)
     iznos = db.Column(db.Float, nullable=False)
     mesec = db.Column(db.String(7))  # YYYY-MM format
@@ -104,6 +384,10 @@ class Trosak(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class MesecniIzvestaj(db.Model):
+    # One report row per person and month. A unique index (rather than a
+    # table constraint) so migrate_schema() can add it to existing databases.
+    __table_args__ = (db.Index('uq_mesecni_izvestaj_osoba_mesec', 'osoba_id', 'mesec', unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
     osoba_id = db.Column(db.Integer, db.ForeignKey('person.id'), nullable=False)
     mesec = db.Column(db.String(7), nullable=False)  # YYYY-MM format
@@ -111,7 +395,171 @@ class MesecniIzvestaj(db.Model):
     ukupno_troskovi = db.Column(db.Float, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    kategorije = db.relationship('MesecniIzvestajKategorija', backref='izvestaj', lazy=True, cascade='all, delete-orphan')
+
+class MesecniIzvestajKategorija(db.Model):
+    """Expense total and item count of one category in a MesecniIzvestaj."""
+    __table_args__ = (db.Index('uq_mesecni_izvestaj_kategorija', 'izvestaj_id', 'kategorija_id', unique=True),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    izvestaj_id = db.Column(db.Integer, db.ForeignKey('mesecni_izvestaj.id'), nullable=False)
+    kategorija_id = db.Column(db.Integer, db.ForeignKey('trosak_kategorija.id'), nullable=False)
+    iznos = db.Column(db.Float, nullable=False, default=0)
+    broj = db.Column(db.Integer, nullable=False, default=0)
+
+def migrate_schema():
+    """Bring an existing troskovi.db up to date with the models.
+
+    db.create_all() only creates missing tables, so indexes added to existing
+    tables are created here. Duplicate MesecniIzvestaj rows, which could exist
+    before the unique index, are merged into the oldest row first and its
+    totals are recomputed from the incomes and expenses.
+    """
+    duplikati = db.session.execute(db.text(
+        'SELECT osoba_id, mesec FROM mesecni_izvestaj GROUP BY osoba_id, mesec HAVING COUNT(*) > 1'
+    )).all()
+    for osoba_id, mesec in duplikati:
+        params = {'osoba_id': osoba_id, 'mesec': mesec}
+        db.session.execute(db.text(
+            'DELETE FROM mesecni_izvestaj WHERE osoba_id = :osoba_id AND mesec = :mesec '
+            'AND id > (SELECT MIN(id) FROM mesecni_izvestaj WHERE osoba_id = :osoba_id AND mesec = :mesec)'
+        ), params)
+        db.session.execute(db.text(
+            'UPDATE mesecni_izvestaj SET '
+            'ukupno_prihodi = (SELECT COALESCE(SUM(iznos), 0) FROM prihod WHERE osoba_id = :osoba_id AND mesec = :mesec), '
+            'ukupno_troskovi = (SELECT COALESCE(SUM(iznos), 0) FROM trosak WHERE osoba_id = :osoba_id AND mesec = :mesec) '
+            'WHERE osoba_id = :osoba_id AND mesec = :mesec'
+        ), params)
+    db.session.commit()
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def init_db():
+    # Databases from before the per-category summary only have partial totals
+    needs_rebuild = not db.inspect(db.engine).has_table(MesecniIzvestajKategorija.__tablename__)
+    db.create_all()
+    migrate_schema()
+    if needs_rebuild:
+        rebuild_izvestaji()
+
+def update_izvestaj(osoba_id, mesec, prihodi=0, kategorije=None):
+    """Apply income/expense deltas to the month's MesecniIzvestaj.
+
+    `kategorije` maps kategorija_id to the (iznos, broj) delta of its expenses.
+    Runs in the caller's transaction, so the summary is committed together with
+    the rows that changed it. Rows are upserted (INSERT ... ON CONFLICT DO
+    UPDATE col = col + delta), so two requests creating the same month's
+    report at once both add to one row instead of hitting the unique index.
+    """
+    if mesec is None:
+        return
+    kategorije = kategorije or {}
+    troskovi = sum(iznos for iznos, broj in kategorije.values())
+
+    tabela = MesecniIzvestaj.__table__
+    upsert = sqlite_insert(tabela).values(osoba_id=osoba_id, mesec=mesec, ukupno_prihodi=prihodi,
+                                          ukupno_troskovi=troskovi)
+    db.session.execute(upsert.on_conflict_do_update(
+        index_elements=['osoba_id', 'mesec'],
+        set_={'ukupno_prihodi': tabela.c.ukupno_prihodi + upsert.excluded.ukupno_prihodi,
+              'ukupno_troskovi': tabela.c.ukupno_troskovi + upsert.excluded.ukupno_troskovi}))
+
+    if kategorije:
+        izvestaj_id = (db.session.query(MesecniIzvestaj.id)
+                       .filter_by(osoba_id=osoba_id, mesec=mesec).scalar())
+        tabela = MesecniIzvestajKategorija.__table__
+        upsert = sqlite_insert(tabela).values([
+            {'izvestaj_id': izvestaj_id, 'kategorija_id': kategorija_id, 'iznos': iznos, 'broj': broj}
+            for kategorija_id, (iznos, broj) in kategorije.items()])
+        db.session.execute(upsert.on_conflict_do_update(
+            index_elements=['izvestaj_id', 'kategorija_id'],
+            set_={'iznos': tabela.c.iznos + upsert.excluded.iznos,
+                  'broj': tabela.c.broj + upsert.excluded.broj}))
+
+def rebuild_izvestaji():
+    """Recompute every MesecniIzvestaj and its category totals from the raw rows.
+
+    Returns the number of monthly reports.
+    """
+    MesecniIzvestajKategorija.query.delete()
+    izvestaji = {(i.osoba_id, i.mesec): i for i in MesecniIzvestaj.query.all()}
+    for izvestaj in izvestaji.values():
+        izvestaj.ukupno_prihodi = 0
+        izvestaj.ukupno_troskovi = 0
+
+    def izvestaj_za(osoba_id, mesec):
+        if (osoba_id, mesec) not in izvestaji:
+            izvestaj = MesecniIzvestaj(osoba_id=osoba_id, mesec=mesec, ukupno_prihodi=0, ukupno_troskovi=0)
+            db.session.add(izvestaj)
+            izvestaji[(osoba_id, mesec)] = izvestaj
+        return izvestaji[(osoba_id, mesec)]
+
+    for osoba_id, mesec, iznos in (db.session.query(Prihod.osoba_id, Prihod.mesec, db.func.sum(Prihod.iznos))
+                                   .filter(Prihod.mesec.isnot(None))
+                                   .group_by(Prihod.osoba_id, Prihod.mesec)):
+        izvestaj_za(osoba_id, mesec).ukupno_prihodi = iznos
+
+    for osoba_id, mesec, kategorija_id, iznos, broj in (
+            db.session.query(Trosak.osoba_id, Trosak.mesec, Trosak.kategorija_id,
+                             db.func.sum(Trosak.iznos), db.func.count(Trosak.id))
+            .filter(Trosak.mesec.isnot(None))
+            .group_by(Trosak.osoba_id, Trosak.mesec, Trosak.kategorija_id)):
+        izvestaj = izvestaj_za(osoba_id, mesec)
+        izvestaj.ukupno_troskovi += iznos
+        izvestaj.kategorije.append(MesecniIzvestajKategorija(kategorija_id=kategorija_id, iznos=iznos, broj=broj))
+
+    db.session.commit()
+    return len(izvestaji)
+
+@app.cli.command('rebuild-izvestaji')
+def rebuild_izvestaji_command():
+    """Rebuild the monthly summaries from incomes and expenses."""
+    init_db()
+    print(f'Rebuilt {rebuild_izvestaji()} monthly reports.')
+
+# Statement lists of the active count_queries() blocks
+_query_counters = []
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    for statements in _query_counters:
+        statements.append(statement)
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements executed inside the block.
+
+    Lets tests assert that a month view issues a constant number of queries:
+
+        with count_queries() as statements:
+            client.get(f'/api/troskovi/{osoba_id}/{mesec}')
+        assert len(statements) == 1
+    """
+    statements = []
+    _query_counters.append(statements)
+    try:
+        yield statements
+    finally:
+        _query_counters.remove(statements)
+
 # Helper functions
+def month_troskovi(osoba_id, mesec):
+    """Expenses for a month with their categories loaded in the same query."""
+    return (Trosak.query
+            .options(db.joinedload(Trosak.kategorija))
+            .filter_by(osoba_id=osoba_id, mesec=mesec)
+            .all())
+
+def izvestaj_kategorije(izvestaj):
+    """(naziv, boja, iznos, broj) for each category with expenses in the report."""
+    return (db.session.query(TrosakKategorija.naziv, TrosakKategorija.boja,
+                             MesecniIzvestajKategorija.iznos, MesecniIzvestajKategorija.broj)
+            .join(MesecniIzvestajKategorija, MesecniIzvestajKategorija.kategorija_id == TrosakKategorija.id)
+            .filter(MesecniIzvestajKategorija.izvestaj_id == izvestaj.id, MesecniIzvestajKategorija.broj > 0)
+            .all())
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -129,6 +577,191 @@ def calculate_percentages(troskovi):
         result[trosak['id']] = (trosak['iznos'] / total) * 100
     return result
 
+def parse_iznos(value):
+    """Signed amount from JSON or CSV: 1234.5, '1234.50', '1.234,50' or '-1 234,50'.
+
+    As in Menadzer's parsiraj_cenu, a single '.' followed by exactly three
+    digits ('12.500') separates thousands.
+    """
+    # float(True) would be 1.0
+    if isinstance(value, bool):
+        raise ValueError('Neispravan iznos')
+    if isinstance(value, str):
+        value = value.strip().replace(' ', '').replace('\xa0', '')
+        if ',' in value and '.' in value:
+            # The last separator is the decimal one
+            if value.rfind(',') > value.rfind('.'):
+                value = value.replace('.', '').replace(',', '.')
+            else:
+                value = value.replace(',', '')
+        elif value.count(',') == 1:
+            value = value.replace(',', '.')
+        elif ',' in value or value.count('.') > 1 or re.fullmatch(r'[-+]?\d+\.\d{3}', value):
+            value = value.replace(',', '').replace('.', '')
+    try:
+        iznos = float(value)
+    except (TypeError, ValueError):
+        raise ValueError('Neispravan iznos') from None
+    if not math.isfinite(iznos):
+        raise ValueError('Neispravan iznos')
+    return iznos
+
+def pozitivan_iznos(value):
+    iznos = parse_iznos(value)
+    if iznos <= 0:
+        raise ValueError('Iznos mora biti pozitivan')
+    return iznos
+
+def iznos_troska_iz_izvoda(value):
+    """Bank statements list debits as negative amounts; credits are not expenses."""
+    iznos = parse_iznos(value)
+    if iznos >= 0:
+        raise ValueError('Uplata ili povraćaj nije trošak')
+    return -iznos
+
+def je_izvod(stavke):
+    """A CSV is a bank statement if most of its amounts are negative.
+
+    One negative row in a plain expense list is then reported as an invalid
+    item instead of turning the whole file into a statement.
+    """
+    negativni = pozitivni = 0
+    for stavka in stavke:
+        try:
+            iznos = parse_iznos(stavka.get('iznos'))
+        except ValueError:
+            continue
+        if iznos < 0:
+            negativni += 1
+        else:
+            pozitivni += 1
+    return negativni > pozitivni
+
+def parse_csv_stavke(file):
+    """Rows of an uploaded CSV or bank statement as batch items (dicts).
+
+    The delimiter (',' or ';') is detected, headers are matched through
+    CSV_COLUMNS and the file may be UTF-8 or Windows-1250.
+    """
+    raw = file.read()
+    try:
+        text = raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        text = raw.decode('cp1250')
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    headers = {(name or '').strip().lower(): name for name in reader.fieldnames or []}
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in headers and headers[alias] not in columns.values():
+                columns[field] = headers[alias]
+                break
+    return [{field: (row.get(column) or '').strip() for field, column in columns.items()}
+            for row in reader]
+
+def insert_prihodi(osoba_id, mesec, stavke):
+    """Insert incomes in one transaction with one summary update.
+
+    Returns a result per item; invalid items are skipped and reported.
+    """
+    rezultati = [None] * len(stavke)
+    novi = []
+    for i, stavka in enumerate(stavke):
+        try:
+            naziv = str(stavka.get('naziv') or '').strip()
+            if not naziv:
+                raise ValueError('Naziv je obavezan')
+            prihod = Prihod(osoba_id=osoba_id, naziv=naziv, iznos=pozitivan_iznos(stavka.get('iznos')), mesec=mesec)
+        except (TypeError, ValueError) as e:
+            rezultati[i] = {'index': i, 'success': False, 'message': str(e)}
+            continue
+        db.session.add(prihod)
+        novi.append((i, prihod))
+
+    if novi:
+        update_izvestaj(osoba_id, mesec, prihodi=sum(prihod.iznos for i, prihod in novi))
+        db.session.flush()
+        # Read before commit, which would expire (and reload) every object
+        zapisi = [(i, prihod.id, {'naziv': prihod.naziv, 'iznos': prihod.iznos}) for i, prihod in novi]
+        db.session.commit()
+        for i, prihod_id, stavka in zapisi:
+            history_worker.record(osoba_id, 'add', 'prihod', prihod_id, mesec, stavka)
+            rezultati[i] = {'index': i, 'success': True, 'prihod_id': prihod_id}
+    return rezultati
+
+def insert_troskovi(osoba_id, mesec, stavke, kategorija_id=None, izvod=False):
+    """Insert expenses in one transaction with one summary update.
+
+    An item names its category by 'kategorija_id' or by 'kategorija' (name);
+    `kategorija_id` is used for items with neither. With `izvod` the amounts
+    come from a bank statement (see iznos_troska_iz_izvoda). Returns a result
+    per item.
+    """
+    parse = iznos_troska_iz_izvoda if izvod else pozitivan_iznos
+    kategorije = TrosakKategorija.query.all()
+    po_id = {k.id for k in kategorije}
+    po_nazivu = {k.naziv.lower(): k.id for k in kategorije}
+    rezultati = [None] * len(stavke)
+    novi = []
+    for i, stavka in enumerate(stavke):
+        try:
+            naziv = str(stavka.get('naziv') or '').strip()
+            if not naziv:
+                raise ValueError('Naziv je obavezan')
+            if stavka.get('kategorija_id'):
+                kat_id = stavka['kategorija_id']
+                kat_id = int(kat_id) if str(kat_id).isdigit() else None
+            elif stavka.get('kategorija'):
+                kat_id = po_nazivu.get(str(stavka['kategorija']).strip().lower())
+            else:
+                kat_id = kategorija_id
+            if kat_id not in po_id:
+                raise ValueError('Nepoznata kategorija')
+            opis = stavka.get('opis', '')
+            if opis is not None and not isinstance(opis, str):
+                raise ValueError('Opis mora biti tekst')
+            trosak = Trosak(osoba_id=osoba_id, kategorija_id=kat_id, naziv=naziv,
+                            iznos=parse(stavka.get('iznos')), mesec=mesec, opis=opis)
+        except (TypeError, ValueError) as e:
+            rezultati[i] = {'index': i, 'success': False, 'message': str(e)}
+            continue
+        db.session.add(trosak)
+        novi.append((i, trosak))
+
+    if novi:
+        po_kategoriji = {}
+        for i, trosak in novi:
+            iznos, broj = po_kategoriji.get(trosak.kategorija_id, (0, 0))
+            po_kategoriji[trosak.kategorija_id] = (iznos + trosak.iznos, broj + 1)
+        update_izvestaj(osoba_id, mesec, kategorije=po_kategoriji)
+        db.session.flush()
+        zapisi = [(i, trosak.id, {'naziv': trosak.naziv, 'iznos': trosak.iznos,
+                                  'kategorija_id': trosak.kategorija_id, 'opis': trosak.opis})
+                  for i, trosak in novi]
+        db.session.commit()
+        for i, trosak_id, stavka in zapisi:
+            history_worker.record(osoba_id, 'add', 'trosak', trosak_id, mesec, stavka)
+            rezultati[i] = {'index': i, 'success': True, 'trosak_id': trosak_id}
+    return rezultati
+
+def batch_response(rezultati):
+    dodato = sum(1 for r in rezultati if r['success'])
+    return jsonify({'success': dodato > 0, 'dodato': dodato,
+                    'preskoceno': len(rezultati) - dodato, 'rezultati': rezultati})
+
+def batch_stavke():
+    """Items of a batch POST: a JSON array or {"stavke": [...]}; None if malformed."""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('stavke')
+    if not isinstance(data, list) or not all(isinstance(stavka, dict) for stavka in data):
+        return None
+    return data
+
 # Routes
 @app.route('/')
 def index():
@@ -193,20 +826,12 @@ def prihodi(osoba_id, mesec):
             mesec=mesec
         )
         db.session.add(prihod)
+        update_izvestaj(osoba_id, mesec, prihodi=prihod.iznos)
+        stavka = {'naziv': prihod.naziv, 'iznos': prihod.iznos}
         db.session.commit()
         
-        # Update izvestaj
-        ukupno = sum(p.iznos for p in Prihod.query.filter_by(osoba_id=osoba_id, mesec=mesec).all())
-        izvestaj = MesecniIzvestaj.query.filter_by(osoba_id=osoba_id, mesec=mesec).first()
-        if izvestaj:
-            izvestaj.ukupno_prihodi = ukupno
-        db.session.commit()
-        
-        # Save history snapshot after change
-        try:
-            save_month_snapshot(osoba_id, mesec)
-        except Exception:
-            pass
+        # History is written by the background worker
+        history_worker.record(osoba_id, 'add', 'prihod', prihod.id, mesec, stavka)
 
         return jsonify({'success': True, 'prihod_id': prihod.id})
     
@@ -224,20 +849,12 @@ def delete_prihod(prihod_id):
         osoba_id = prihod.osoba_id
         mesec = prihod.mesec
         db.session.delete(prihod)
+        update_izvestaj(osoba_id, mesec, prihodi=-prihod.iznos)
+        stavka = {'naziv': prihod.naziv, 'iznos': prihod.iznos}
         db.session.commit()
         
-        # Update izvestaj
-        ukupno = sum(p.iznos for p in Prihod.query.filter_by(osoba_id=osoba_id, mesec=mesec).all())
-        izvestaj = MesecniIzvestaj.query.filter_by(osoba_id=osoba_id, mesec=mesec).first()
-        if izvestaj:
-            izvestaj.ukupno_prihodi = ukupno
-        db.session.commit()
-        
-        # Save history snapshot after change
-        try:
-            save_month_snapshot(osoba_id, mesec)
-        except Exception:
-            pass
+        # History is written by the background worker
+        history_worker.record(osoba_id, 'delete', 'prihod', prihod_id, mesec, stavka)
 
         return jsonify({'success': True})
     return jsonify({'success': False}), 404
@@ -279,26 +896,16 @@ def troskovi(osoba_id, mesec):
             opis=data.get('opis', '')
         )
         db.session.add(trosak)
+        update_izvestaj(osoba_id, mesec, kategorije={trosak.kategorija_id: (trosak.iznos, 1)})
+        stavka = {'naziv': trosak.naziv, 'iznos': trosak.iznos, 'kategorija_id': trosak.kategorija_id, 'opis': trosak.opis}
         db.session.commit()
         
-        # Update izvestaj
-        ukupno = sum(t.iznos for t in Trosak.query.filter_by(osoba_id=osoba_id, mesec=mesec).all())
-        izvestaj = MesecniIzvestaj.query.filter_by(osoba_id=osoba_id, mesec=mesec).first()
-        if not izvestaj:
-            izvestaj = MesecniIzvestaj(osoba_id=osoba_id, mesec=mesec)
-            db.session.add(izvestaj)
-        izvestaj.ukupno_troskovi = ukupno
-        db.session.commit()
-        
-        # Save history snapshot after change
-        try:
-            save_month_snapshot(osoba_id, mesec)
-        except Exception:
-            pass
+        # History is written by the background worker
+        history_worker.record(osoba_id, 'add', 'trosak', trosak.id, mesec, stavka)
 
         return jsonify({'success': True, 'trosak_id': trosak.id})
     
-    troskovi_list = Trosak.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
+    troskovi_list = month_troskovi(osoba_id, mesec)
     return jsonify([{
         'id': t.id,
         'naziv': t.naziv,
@@ -316,44 +923,88 @@ def delete_trosak(trosak_id):
         osoba_id = trosak.osoba_id
         mesec = trosak.mesec
         db.session.delete(trosak)
+        update_izvestaj(osoba_id, mesec, kategorije={trosak.kategorija_id: (-trosak.iznos, -1)})
+        stavka = {'naziv': trosak.naziv, 'iznos': trosak.iznos, 'kategorija_id': trosak.kategorija_id, 'opis': trosak.opis}
         db.session.commit()
         
-        # Update izvestaj
-        ukupno = sum(t.iznos for t in Trosak.query.filter_by(osoba_id=osoba_id, mesec=mesec).all())
-        izvestaj = MesecniIzvestaj.query.filter_by(osoba_id=osoba_id, mesec=mesec).first()
-        if izvestaj:
-            izvestaj.ukupno_troskovi = ukupno
-        db.session.commit()
-        
-        # Save history snapshot after change
-        try:
-            save_month_snapshot(osoba_id, mesec)
-        except Exception:
-            pass
+        # History is written by the background worker
+        history_worker.record(osoba_id, 'delete', 'trosak', trosak_id, mesec, stavka)
 
         return jsonify({'success': True})
     return jsonify({'success': False}), 404
 
+@app.route('/api/prihodi/<int:osoba_id>/<mesec>/batch', methods=['POST'])
+def prihodi_batch(osoba_id, mesec):
+    stavke = batch_stavke()
+    if stavke is None:
+        return jsonify({'success': False, 'message': 'Očekuje se lista stavki'}), 400
+    return batch_response(insert_prihodi(osoba_id, mesec, stavke))
+
+@app.route('/api/troskovi/<int:osoba_id>/<mesec>/batch', methods=['POST'])
+def troskovi_batch(osoba_id, mesec):
+    stavke = batch_stavke()
+    if stavke is None:
+        return jsonify({'success': False, 'message': 'Očekuje se lista stavki'}), 400
+    return batch_response(insert_troskovi(osoba_id, mesec, stavke))
+
+@app.route('/api/prihodi/<int:osoba_id>/<mesec>/csv', methods=['POST'])
+def prihodi_csv(osoba_id, mesec):
+    file = request.files.get('fajl')
+    if not file or not file.filename:
+        return jsonify({'success': False, 'message': 'Izaberite CSV fajl'}), 400
+    return batch_response(insert_prihodi(osoba_id, mesec, parse_csv_stavke(file)))
+
+@app.route('/api/troskovi/<int:osoba_id>/<mesec>/csv', methods=['POST'])
+def troskovi_csv(osoba_id, mesec):
+    """CSV or bank statement; rows without a category go to form field kategorija_id."""
+    file = request.files.get('fajl')
+    if not file or not file.filename:
+        return jsonify({'success': False, 'message': 'Izaberite CSV fajl'}), 400
+    kategorija_id = request.form.get('kategorija_id', type=int)
+    stavke = parse_csv_stavke(file)
+    return batch_response(insert_troskovi(osoba_id, mesec, stavke, kategorija_id, izvod=je_izvod(stavke)))
+
+@app.route('/api/snapshot/<int:osoba_id>/<mesec>')
+def snapshot_status(osoba_id, mesec):
+    """Time of the month's last written history change and whether newer ones are queued."""
+    return jsonify(history_worker.status(osoba_id, mesec))
+
+@app.route('/api/history/<int:osoba_id>/<mesec>')
+def month_history(osoba_id, mesec):
+    """The month as it was at ?at=<ISO time, UTC> (default: now), rebuilt from history."""
+    history_worker.flush()
+    stanje = history_store.month_at(osoba_id, mesec, request.args.get('at'))
+    if stanje is None:
+        return jsonify({'success': False, 'message': 'Istorija ne seže do tog trenutka'}), 404
+    kategorije = {k.id: k.naziv for k in TrosakKategorija.query.all()}
+    for trosak in stanje['troskovi']:
+        trosak['kategorija'] = kategorije.get(trosak['kategorija_id'])
+    return jsonify(stanje)
+
+@app.route('/api/history/<int:osoba_id>/<mesec>/changes')
+def month_history_changes(osoba_id, mesec):
+    """Every logged insert and delete of the month, oldest first."""
+    history_worker.flush()
+    return jsonify(history_store.month_changes(osoba_id, mesec))
+
 @app.route('/api/izvestaj/<int:osoba_id>/<mesec>')
 def get_izvestaj(osoba_id, mesec):
     osoba = Person.query.get(osoba_id)
-    prihodi_list = Prihod.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
-    troskovi_list = Trosak.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
-    
-    total_prihodi = sum(p.iznos for p in prihodi_list)
-    total_troskovi = sum(t.iznos for t in troskovi_list)
+    # Served from the materialized summary kept up to date by update_izvestaj()
+    izvestaj = MesecniIzvestaj.query.filter_by(osoba_id=osoba_id, mesec=mesec).first()
+    total_prihodi = izvestaj.ukupno_prihodi if izvestaj else 0
+    total_troskovi = izvestaj.ukupno_troskovi if izvestaj else 0
     
     # Group troskovi by kategorija
     troskovi_by_kategorija = {}
-    for trosak in troskovi_list:
-        kat_naziv = trosak.kategorija.naziv
-        if kat_naziv not in troskovi_by_kategorija:
-            troskovi_by_kategorija[kat_naziv] = {
-                'iznos': 0,
-                'boja': trosak.kategorija.boja,
-                'procentualno': 0
-            }
-        troskovi_by_kategorija[kat_naziv]['iznos'] += trosak.iznos
+    broj_stavki = 0
+    for kat_naziv, boja, iznos, broj in (izvestaj_kategorije(izvestaj) if izvestaj else []):
+        troskovi_by_kategorija[kat_naziv] = {
+            'iznos': iznos,
+            'boja': boja,
+            'procentualno': 0
+        }
+        broj_stavki += broj
     
     # Calculate percentages
     if total_troskovi > 0:
@@ -371,14 +1022,14 @@ def get_izvestaj(osoba_id, mesec):
         'total_troskovi': total_troskovi,
         'razlika': total_prihodi - total_troskovi,
         'troskovi_by_kategorija': troskovi_by_kategorija,
-        'broj_stavki_troskova': len(troskovi_list)
+        'broj_stavki_troskova': broj_stavki
     })
 
 @app.route('/api/export-docx/<int:osoba_id>/<mesec>')
 def export_docx(osoba_id, mesec):
     osoba = Person.query.get(osoba_id)
     prihodi_list = Prihod.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
-    troskovi_list = Trosak.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
+    troskovi_list = month_troskovi(osoba_id, mesec)
 
     total_prihodi = sum(p.iznos for p in prihodi_list)
     total_troskovi = sum(t.iznos for t in troskovi_list)
@@ -452,7 +1103,7 @@ def export_docx(osoba_id, mesec):
 def export_pdf(osoba_id, mesec):
     osoba = Person.query.get(osoba_id)
     prihodi_list = Prihod.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
-    troskovi_list = Trosak.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
+    troskovi_list = month_troskovi(osoba_id, mesec)
     
     total_prihodi = sum(p.iznos for p in prihodi_list)
     total_troskovi = sum(t.iznos for t in troskovi_list)
@@ -587,5 +1238,5 @@ def export_pdf(osoba_id, mesec):
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_db()
     app.run(debug=True, host='localhost', port=5000)
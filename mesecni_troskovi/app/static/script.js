@@ -22,6 +22,8 @@ document.addEventListener('DOMContentLoaded', function() {
     document.getElementById('prihodForm').addEventListener('submit', handlePrihodSubmit);
     document.getElementById('trosakForm').addEventListener('submit', handleTrosakSubmit);
     document.getElementById('kategorijaForm').addEventListener('submit', handleKategorijaSubmit);
+    document.getElementById('prihodCsvForm').addEventListener('submit', e => handleCsvImport(e, 'prihodi'));
+    document.getElementById('trosakCsvForm').addEventListener('submit', e => handleCsvImport(e, 'troskovi'));
 
     // Load initial data
     loadMonthData();
@@ -169,13 +171,15 @@ function loadKategorije() {
     fetch('/api/kategorije')
         .then(res => res.json())
         .then(data => {
-            const select = document.getElementById('kategorija');
-            select.innerHTML = '<option value="">Izaberite kategoriju</option>';
-            data.forEach(kat => {
-                const option = document.createElement('option');
-                option.value = kat.id;
-                option.textContent = kat.naziv;
-                select.appendChild(option);
+            ['kategorija', 'trosakCsvKategorija'].forEach(id => {
+                const select = document.getElementById(id);
+                select.innerHTML = '<option value="">Izaberite kategoriju</option>';
+                data.forEach(kat => {
+                    const option = document.createElement('option');
+                    option.value = kat.id;
+                    option.textContent = kat.naziv;
+                    select.appendChild(option);
+                });
             });
         })
         .catch(err => console.error('Error loading kategorije:', err));
@@ -270,6 +274,40 @@ function deleteTrosak(trosakId) {
     }
 }
 
+// Import a CSV file or bank statement in one request (vrsta: 'prihodi' or 'troskovi')
+function handleCsvImport(e, vrsta) {
+    e.preventDefault();
+
+    const form = e.target;
+    const formData = new FormData();
+    formData.append('fajl', form.querySelector('input[type="file"]').files[0]);
+    if (vrsta === 'troskovi') {
+        formData.append('kategorija_id', document.getElementById('trosakCsvKategorija').value);
+    }
+
+    fetch(`/api/${vrsta}/${currentOsobaId}/${currentMonth}/csv`, {
+        method: 'POST',
+        body: formData
+    })
+    .then(res => res.json())
+    .then(result => {
+        if (result.success) {
+            const preskoceno = result.preskoceno ? `, preskočeno ${result.preskoceno}` : '';
+            showAlert(`Uvezeno stavki: ${result.dodato}${preskoceno}`, result.preskoceno ? 'error' : 'success');
+            form.reset();
+            if (vrsta === 'prihodi') {
+                loadPrihodi();
+            } else {
+                loadTroskovi();
+            }
+            loadIzvestaj();
+        } else {
+            showAlert(result.message || 'Nijedna stavka nije uvezena!', 'error');
+        }
+    })
+    .catch(err => console.error('Error:', err));
+}
+
 // Handle kategorija submission
 function handleKategorijaSubmit(e) {
     e.preventDefault();
@@ -0,0 +1,344 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+# Before importing app: the database and history go to a temporary directory
+os.environ['TROSKOVI_DATA_DIR'] = tempfile.mkdtemp(prefix='troskovi_test_')
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import (APP_DATA_DIR, HistoryWorker, MesecniIzvestaj, Person, app, count_queries, db, history_store,
+                 history_worker, init_db, migrate_schema, parse_iznos, rebuild_izvestaji)
+
+
+@pytest.fixture(scope='module')
+def client():
+    with app.app_context():
+        init_db()
+    return app.test_client()
+
+
+@pytest.fixture(scope='module')
+def osoba_id(client):
+    return client.post('/api/osoba', data={
+        'ime': 'Ana', 'prezime': 'Test', 'datum_rodjenja': '1990-01-01'}).json['osoba_id']
+
+
+def kategorija(client, naziv):
+    response = client.post('/api/kategorije', json={'naziv': naziv})
+    if response.status_code == 400:
+        return next(k['id'] for k in client.get('/api/kategorije').json if k['naziv'] == naziv)
+    return response.json['kategorija_id']
+
+
+def add_troskovi(client, osoba_id, mesec, kategorije, broj):
+    for i in range(broj):
+        response = client.post(f'/api/troskovi/{osoba_id}/{mesec}', json={
+            'naziv': f'trosak {i}', 'iznos': 10 + i, 'kategorija_id': kategorije[i % len(kategorije)]})
+        assert response.json['success']
+
+
+def index_names(table):
+    return {index['name'] for index in db.inspect(db.engine).get_indexes(table)}
+
+
+def test_month_columns_are_indexed(client):
+    with app.app_context():
+        assert 'ix_prihod_osoba_mesec' in index_names('prihod')
+        assert 'ix_trosak_osoba_mesec' in index_names('trosak')
+        assert 'uq_mesecni_izvestaj_osoba_mesec' in index_names('mesecni_izvestaj')
+
+
+def test_one_summary_row_per_person_and_month(client, osoba_id):
+    with app.app_context():
+        db.session.add(MesecniIzvestaj(osoba_id=osoba_id, mesec='2019-01'))
+        db.session.commit()
+        db.session.add(MesecniIzvestaj(osoba_id=osoba_id, mesec='2019-01'))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+
+def test_migrate_schema_merges_duplicates_and_adds_indexes(client, osoba_id):
+    mesec = '2019-02'
+    for iznos in (100, 250):
+        assert client.post(f'/api/prihodi/{osoba_id}/{mesec}', json={'naziv': 'Plata', 'iznos': iznos}).json['success']
+
+    with app.app_context():
+        # A database from before the unique index, with a stale duplicate report
+        db.session.execute(db.text('DROP INDEX uq_mesecni_izvestaj_osoba_mesec'))
+        db.session.execute(db.text('DROP INDEX ix_prihod_osoba_mesec'))
+        db.session.execute(db.text(
+            'INSERT INTO mesecni_izvestaj (osoba_id, mesec, ukupno_prihodi, ukupno_troskovi) '
+            'VALUES (:osoba_id, :mesec, 100, 0)'), {'osoba_id': osoba_id, 'mesec': mesec})
+        db.session.commit()
+
+        migrate_schema()
+        izvestaji = MesecniIzvestaj.query.filter_by(osoba_id=osoba_id, mesec=mesec).all()
+        assert [izvestaj.ukupno_prihodi for izvestaj in izvestaji] == [350]
+        assert 'uq_mesecni_izvestaj_osoba_mesec' in index_names('mesecni_izvestaj')
+        assert 'ix_prihod_osoba_mesec' in index_names('prihod')
+
+
+def month_view_queries(client, osoba_id, mesec):
+    with count_queries() as statements:
+        assert client.get(f'/api/troskovi/{osoba_id}/{mesec}').status_code == 200
+        assert client.get(f'/api/izvestaj/{osoba_id}/{mesec}').status_code == 200
+    return len(statements)
+
+
+def test_month_view_issues_constant_number_of_queries(client, osoba_id):
+    mesec = '2020-01'
+    kategorije = [kategorija(client, naziv) for naziv in ('Hrana', 'Stan', 'Prevoz')]
+    add_troskovi(client, osoba_id, mesec, kategorije, 3)
+    malo = month_view_queries(client, osoba_id, mesec)
+    add_troskovi(client, osoba_id, mesec, kategorije, 30)
+    assert month_view_queries(client, osoba_id, mesec) == malo
+
+
+def test_report_totals_and_categories_follow_changes(client, osoba_id):
+    mesec = '2020-02'
+    hrana, stan = kategorija(client, 'Hrana'), kategorija(client, 'Stan')
+    client.post(f'/api/prihodi/{osoba_id}/{mesec}', json={'naziv': 'Plata', 'iznos': 1000})
+    ids = [client.post(f'/api/troskovi/{osoba_id}/{mesec}', json={
+        'naziv': naziv, 'iznos': iznos, 'kategorija_id': kat}).json['trosak_id']
+        for naziv, iznos, kat in (('Hleb', 100, hrana), ('Mleko', 50, hrana), ('Kirija', 250, stan))]
+
+    izvestaj = client.get(f'/api/izvestaj/{osoba_id}/{mesec}').json
+    assert (izvestaj['total_prihodi'], izvestaj['total_troskovi'], izvestaj['razlika']) == (1000, 400, 600)
+    assert izvestaj['broj_stavki_troskova'] == 3
+    assert {naziv: (k['iznos'], k['procentualno']) for naziv, k in izvestaj['troskovi_by_kategorija'].items()} == {
+        'Hrana': (150, 37.5), 'Stan': (250, 62.5)}
+
+    assert client.delete(f'/api/trosak/{ids[2]}').json['success']
+    izvestaj = client.get(f'/api/izvestaj/{osoba_id}/{mesec}').json
+    assert izvestaj['total_troskovi'] == 150 and izvestaj['broj_stavki_troskova'] == 2
+    assert list(izvestaj['troskovi_by_kategorija']) == ['Hrana']
+
+
+def test_concurrent_first_writes_share_one_report(client, osoba_id):
+    mesec = '2020-03'
+    hrana = kategorija(client, 'Hrana')
+    pocetak = threading.Barrier(8)
+    odgovori = []
+
+    def dodaj(i):
+        pocetak.wait()
+        odgovori.append(app.test_client().post(f'/api/troskovi/{osoba_id}/{mesec}', json={
+            'naziv': f'trosak {i}', 'iznos': 10, 'kategorija_id': hrana}))
+
+    niti = [threading.Thread(target=dodaj, args=(i,)) for i in range(8)]
+    for nit in niti:
+        nit.start()
+    for nit in niti:
+        nit.join()
+    assert [odgovor.status_code for odgovor in odgovori] == [200] * 8
+
+    izvestaj = client.get(f'/api/izvestaj/{osoba_id}/{mesec}').json
+    assert izvestaj['total_troskovi'] == 80 and izvestaj['broj_stavki_troskova'] == 8
+
+
+def summaries():
+    izvestaji = MesecniIzvestaj.query.order_by(MesecniIzvestaj.osoba_id, MesecniIzvestaj.mesec).all()
+    return [(i.osoba_id, i.mesec, i.ukupno_prihodi, i.ukupno_troskovi,
+             sorted((k.kategorija_id, k.iznos, k.broj) for k in i.kategorije if k.broj))
+            for i in izvestaji]
+
+
+def test_rebuild_matches_incremental_summary(client, osoba_id):
+    mesec = '2020-04'
+    hrana, stan = kategorija(client, 'Hrana'), kategorija(client, 'Stan')
+    add_troskovi(client, osoba_id, mesec, [hrana, stan], 5)
+    prihod_id = client.post(f'/api/prihodi/{osoba_id}/{mesec}', json={'naziv': 'Plata', 'iznos': 500}).json['prihod_id']
+    client.post(f'/api/prihodi/{osoba_id}/{mesec}', json={'naziv': 'Bonus', 'iznos': 70})
+    assert client.delete(f'/api/prihod/{prihod_id}').json['success']
+
+    with app.app_context():
+        inkrementalno = summaries()
+        rebuild_izvestaji()
+        assert summaries() == inkrementalno
+
+
+class RecordingStore:
+    def __init__(self):
+        self.writes = []
+
+    def append(self, osoba_id, changes):
+        self.writes.append((osoba_id, [change['id'] for change in changes]))
+
+    def last_change_time(self, osoba_id, mesec):
+        return None
+
+
+def test_history_worker_writes_a_users_changes_together():
+    store = RecordingStore()
+    worker = HistoryWorker(app, store, 0.2)
+    for i in range(5):
+        worker.record(1, 'add', 'trosak', i, '2020-05', {'naziv': 'x', 'iznos': 1})
+    worker.record(2, 'delete', 'prihod', 9, '2020-05')
+    assert store.writes == []
+    assert worker.status(1, '2020-05')['pending'] and not worker.status(1, '2020-06')['pending']
+
+    kraj = time.monotonic() + 5
+    while len(store.writes) < 2 and time.monotonic() < kraj:
+        time.sleep(0.05)
+    assert sorted(store.writes) == [(1, [0, 1, 2, 3, 4]), (2, [9])]
+    assert not worker.status(1, '2020-05')['pending']
+
+
+def test_snapshot_status_reports_pending_and_written_changes(client, osoba_id):
+    mesec = '2020-06'
+    client.post(f'/api/prihodi/{osoba_id}/{mesec}', json={'naziv': 'Plata', 'iznos': 100})
+    assert client.get(f'/api/snapshot/{osoba_id}/{mesec}').json['pending']
+
+    history_worker.flush()
+    status = client.get(f'/api/snapshot/{osoba_id}/{mesec}').json
+    assert not status['pending'] and status['generated_at'] is not None
+
+
+def new_person():
+    # /api/osoba only edits the first person; history is kept per person
+    with app.app_context():
+        osoba = Person(ime='Novi', prezime='Test', datum_rodjenja=date(1990, 1, 1))
+        db.session.add(osoba)
+        db.session.commit()
+        return osoba.id
+
+
+def history_dir(osoba_id):
+    return os.path.join(APP_DATA_DIR, f'user_{osoba_id}', 'history')
+
+
+def month_at(client, osoba_id, mesec, at):
+    response = client.get(f'/api/history/{osoba_id}/{mesec}', query_string={'at': at})
+    if response.status_code == 404:
+        return None
+    return (sorted(p['naziv'] for p in response.json['prihodi']),
+            sorted(t['naziv'] for t in response.json['troskovi']))
+
+
+def test_history_rebuilds_month_at_any_time(client, monkeypatch):
+    osoba_id, mesec = new_person(), '2020-07'
+    hrana = kategorija(client, 'Hrana')
+    pre = datetime.utcnow().isoformat()
+    plata = client.post(f'/api/prihodi/{osoba_id}/{mesec}', json={'naziv': 'Plata', 'iznos': 100}).json['prihod_id']
+    hleb = client.post(f'/api/troskovi/{osoba_id}/{mesec}', json={
+        'naziv': 'Hleb', 'iznos': 50, 'kategorija_id': hrana}).json['trosak_id']
+    history_worker.flush()
+    posle_dodavanja = datetime.utcnow().isoformat()
+
+    # The first checkpoint holds the state before the first logged change
+    with open(history_store._checkpoints(history_dir(osoba_id))[-1][2], encoding='utf-8') as f:
+        pocetak = json.load(f)
+    assert (pocetak['v'], pocetak['prihodi'], pocetak['troskovi']) == (0, {}, {})
+
+    monkeypatch.setattr(history_store, 'checkpoint_every', 2)
+    assert client.delete(f'/api/prihod/{plata}').json['success']
+    client.post(f'/api/prihodi/{osoba_id}/{mesec}', json={'naziv': 'Bonus', 'iznos': 30})
+    history_worker.flush()
+    posle_brisanja = datetime.utcnow().isoformat()
+    assert client.delete(f'/api/trosak/{hleb}').json['success']
+    history_worker.flush()
+
+    assert month_at(client, osoba_id, mesec, pre) is None
+    assert month_at(client, osoba_id, mesec, posle_dodavanja) == (['Plata'], ['Hleb'])
+    assert month_at(client, osoba_id, mesec, posle_brisanja) == (['Bonus'], ['Hleb'])
+    assert month_at(client, osoba_id, mesec, datetime.utcnow().isoformat()) == (['Bonus'], [])
+    assert [(c['op'], c['tip']) for c in client.get(f'/api/history/{osoba_id}/{mesec}/changes').json] == [
+        ('add', 'prihod'), ('add', 'trosak'), ('delete', 'prihod'), ('add', 'prihod'), ('delete', 'trosak')]
+
+    # Only the checkpoint picked by its file name is read
+    procitani = []
+    load = json.load
+    monkeypatch.setattr(json, 'load', lambda f, **kw: procitani.append(f.name) or load(f, **kw))
+    assert month_at(client, osoba_id, mesec, posle_dodavanja) == (['Plata'], ['Hleb'])
+    assert len(procitani) == 1
+
+
+def test_history_keeps_a_log_without_checkpoints(client):
+    osoba_id, mesec = new_person(), '2020-08'
+    hist_dir = history_dir(osoba_id)
+    os.makedirs(hist_dir, exist_ok=True)
+    stari = {'v': 1, 't': '2020-08-01T10:00:00', 'op': 'add', 'tip': 'prihod', 'id': 999, 'mesec': mesec,
+             'stavka': {'naziv': 'Stari', 'iznos': 1}}
+    with open(os.path.join(hist_dir, 'changes.jsonl'), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(stari) + '\n')
+
+    client.post(f'/api/prihodi/{osoba_id}/{mesec}', json={'naziv': 'Plata', 'iznos': 100})
+    history_worker.flush()
+    promene = client.get(f'/api/history/{osoba_id}/{mesec}/changes').json
+    assert [(c['v'], c['stavka']['naziv']) for c in promene] == [(1, 'Stari'), (2, 'Plata')]
+    assert month_at(client, osoba_id, mesec, datetime.utcnow().isoformat()) == (['Plata'], [])
+
+
+@pytest.mark.parametrize('value, iznos', [
+    (1234.5, 1234.5), ('1234.50', 1234.5), ('1.234,50', 1234.5), ('1,234.50', 1234.5),
+    ('-1 234,50', -1234.5), ('12.500', 12500), ('1.234.567', 1234567), ('12,5', 12.5),
+])
+def test_parse_iznos(value, iznos):
+    assert parse_iznos(value) == iznos
+
+
+@pytest.mark.parametrize('value', [True, False, None, '', 'abc', 'nan', float('inf'), [1]])
+def test_parse_iznos_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_iznos(value)
+
+
+def test_batch_import_reports_invalid_items(client, osoba_id):
+    mesec = '2020-09'
+    hrana = kategorija(client, 'Hrana')
+    odgovor = client.post(f'/api/troskovi/{osoba_id}/{mesec}/batch', json={'stavke': [
+        {'naziv': 'Hleb', 'iznos': '120,50', 'kategorija_id': hrana},
+        {'naziv': 'Mleko', 'iznos': 80, 'kategorija': 'hrana', 'opis': None},
+        {'naziv': 'Jaja', 'iznos': True, 'kategorija_id': hrana},
+        {'naziv': 'Sir', 'iznos': 300, 'kategorija_id': hrana, 'opis': {'x': 1}},
+        {'naziv': '', 'iznos': 10, 'kategorija_id': hrana},
+        {'naziv': 'Kafa', 'iznos': -5, 'kategorija_id': hrana},
+        {'naziv': 'Nesto', 'iznos': 5, 'kategorija': 'nepostojeca'},
+    ]})
+    assert odgovor.status_code == 200
+    assert (odgovor.json['dodato'], odgovor.json['preskoceno']) == (2, 5)
+    assert [r['success'] for r in odgovor.json['rezultati']] == [True, True, False, False, False, False, False]
+    assert client.get(f'/api/izvestaj/{osoba_id}/{mesec}').json['total_troskovi'] == 200.5
+
+    assert client.post(f'/api/prihodi/{osoba_id}/{mesec}/batch', json={'stavke': 'x'}).status_code == 400
+    odgovor = client.post(f'/api/prihodi/{osoba_id}/{mesec}/batch', json=[
+        {'naziv': 'Plata', 'iznos': '50.000'}, {'naziv': 'Bonus', 'iznos': 0}])
+    assert (odgovor.json['dodato'], odgovor.json['preskoceno']) == (1, 1)
+    assert client.get(f'/api/izvestaj/{osoba_id}/{mesec}').json['total_prihodi'] == 50000
+
+
+def upload(client, url, tekst, encoding='utf-8', **form):
+    return client.post(url, data={'fajl': (io.BytesIO(tekst.encode(encoding)), 'uvoz.csv'), **form},
+                       content_type='multipart/form-data')
+
+
+def test_csv_import_of_expense_lists_and_bank_statements(client, osoba_id):
+    hrana = kategorija(client, 'Hrana')
+
+    # A plain list: the one negative row is an error, not a statement switch
+    mesec = '2020-10'
+    odgovor = upload(client, f'/api/troskovi/{osoba_id}/{mesec}/csv',
+                     'naziv,iznos,kategorija\nHleb,100,Hrana\nMleko,80,Hrana\nPovracaj,-20,Hrana\n')
+    assert (odgovor.json['dodato'], odgovor.json['preskoceno']) == (2, 1)
+    assert client.get(f'/api/izvestaj/{osoba_id}/{mesec}').json['total_troskovi'] == 180
+
+    # A Windows-1250 bank statement: debits are expenses, credits are skipped
+    mesec = '2020-11'
+    odgovor = upload(client, f'/api/troskovi/{osoba_id}/{mesec}/csv',
+                     'Opis;Iznos\nMaxi Čačak;-1.234,50\nDIS prodavnica;-500,00\nZarada;60.000,00\n',
+                     encoding='cp1250', kategorija_id=hrana)
+    assert (odgovor.json['dodato'], odgovor.json['preskoceno']) == (2, 1)
+    troskovi = client.get(f'/api/troskovi/{osoba_id}/{mesec}').json
+    assert sorted((t['naziv'], t['iznos']) for t in troskovi) == [('DIS prodavnica', 500), ('Maxi Čačak', 1234.5)]
+
+    odgovor = upload(client, f'/api/prihodi/{osoba_id}/{mesec}/csv', 'naziv;iznos\nPlata;1.000\n')
+    assert odgovor.json['dodato'] == 1
+    assert client.post(f'/api/prihodi/{osoba_id}/{mesec}/csv', data={},
+                       content_type='multipart/form-data').status_code == 400